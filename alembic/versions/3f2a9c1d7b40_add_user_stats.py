@@ -0,0 +1,38 @@
+"""add user_stats
+
+Revision ID: 3f2a9c1d7b40
+Revises: 
+Create Date: 2026-10-18 18:05:12.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b40'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('attempt_count', sa.Integer(), nullable=False),
+        sa.Column('weak_topics', sa.JSON(), nullable=False),
+        sa.Column('mastered_topics', sa.JSON(), nullable=False),
+        sa.Column('revision_dates', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_stats')
@@ -0,0 +1,28 @@
+"""add revision repetitions
+
+Revision ID: 5d8a3e1f9c27
+Revises: c47d9e2f1b06
+Create Date: 2026-10-18 21:12:40.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8a3e1f9c27'
+down_revision: Union[str, Sequence[str], None] = 'c47d9e2f1b06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('revision_schedules', sa.Column('repetitions', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('revision_schedules', 'repetitions')
@@ -0,0 +1,36 @@
+"""add mastery ewma state
+
+Revision ID: 7c2e5a9d3f61
+Revises: b36e0d8f4a12
+Create Date: 2026-10-18 23:41:17.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e5a9d3f61'
+down_revision: Union[str, Sequence[str], None] = 'b36e0d8f4a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('mastery', sa.Column('score_variance', sa.Float(), server_default='0', nullable=False))
+    op.add_column('mastery', sa.Column('observations', sa.Integer(), server_default='0', nullable=False))
+    # Existing scores count as one observation until the backfill task rebuilds them from attempts
+    op.execute("UPDATE mastery SET observations = 1 WHERE score IS NOT NULL")
+    op.add_column('attempts', sa.Column('solving_time', sa.Integer(), nullable=True))
+    op.add_column('attempts', sa.Column('confidence', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('attempts', 'confidence')
+    op.drop_column('attempts', 'solving_time')
+    op.drop_column('mastery', 'observations')
+    op.drop_column('mastery', 'score_variance')
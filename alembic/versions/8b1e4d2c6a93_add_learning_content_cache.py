@@ -0,0 +1,48 @@
+"""add learning_content_cache
+
+Revision ID: 8b1e4d2c6a93
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-18 19:12:40.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e4d2c6a93'
+down_revision: Union[str, Sequence[str], None] = '3f2a9c1d7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'learning_content_cache',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('cache_key', sa.String(), nullable=False),
+        sa.Column('topic_name', sa.String(), nullable=False),
+        sa.Column('section', sa.String(), nullable=False),
+        sa.Column('prompt_version', sa.Integer(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+        sa.Column('completion_tokens', sa.Integer(), nullable=True),
+        sa.Column('hits', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_hit_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_learning_content_cache_id'), 'learning_content_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_learning_content_cache_last_hit_at'), 'learning_content_cache', ['last_hit_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_learning_content_cache_last_hit_at'), table_name='learning_content_cache')
+    op.drop_index(op.f('ix_learning_content_cache_id'), table_name='learning_content_cache')
+    op.drop_table('learning_content_cache')
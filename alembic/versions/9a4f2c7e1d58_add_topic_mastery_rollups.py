@@ -0,0 +1,49 @@
+"""add topic mastery rollups
+
+Revision ID: 9a4f2c7e1d58
+Revises: e81b6c4a2f95
+Create Date: 2026-10-18 22:31:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f2c7e1d58'
+down_revision: Union[str, Sequence[str], None] = 'e81b6c4a2f95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'topic_mastery_rollups',
+        sa.Column('school', sa.String(), nullable=False),
+        sa.Column('class', sa.String(), nullable=False),
+        sa.Column('topic_id', sa.String(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.Column('score_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['topic_id'], ['topics.id'], ),
+        sa.PrimaryKeyConstraint('school', 'class', 'topic_id')
+    )
+    # Seed from the current mastery table; the periodic refresh does the same
+    op.execute(
+        """
+        INSERT INTO topic_mastery_rollups (school, class, topic_id, score_sum, score_count)
+        SELECT COALESCE(u.school, ''), COALESCE(u.class, ''), m.topic_id, SUM(m.score), COUNT(m.score)
+        FROM mastery m JOIN users u ON u.id = m.user_id
+        GROUP BY GROUPING SETS ((m.topic_id), (m.topic_id, u.school), (m.topic_id, u.school, u.class))
+        HAVING (GROUPING(u.school) = 1 OR u.school IS NOT NULL)
+           AND (GROUPING(u.class) = 1 OR u.class IS NOT NULL)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('topic_mastery_rollups')
@@ -0,0 +1,54 @@
+"""add notes search vector
+
+Revision ID: a6c3e9f2d815
+Revises: d5b8f1a3c724
+Create Date: 2026-10-19 01:04:37.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c3e9f2d815'
+down_revision: Union[str, Sequence[str], None] = 'd5b8f1a3c724'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(topic_names, '')), 'B') || "
+    "setweight(to_tsvector('english', left(coalesce(content, ''), 500000)), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('topic_names', sa.Text(), nullable=True))
+    # Topic names of already processed notes, before the generated column is computed from them
+    op.execute(
+        """
+        UPDATE notes SET topic_names = t.names
+        FROM (
+            SELECT note_id, string_agg(name, E'\\n' ORDER BY name) AS names
+            FROM topics WHERE note_id IS NOT NULL GROUP BY note_id
+        ) t
+        WHERE t.note_id = notes.id::text
+        """
+    )
+    # Rewrites the notes table once to compute the vector for every row
+    op.add_column(
+        'notes',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True),
+    )
+    op.create_index('ix_notes_search_vector', 'notes', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notes_search_vector', table_name='notes', postgresql_using='gin')
+    op.drop_column('notes', 'search_vector')
+    op.drop_column('notes', 'topic_names')
@@ -0,0 +1,28 @@
+"""add users role school class index
+
+Revision ID: b36e0d8f4a12
+Revises: 9a4f2c7e1d58
+Create Date: 2026-10-18 23:04:51.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b36e0d8f4a12'
+down_revision: Union[str, Sequence[str], None] = '9a4f2c7e1d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_role_school_class', 'users', ['role', 'school', 'class', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_role_school_class', table_name='users')
@@ -0,0 +1,28 @@
+"""add question bank index
+
+Revision ID: c47d9e2f1b06
+Revises: 8b1e4d2c6a93
+Create Date: 2026-10-18 19:48:03.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47d9e2f1b06'
+down_revision: Union[str, Sequence[str], None] = '8b1e4d2c6a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_questions_topic_difficulty', 'questions', ['topic_id', 'difficulty'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_questions_topic_difficulty', table_name='questions')
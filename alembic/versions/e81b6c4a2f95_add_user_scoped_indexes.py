@@ -0,0 +1,34 @@
+"""add user scoped indexes
+
+Revision ID: e81b6c4a2f95
+Revises: 5d8a3e1f9c27
+Create Date: 2026-10-18 21:58:17.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81b6c4a2f95'
+down_revision: Union[str, Sequence[str], None] = '5d8a3e1f9c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_revision_schedules_user_scheduled', 'revision_schedules', ['user_id', 'scheduled_date'], unique=False)
+    op.create_index('ix_attempts_user_timestamp', 'attempts', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_mastery_user_score', 'mastery', ['user_id', 'score'], unique=False)
+    op.create_index('ix_notes_user_created', 'notes', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notes_user_created', table_name='notes')
+    op.drop_index('ix_mastery_user_score', table_name='mastery')
+    op.drop_index('ix_attempts_user_timestamp', table_name='attempts')
+    op.drop_index('ix_revision_schedules_user_scheduled', table_name='revision_schedules')
@@ -0,0 +1,28 @@
+"""add learning cache created_at index
+
+Revision ID: f2a7c5d91e38
+Revises: a6c3e9f2d815
+Create Date: 2026-10-19 09:12:44.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c5d91e38'
+down_revision: Union[str, Sequence[str], None] = 'a6c3e9f2d815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_learning_content_cache_created_at'), 'learning_content_cache', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_learning_content_cache_created_at'), table_name='learning_content_cache')
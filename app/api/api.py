@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api import auth, notes, quiz, attempts, learning, revision, timetable, users, dashboard
+from app.api import auth, notes, quiz, attempts, learning, revision, timetable, users, dashboard, teacher
 
 api_router = APIRouter()
 
@@ -13,3 +13,4 @@ api_router.include_router(learning.router, prefix="/learning", tags=["Multi-Form
 api_router.include_router(revision.router, prefix="/revision", tags=["Spaced Repetition"])
 api_router.include_router(timetable.router, prefix="/timetable", tags=["Smart Timetable"])
 api_router.include_router(dashboard.router, prefix="/progress", tags=["Progress & Dashboard"])
+api_router.include_router(teacher.router, prefix="/teacher", tags=["Teacher Analytics"])
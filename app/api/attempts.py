@@ -1,19 +1,23 @@
 from typing import Any
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.attempt import Attempt
 from app.models.mastery import Mastery
 from app.schemas.attempt import AttemptCreate, Attempt as AttemptSchema
-from app.services.mastery_service import calculate_mastery_score
+from app.services.mastery_service import MasteryState, calculate_mastery_score
+from app.services.timetable_cache import invalidate_for_mastery
+from app.services.topic_rollups import record_mastery_changes
+from app.services.user_stats import record_attempts
 
 router = APIRouter()
 
 @router.post("/submit", response_model=AttemptSchema)
-def submit_attempt(
+async def submit_attempt(
     attempt_in: AttemptCreate,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async),
 ) -> Any:
     """
     Submit a single question attempt, log it, and update the user's mastery score for the topic.
@@ -29,30 +33,35 @@ def submit_attempt(
     )
     db.add(db_attempt)
 
-    # Calculate the new mastery score
-    new_mastery_score = calculate_mastery_score(
-        is_correct=attempt_in.isCorrect,
-        solving_time=attempt_in.solvingTime,
-        confidence=attempt_in.confidence,
+    # Fold the attempt into the topic's mastery estimate
+    mastery = await db.scalar(
+        select(Mastery)
+        .where(Mastery.user_id == current_user.id, Mastery.topic_id == attempt_in.topicId)
+        .with_for_update()  # the estimate is read-modify-write; the teacher rollups are shifted by new - old score
     )
-
-    # Upsert mastery score
-    mastery = (
-        db.query(Mastery)
-        .filter(Mastery.user_id == current_user.id, Mastery.topic_id == attempt_in.topicId)
-        .first()
+    old_score = mastery.score if mastery else None
+    state = MasteryState.from_row(mastery).update(
+        calculate_mastery_score(
+            is_correct=attempt_in.isCorrect,
+            solving_time=attempt_in.solvingTime,
+            confidence=attempt_in.confidence,
+        )
     )
     if not mastery:
-        mastery = Mastery(
-            user_id=current_user.id, 
-            topic_id=attempt_in.topicId, 
-            score=new_mastery_score
-        )
+        mastery = Mastery(user_id=current_user.id, topic_id=attempt_in.topicId)
         db.add(mastery)
-    else:
-        mastery.score = new_mastery_score
+    mastery.score = state.mean
+    mastery.score_variance = state.variance
+    mastery.observations = state.count
+    new_mastery_score = state.mean
+
+    # Keep the materialized dashboard stats, teacher rollups and stored timetables in step
+    await db.flush()
+    await record_attempts(db, current_user.id, 1, {attempt_in.topicId: new_mastery_score})
+    await record_mastery_changes(db, current_user.id, {attempt_in.topicId: old_score}, {attempt_in.topicId: new_mastery_score})
+    await invalidate_for_mastery(db, current_user.id, {attempt_in.topicId: old_score}, {attempt_in.topicId: new_mastery_score})
 
-    db.commit()
-    db.refresh(db_attempt)
+    await db.commit()
+    await db.refresh(db_attempt)
 
     return db_attempt
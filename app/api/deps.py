@@ -3,32 +3,66 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core import security
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.models.user import User
+from app.services.auth_cache import CachedAuth, UserSnapshot, auth_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 class TokenPayload(BaseModel):
-    sub: Optional[int] = None
+    sub: Optional[str] = None  # User ids are UUID strings
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+def decode_token(token: str) -> dict:
+    """Decode and validate a JWT, returning its claims."""
     try:
         payload = jwt.decode(
             token, settings.JWT_SECRET, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        TokenPayload(**payload)
+        return payload
     except (JWTError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    
-    user = db.query(User).filter(User.id == token_data.sub).first()
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> UserSnapshot:
+    """
+    Resolve the bearer token to a user snapshot.
+
+    Cache hits skip both the JWT decode and the user query; see `app.services.auth_cache`.
+    """
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached.user
+
+    claims = decode_token(token)
+    user = db.query(User).filter(User.id == claims["sub"]).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    snapshot = UserSnapshot.from_user(user)
+    auth_cache.set(token, CachedAuth(claims=claims, user=snapshot))
+    return snapshot
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> UserSnapshot:
+    """Async twin of `get_current_user` for routers running on `get_async_db`."""
+    cached = await auth_cache.aget(token)
+    if cached is not None:
+        return cached.user
+
+    claims = decode_token(token)
+    user = await db.scalar(select(User).where(User.id == claims["sub"]))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    snapshot = UserSnapshot.from_user(user)
+    await auth_cache.aset(token, CachedAuth(claims=claims, user=snapshot))
+    return snapshot
@@ -1,51 +1,127 @@
+import asyncio
+import json
+from typing import AsyncIterator, Dict, Optional, Tuple
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.topic import Topic
 from app.schemas.learning import LearningContent
-import openai
 from app.core.config import settings
-import json
+from app.services.learning_cache import GeneratedSection, learning_cache
+from app.services.llm import achat_completion
 
 router = APIRouter()
 
+SYSTEM_PROMPT = "You are a world-class teacher. Your explanations are clear, concise, and engaging."
+
+# Bump whenever SECTION_PROMPTS or SYSTEM_PROMPT change, so cached sections are regenerated
+PROMPT_VERSION = 1
+
+SECTION_PROMPTS = {
+    "feynman": "Explain '{topic}' using the Feynman Technique. Keep it simple, intuitive, and use an analogy.",
+    "alternate_explanations": "Provide two alternative explanations for '{topic}'. One should be highly technical, and the other should be historical or context-based.",
+    "analogies": "Give two distinct and vivid analogies for '{topic}' that relate to everyday life.",
+    "mind_map": "Generate a text-based mind map for '{topic}' in ASCII format. It should have a central topic and at least 4 branches with sub-points.",
+    "flowchart": "Create a simple, text-based flowchart in ASCII to explain a process related to '{topic}'."
+}
+
+
+async def _call_llm(section: str, topic_name: str) -> GeneratedSection:
+    response = await achat_completion(
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": SECTION_PROMPTS[section].format(topic=topic_name)}
+        ],
+        purpose=f"learning.{section}",
+    )
+    usage = response.usage
+    return GeneratedSection(
+        content=response.choices[0].message.content,
+        prompt_tokens=usage.prompt_tokens if usage else 0,
+        completion_tokens=usage.completion_tokens if usage else 0,
+    )
+
+
+async def _generate_section(section: str, topic_name: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Returns (section, content, error); a failed or timed-out section never raises."""
+    try:
+        content = await asyncio.wait_for(
+            learning_cache.get_or_generate(
+                topic_name, section, PROMPT_VERSION, settings.OPENAI_MODEL,
+                lambda: _call_llm(section, topic_name),
+            ),
+            timeout=settings.LLM_SECTION_TIMEOUT_SECONDS,
+        )
+        return section, content, None
+    except asyncio.TimeoutError:
+        return section, None, f"Timed out after {settings.LLM_SECTION_TIMEOUT_SECONDS}s"
+    except Exception as e:
+        return section, None, str(e)
+
+
+async def generate_sections(topic_name: str) -> AsyncIterator[Tuple[str, Optional[str], Optional[str]]]:
+    """Run all section calls concurrently and yield each one as soon as it finishes."""
+    tasks = [asyncio.create_task(_generate_section(section, topic_name)) for section in SECTION_PROMPTS]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client may disconnect mid-stream; don't leave calls running
+        for task in tasks:
+            task.cancel()
+
+
 @router.post("/generate/{topic_id}", response_model=LearningContent)
-def generate_learning_content(
+async def generate_learning_content(
     topic_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    stream: bool = False,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
 ):
     """
     Generate multi-format learning content for a specific topic.
+
+    Sections are served from the shared learning cache when another student
+    already generated them for the same topic name; the rest are generated
+    concurrently, each with its own timeout.
+    Sections that fail are reported in `errors` instead of failing the request.
+    With `stream=true` the response is NDJSON, one
+    `{"section", "content", "error"}` line per section in completion order.
     """
-    topic = db.query(Topic).filter(Topic.id == topic_id).first()
+    topic = await db.scalar(select(Topic).where(Topic.id == topic_id))
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
+    topic_name = topic.name
 
-    prompts = {
-        "feynman": f"Explain '{topic.name}' using the Feynman Technique. Keep it simple, intuitive, and use an analogy.",
-        "alternate_explanations": f"Provide two alternative explanations for '{topic.name}'. One should be highly technical, and the other should be historical or context-based.",
-        "analogies": f"Give two distinct and vivid analogies for '{topic.name}' that relate to everyday life.",
-        "mind_map": f"Generate a text-based mind map for '{topic.name}' in ASCII format. It should have a central topic and at least 4 branches with sub-points.",
-        "flowchart": f"Create a simple, text-based flowchart in ASCII to explain a process related to '{topic.name}'."
-    }
+    if stream:
+        async def ndjson():
+            async for section, content, error in generate_sections(topic_name):
+                yield json.dumps({"section": section, "content": content, "error": error}) + "\n"
 
-    try:
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        # In a real app, these could be parallel API calls
-        content = {}
-        for key, prompt in prompts.items():
-            response = client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are a world-class teacher. Your explanations are clear, concise, and engaging."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            content[key] = response.choices[0].message.content
-
-        return content
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate learning content: {str(e)}")
+    content: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    async for section, text, error in generate_sections(topic_name):
+        if error is None:
+            content[section] = text
+        else:
+            errors[section] = error
+
+    if not content:
+        raise HTTPException(status_code=500, detail=f"Failed to generate learning content: {errors}")
+
+    return LearningContent(**content, errors=errors)
+
+
+@router.get("/cache-stats")
+async def get_learning_cache_stats(
+    current_user = Depends(deps.get_current_user_async)
+):
+    """
+    Learning content cache hit ratio and LLM tokens avoided, for this process and the shared store.
+    """
+    return await learning_cache.stats()
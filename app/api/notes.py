@@ -1,35 +1,43 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.note import Note
 from app.models.topic import Topic, Subtopic
-from app.schemas.note import Note as NoteSchema, NoteCreate
+from app.schemas.note import Note as NoteSchema, NoteCreate, NotePage, NoteSearchPage
 import pytesseract
 from PIL import Image
 import io
 import openai
 from app.core.config import settings
-from app.worker import process_note_ocr_and_ai
+from app.services.note_search import search_notes
+from app.services.note_storage import UploadTooLargeError, store_upload
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, decode_cursor, encode_cursor, split_page
+from app.worker import note_pipeline
 
 router = APIRouter()
 
 @router.post("/upload", response_model=NoteSchema)
 async def upload_note(
     file: UploadFile = File(...),
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
 ) -> Any:
     """
     Upload file and trigger background processing for OCR and AI analysis.
-    """
-    contents = await file.read()
 
+    The file is streamed in chunks into content-addressed storage, so identical
+    uploads share one stored blob.
+    """
     # In a real production environment, you would upload this to a cloud storage like S3
     # and pass the URL to the worker.
-    file_location = f"local_uploads/{file.filename}"
-    with open(file_location, "wb") as f:
-        f.write(contents)
+    try:
+        stored = await store_upload(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    file_location = stored.path
 
     # Create a note entry with a "pending" status
     note = Note(
@@ -40,17 +48,17 @@ async def upload_note(
         status="pending"
     )
     db.add(note)
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await db.refresh(note)
 
     # Trigger the background task
     try:
-        process_note_ocr_and_ai.delay(note.id)
+        note_pipeline(note.id).apply_async()
     except Exception as e:
         # If Celery is down, mark the note as failed and return an error
         note.status = "failed"
         note.content = f"Failed to queue processing task: {str(e)}"
-        db.commit()
+        await db.commit()
         raise HTTPException(
             status_code=500,
             detail="Could not start note processing. Please try again later."
@@ -58,29 +66,71 @@ async def upload_note(
 
     return note
 
-@router.get("/", response_model=List[NoteSchema])
-def read_notes(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+@router.get("/", response_model=NotePage)
+async def read_notes(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
 ) -> Any:
     """
-    Retrieve all notes for the current user.
+    Retrieve the current user's notes, newest first.
+
+    Keyset-paginated on (created_at, id): pass `next_cursor` back as `cursor`
+    for the next page.
     """
-    notes = db.query(Note).filter(Note.user_id == current_user.id).offset(skip).limit(limit).all()
-    return notes
+    query = select(Note).where(Note.user_id == current_user.id)
+    if cursor:
+        try:
+            before_created, before_id = decode_cursor(cursor, (datetime, int))
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(tuple_(Note.created_at, Note.id) < (before_created, before_id))
+    notes = await db.scalars(query.order_by(Note.created_at.desc(), Note.id.desc()).limit(limit + 1))
+    page, more = split_page(notes.all(), limit)
+    return NotePage(
+        items=page,
+        next_cursor=encode_cursor(page[-1].created_at, page[-1].id) if more else None,
+    )
+
+@router.get("/search", response_model=NoteSearchPage)
+async def search_user_notes(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
+) -> Any:
+    """
+    Search the current user's notes by title, topics and content, best match first.
+
+    `q` takes web search syntax: words, "quoted phrases", -excluded words, or.
+    Keyset-paginated on (rank, id): pass `next_cursor` back as `cursor` with
+    the same `q` for the next page.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, (float, int))
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    hits = await search_notes(db, current_user.id, q, limit + 1, after)
+    page, more = split_page(hits, limit)
+    return NoteSearchPage(
+        items=page,
+        next_cursor=encode_cursor(page[-1]["rank"], page[-1]["id"]) if more else None,
+    )
 
 @router.get("/{note_id}", response_model=NoteSchema)
-def read_note(
+async def read_note(
     note_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
 ) -> Any:
     """
     Retrieve a single note by its ID.
     """
-    note = db.query(Note).filter(Note.id == note_id, Note.user_id == current_user.id).first()
+    note = await db.scalar(select(Note).where(Note.id == note_id, Note.user_id == current_user.id))
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     return note
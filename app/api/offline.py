@@ -1,14 +1,24 @@
-from typing import Any, List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.models.attempt import Attempt
+from app.models.attempt import Attempt, generate_id
+from app.models.mastery import Mastery
+from app.services.mastery_service import MasteryState, build_mastery_state_upsert, calculate_mastery_score
+from app.services.timetable_cache import invalidate_for_mastery
+from app.services.topic_rollups import record_mastery_changes
+from app.services.user_stats import record_attempts
 
 router = APIRouter()
 
+# Rows per multi-row INSERT. Keeps the bind-parameter count well under the
+# Postgres/pg8000 limit even for very long offline queues.
+SYNC_BATCH_SIZE = 1000
+
 
 class OfflineAttemptPayload(dict):
     """Loose typing for offline attempts payload.
@@ -18,11 +28,25 @@ class OfflineAttemptPayload(dict):
     """
 
 
+def _as_utc(value: datetime) -> datetime:
+    # createdAt may be naive; treat it as UTC so it sorts against aware timestamps
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _parse_created_at(raw: Any) -> Optional[datetime]:
+    if isinstance(raw, str):
+        try:
+            return datetime.fromisoformat(raw)
+        except Exception:
+            return None
+    return None
+
+
 @router.post("/sync")
-def sync_offline_data(
+async def sync_offline_data(
     data: dict,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async),
 ) -> Any:
     """Sync offline data (primarily question attempts) to the backend.
 
@@ -40,44 +64,69 @@ def sync_offline_data(
         }
       ]
     }
+
+    Attempts are folded into the mastery estimates in ``createdAt`` order and
+    written in batches of ``SYNC_BATCH_SIZE``: one multi-row INSERT for the
+    attempts, one locking read of the touched mastery rows, one upsert of the
+    updated estimates and one teacher-rollup upsert with the resulting score
+    changes, all inside a single transaction. The user's dashboard stats are
+    then updated once for the whole sync.
     """
     attempts_data: List[OfflineAttemptPayload] = data.get("attempts", []) or []
     synced_count = 0
+    new_scores: Dict[str, float] = {}
+    now = datetime.now(timezone.utc)
 
+    attempt_rows: List[Dict[str, Any]] = []
     for attempt in attempts_data:
-        topic_id: Optional[str] = attempt.get("topicId") # Changed to str
+        topic_id: Optional[str] = attempt.get("topicId")
         if topic_id is None:
             continue
+        attempt_rows.append(
+            {
+                "id": generate_id(),
+                "user_id": current_user.id,
+                "topic_id": str(topic_id),
+                "question_id": attempt.get("questionId"),
+                "is_correct": bool(attempt.get("isCorrect")),
+                "solving_time": attempt.get("solvingTime"),
+                "confidence": attempt.get("confidence"),
+                "timestamp": _parse_created_at(attempt.get("createdAt")) or now,
+            }
+        )
+    # The estimate weights recent attempts more, so apply them in the order they were made
+    attempt_rows.sort(key=lambda row: _as_utc(row["timestamp"]))
+
+    for start in range(0, len(attempt_rows), SYNC_BATCH_SIZE):
+        batch = attempt_rows[start:start + SYNC_BATCH_SIZE]
+        await db.execute(insert(Attempt).values(batch))
 
-        created_at_raw = attempt.get("createdAt")
-        created_at: Optional[datetime] = None
-        if isinstance(created_at_raw, str):
-            try:
-                created_at = datetime.fromisoformat(created_at_raw)
-            except Exception:
-                created_at = None
-
-        is_correct = bool(attempt.get("isCorrect"))
-        
-        db_attempt = Attempt(
-            user_id=current_user.id,
-            topic_id=topic_id,
-            question_id=attempt.get("questionId"), # Add questionId
-            is_correct=is_correct,
-            timestamp=created_at or None,
+        # Current estimates, locked until commit: the upsert writes absolute states
+        # and the teacher rollups get exact deltas. populate_existing: the upsert of an
+        # earlier batch bypasses the session, so rows it already loaded must be refreshed
+        current = (await db.scalars(
+            select(Mastery)
+            .where(Mastery.user_id == current_user.id, Mastery.topic_id.in_({row["topic_id"] for row in batch}))
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )).all()
+        old_scores = {mastery.topic_id: mastery.score for mastery in current}
+        states = {mastery.topic_id: MasteryState.from_row(mastery) for mastery in current}
+        for row in batch:
+            states.setdefault(row["topic_id"], MasteryState()).update(
+                calculate_mastery_score(row["is_correct"], row["solving_time"], row["confidence"])
+            )
+
+        await db.execute(
+            build_mastery_state_upsert({(current_user.id, topic_id): state for topic_id, state in states.items()})
         )
-        db.add(db_attempt)
-        synced_count += 1
-        
-        # Update Mastery (Simple heuristic for offline sync)
-        from app.models.mastery import Mastery
-        mastery = db.query(Mastery).filter(Mastery.user_id == current_user.id, Mastery.topic_id == topic_id).first()
-        score_change = 5 if is_correct else -2
-        if not mastery:
-            mastery = Mastery(user_id=current_user.id, topic_id=topic_id, score=50.0 + score_change)
-            db.add(mastery)
-        else:
-            mastery.score = max(0.0, min(100.0, float(mastery.score) + score_change))
-
-    db.commit()
+        batch_scores = {topic_id: state.mean for topic_id, state in states.items()}
+        await record_mastery_changes(db, current_user.id, old_scores, batch_scores)
+        await invalidate_for_mastery(db, current_user.id, old_scores, batch_scores)
+        new_scores.update(batch_scores)
+        synced_count += len(batch)
+
+    if synced_count:
+        await record_attempts(db, current_user.id, synced_count, new_scores)
+    await db.commit()
     return {"status": "synced", "count": synced_count}
@@ -1,50 +1,57 @@
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.api import deps
 from app.models.topic import Topic
 from app.models.mastery import Mastery
-from app.schemas.question import Question, QuestionCreate
-import openai
+from app.schemas.question import Question
 from app.core.config import settings
-import json
+from app.services.question_bank import (
+    difficulty_for_score,
+    generate_questions,
+    question_rows,
+    request_replenish,
+    sample_bank,
+    save_questions,
+    to_schema,
+)
 
 router = APIRouter()
 
 @router.post("/generate", response_model=List[Question])
 def generate_quiz(
-    topic_id: int,
+    topic_id: str,
     db: Session = Depends(deps.get_db),
     current_user = Depends(deps.get_current_user)
 ):
     """
-    Generate an adaptive quiz with 5-12 questions for a given topic.
+    Generate an adaptive quiz for a given topic.
+
+    Questions are sampled at random from the topic's question bank for the
+    user's difficulty. When the bank runs low a background task tops it up;
+    only a cold bank is generated inline, and that batch is persisted.
     """
     topic = db.query(Topic).filter(Topic.id == topic_id).first()
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
 
     mastery = db.query(Mastery).filter(Mastery.topic_id == topic_id, Mastery.user_id == current_user.id).first()
-    difficulty = "easy"
-    if mastery and mastery.score < 40:
-        difficulty = "hard"
-    elif mastery and mastery.score < 75:
-        difficulty = "medium"
-
-    try:
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": f"Generate 8 {difficulty} multiple-choice questions about '{topic.name}'. Return a JSON object with a 'questions' key, which is a list of objects. Each object must have 'question_text', 'options' (a list of 4 strings), and 'correct_answer' (the string of the correct option)."},
-            ],
-            response_format={"type": "json_object"}
-        )
-        quiz_data = json.loads(response.choices[0].message.content)
-        questions = quiz_data.get("questions", [])
-
-        # Here you would persist the questions to the database
+    difficulty = difficulty_for_score(mastery.score if mastery else None)
 
-        return questions
+    questions, bank_size = sample_bank(db, topic_id, difficulty, settings.QUIZ_SIZE)
+    if bank_size < settings.QUIZ_BANK_MIN_QUESTIONS:
+        if len(questions) >= settings.QUIZ_SIZE:
+            request_replenish(topic_id, difficulty)
+        else:
+            try:
+                rows = question_rows(
+                    topic_id, difficulty,
+                    generate_questions(topic.name, difficulty, settings.QUIZ_BANK_BATCH_SIZE),
+                )
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
+            save_questions(db, rows)
+            db.commit()
+            questions, _ = sample_bank(db, topic_id, difficulty, settings.QUIZ_SIZE)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
+    return [to_schema(q) for q in questions]
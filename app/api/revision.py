@@ -1,28 +1,48 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from collections import OrderedDict, deque
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.revision import RevisionSchedule
 from app.models.topic import Topic
+from app.schemas.revision import (
+    ReviewBatchRejection,
+    ReviewBatchResponse,
+    ReviewBatchResult,
+    ReviewEntry,
+    RevisionSchedulePage,
+)
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, decode_cursor, encode_cursor, split_page
+from app.services.revision_batch import review_updates
 from app.services.spaced_repetition import SM2
-from datetime import datetime
+from app.services.timetable_cache import invalidate_for_revisions
+from app.services.user_stats import record_revision, record_revisions
+from datetime import datetime, timedelta, timezone
 
 router = APIRouter()
 
+MAX_REVIEW_BATCH = 500
+CLOCK_SKEW = timedelta(minutes=5)  # tolerated for client-side reviewed_at timestamps
+
 @router.post("/schedule/{topic_id}")
-def schedule_initial_revision(
+async def schedule_initial_revision(
     topic_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
 ):
     """
     Schedules the first revision for a new topic (Day 1).
     """
-    topic = db.query(Topic).filter(Topic.id == topic_id).first()
+    topic = await db.scalar(select(Topic).where(Topic.id == topic_id))
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    existing_schedule = db.query(RevisionSchedule).filter_by(user_id=current_user.id, topic_id=topic_id).first()
+    existing_schedule = await db.scalar(
+        select(RevisionSchedule).filter_by(user_id=current_user.id, topic_id=topic_id)
+    )
     if existing_schedule:
         raise HTTPException(status_code=400, detail="Revision already scheduled")
 
@@ -35,23 +55,29 @@ def schedule_initial_revision(
         **sm2.to_dict()
     )
     db.add(schedule)
-    db.commit()
+    await db.flush()
+    await record_revision(db, current_user.id, topic_id, schedule.scheduled_date, topic.name)
+    await invalidate_for_revisions(db, current_user.id, [schedule.scheduled_date])
+    await db.commit()
     return {"message": f"Revision for '{topic.name}' scheduled for {schedule.scheduled_date}."}
 
 @router.post("/log-review/{topic_id}")
-def log_revision_review(
+async def log_revision_review(
     topic_id: int,
     quality: int, # User's self-assessed quality of recall (0-5)
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
 ):
     """
     Log a user's review and calculate the next revision date.
     """
-    schedule = db.query(RevisionSchedule).filter_by(user_id=current_user.id, topic_id=topic_id).first()
+    schedule = await db.scalar(
+        select(RevisionSchedule).filter_by(user_id=current_user.id, topic_id=topic_id)
+    )
     if not schedule:
         raise HTTPException(status_code=404, detail="No revision schedule found for this topic.")
 
+    previous_date = schedule.scheduled_date
     sm2 = SM2.from_dict(schedule.to_dict())
     sm2.review(quality)
 
@@ -59,20 +85,143 @@ def log_revision_review(
     for key, value in sm2.to_dict().items():
         setattr(schedule, key, value)
     
-    db.commit()
+    await db.flush()
+    await record_revision(db, current_user.id, topic_id, schedule.scheduled_date)
+    await invalidate_for_revisions(db, current_user.id, [previous_date, schedule.scheduled_date])
+    await db.commit()
     return {"message": f"Review logged. Next review on {schedule.scheduled_date}."}
 
-@router.get("/upcoming", response_model=List[RevisionSchedule])
-def get_upcoming_revisions(
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+@router.post("/log-reviews", response_model=ReviewBatchResponse)
+async def log_revision_reviews(
+    entries: List[Any],
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
+):
+    """
+    Log a whole revision session: a list of {topic_id, quality, reviewed_at}.
+
+    Matching schedules are loaded with one query, SM-2 is applied in memory
+    (several reviews of one topic apply in reviewed_at order) and the results
+    are written back with one bulk UPDATE, all in one transaction. Malformed
+    entries, future timestamps and topics without a schedule are rejected
+    individually; the rest of the batch is still applied.
+    """
+    if len(entries) > MAX_REVIEW_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_REVIEW_BATCH} reviews per batch.")
+
+    now = datetime.utcnow()
+    rejected: List[ReviewBatchRejection] = []
+    valid = []
+    for index, raw in enumerate(entries):
+        try:
+            entry = ReviewEntry.model_validate(raw)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(loc) for loc in error["loc"])
+            rejected.append(ReviewBatchRejection(
+                index=index,
+                topic_id=str(raw["topic_id"]) if isinstance(raw, dict) and raw.get("topic_id") is not None else None,
+                error=f"{field}: {error['msg']}" if field else error["msg"],
+            ))
+            continue
+        reviewed_at = entry.reviewed_at or now
+        if reviewed_at.tzinfo is not None:
+            reviewed_at = reviewed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        if reviewed_at > now + CLOCK_SKEW:
+            rejected.append(ReviewBatchRejection(index=index, topic_id=entry.topic_id, error="reviewed_at is in the future"))
+            continue
+        valid.append((index, entry.topic_id, entry.quality, reviewed_at))
+
+    rows = []
+    if valid:
+        rows = (await db.execute(
+            select(
+                RevisionSchedule.id, RevisionSchedule.topic_id, RevisionSchedule.ease_factor,
+                RevisionSchedule.interval, RevisionSchedule.repetitions, RevisionSchedule.scheduled_date, Topic.name,
+            )
+            .outerjoin(Topic, Topic.id == RevisionSchedule.topic_id)
+            .where(
+                RevisionSchedule.user_id == current_user.id,
+                RevisionSchedule.topic_id.in_({topic_id for _, topic_id, _, _ in valid}),
+            )
+        )).all()
+    state = {
+        row.topic_id: SimpleNamespace(id=row.id, ease_factor=row.ease_factor, interval=row.interval, repetitions=row.repetitions)
+        for row in rows
+    }
+    names = {row.topic_id: row.name for row in rows}
+    previous_dates = {row.topic_id: row.scheduled_date for row in rows}
+
+    pending: Dict[str, deque] = OrderedDict()
+    for index, topic_id, quality, reviewed_at in sorted(valid, key=lambda v: v[3]):
+        if topic_id not in state:
+            rejected.append(ReviewBatchRejection(index=index, topic_id=topic_id, error="No revision schedule found for this topic."))
+            continue
+        pending.setdefault(topic_id, deque()).append((quality, reviewed_at))
+    accepted = sum(len(reviews) for reviews in pending.values())
+
+    # Each round reviews every topic once, so repeated reviews of a topic compound in order
+    updates: Dict[str, Dict[str, Any]] = {}
+    while pending:
+        topics = list(pending)
+        heads = [pending[topic_id].popleft() for topic_id in topics]
+        params = review_updates([state[t] for t in topics], [q for q, _ in heads], [at for _, at in heads])
+        for topic_id, values in zip(topics, params):
+            state[topic_id] = SimpleNamespace(**values)
+            updates[topic_id] = values
+            if not pending[topic_id]:
+                del pending[topic_id]
+
+    if updates:
+        await db.execute(update(RevisionSchedule), list(updates.values()))
+        await record_revisions(
+            db, current_user.id,
+            {topic_id: (values["scheduled_date"], names.get(topic_id)) for topic_id, values in updates.items()},
+        )
+        await invalidate_for_revisions(
+            db, current_user.id,
+            [previous_dates[topic_id] for topic_id in updates] + [values["scheduled_date"] for values in updates.values()],
+        )
+        await db.commit()
+
+    return ReviewBatchResponse(
+        accepted=accepted,
+        schedules=[
+            ReviewBatchResult(topic_id=topic_id, scheduled_date=values["scheduled_date"])
+            for topic_id, values in updates.items()
+        ],
+        rejected=sorted(rejected, key=lambda r: r.index),
+    )
+
+@router.get("/upcoming", response_model=RevisionSchedulePage)
+async def get_upcoming_revisions(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user = Depends(deps.get_current_user_async)
 ):
     """
-    Get all revision schedules that are due.
+    Get the revision schedules that are due, most overdue first.
+
+    Keyset-paginated on (scheduled_date, id): pass `next_cursor` back as
+    `cursor` for the next page.
     """
     now = datetime.utcnow()
-    revisions = db.query(RevisionSchedule).filter(
+    query = select(RevisionSchedule).where(
         RevisionSchedule.user_id == current_user.id,
         RevisionSchedule.scheduled_date <= now
-    ).all()
-    return revisions
+    )
+    if cursor:
+        try:
+            after_date, after_id = decode_cursor(cursor, (datetime, str))
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(tuple_(RevisionSchedule.scheduled_date, RevisionSchedule.id) > (after_date, after_id))
+    revisions = await db.scalars(
+        query.order_by(RevisionSchedule.scheduled_date, RevisionSchedule.id).limit(limit + 1)
+    )
+    page, more = split_page(revisions.all(), limit)
+    return RevisionSchedulePage(
+        items=page,
+        next_cursor=encode_cursor(page[-1].scheduled_date, page[-1].id) if more else None,
+    )
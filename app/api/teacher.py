@@ -1,13 +1,18 @@
-from typing import Any, List, Dict
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select, true
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from app.api import deps
 from app.models.user import User
 from app.models.mastery import Mastery
 from app.models.attempt import Attempt
-from app.schemas.user import User as UserSchema
+from app.models.topic import Topic
+from app.models.topic_rollup import TopicMasteryRollup
+from app.schemas.user import StudentListItem, StudentPage
+from app.core.config import settings
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, decode_cursor, encode_cursor, split_page
+from app.services.topic_rollups import ALL
 
 router = APIRouter()
 
@@ -15,61 +20,116 @@ def check_teacher_role(current_user: User):
     if current_user.role not in ["teacher", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-@router.get("/students", response_model=List[UserSchema])
+@router.get("/students", response_model=StudentPage)
 def get_students(
+    school: Optional[str] = None,
+    class_name: Optional[str] = Query(None, alias="class"),
+    year: Optional[int] = None,
+    summary: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Get list of all students (Teacher/Admin only)
+    List students, optionally by school, class and year (Teacher/Admin only)
+
+    Keyset-paginated by id: pass `next_cursor` back as `cursor`. Only the listed
+    columns are selected, as plain rows. With `summary=true` each student also
+    carries their mastery average and attempt count, computed in the same query
+    through LATERAL subqueries on the (user_id, ...) indexes.
     """
     check_teacher_role(current_user)
-    students = db.query(User).filter(User.role == "student").all()
-    return students
+    query = (
+        select(User.id, User.name, User.school, User.class_name, User.year)
+        .select_from(User)
+        .where(User.role == "student")
+    )
+    if school is not None:
+        query = query.where(User.school == school)
+    if class_name is not None:
+        query = query.where(User.class_name == class_name)
+    if year is not None:
+        query = query.where(User.year == year)
+    if cursor:
+        try:
+            (after_id,) = decode_cursor(cursor, (str,))
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(User.id > after_id)
+
+    if summary:
+        mastery = (
+            select(func.avg(Mastery.score).label("mastery_average"))
+            .where(Mastery.user_id == User.id)
+            .lateral("student_mastery")
+        )
+        attempts = (
+            select(func.count().label("attempt_count"))
+            .where(Attempt.user_id == User.id)
+            .lateral("student_attempts")
+        )
+        query = (
+            query.add_columns(mastery.c.mastery_average, attempts.c.attempt_count)
+            .outerjoin(mastery, true())
+            .outerjoin(attempts, true())
+        )
+
+    rows = db.execute(query.order_by(User.id).limit(limit + 1)).mappings().all()
+    page, more = split_page(rows, limit)
+    return StudentPage(
+        items=[StudentListItem(**row) for row in page],
+        next_cursor=encode_cursor(page[-1]["id"]) if more else None,
+    )
+
+def _topic_rollups(db: Session, school: Optional[str], class_name: Optional[str]):
+    """Per-topic rollup rows for one scope, with topic names and averages."""
+    if class_name and not school:
+        raise HTTPException(status_code=400, detail="Filtering by class requires a school.")
+    average = (TopicMasteryRollup.score_sum / TopicMasteryRollup.score_count).label("avg_score")
+    query = db.query(
+        TopicMasteryRollup.topic_id, Topic.name, average, TopicMasteryRollup.score_count
+    ).join(Topic, Topic.id == TopicMasteryRollup.topic_id).filter(
+        TopicMasteryRollup.school == (school or ALL),
+        TopicMasteryRollup.class_name == (class_name or ALL),
+        TopicMasteryRollup.score_count > 0,
+    )
+    return query, average
+
+def _rollup_entry(topic_id, name, avg_score, count) -> Dict[str, Any]:
+    return {"topicId": topic_id, "topic": name, "averageScore": float(avg_score), "studentCount": count}
 
 @router.get("/analytics/heatmap")
 def get_class_heatmap(
+    school: Optional[str] = None,
+    class_name: Optional[str] = Query(None, alias="class"),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Get mastery heatmap for all students (Teacher/Admin only)
-    Returns: { topic_name: average_score }
+    Get mastery heatmap for all students, or one school / class (Teacher/Admin only)
+    Returns: [{ topicId, topic, averageScore, studentCount }]
+
+    Served from the pre-aggregated topic mastery rollups.
     """
     check_teacher_role(current_user)
-    
-    # Aggregate mastery scores by topic
-    results = db.query(
-        Mastery.topic_id,
-        func.avg(Mastery.score).label("avg_score")
-    ).group_by(Mastery.topic_id).all()
-    
-    heatmap = []
-    for topic_id, avg_score in results:
-        # In a real app, we'd join with Topic table to get names
-        # For now, returning ID and score
-        heatmap.append({"topicId": topic_id, "averageScore": float(avg_score)})
-        
-    return heatmap
+    query, _ = _topic_rollups(db, school, class_name)
+    return [_rollup_entry(*row) for row in query.order_by(Topic.name).all()]
 
 @router.get("/analytics/difficulty")
 def get_difficulty_map(
+    school: Optional[str] = None,
+    class_name: Optional[str] = Query(None, alias="class"),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Identify difficult concepts based on low average mastery
+    Identify difficult concepts based on low average mastery, hardest first
     """
     check_teacher_role(current_user)
-    
-    # Find topics with avg score < 50
-    results = db.query(
-        Mastery.topic_id,
-        func.avg(Mastery.score).label("avg_score")
-    ).group_by(Mastery.topic_id).having(func.avg(Mastery.score) < 50).all()
-    
-    difficult_topics = []
-    for topic_id, avg_score in results:
-        difficult_topics.append({"topicId": topic_id, "averageScore": float(avg_score)})
-        
-    return difficult_topics
+    query, average = _topic_rollups(db, school, class_name)
+    # Compare sums rather than the average expression, so no division per skipped row
+    results = query.filter(
+        TopicMasteryRollup.score_sum < settings.TEACHER_DIFFICULT_SCORE * TopicMasteryRollup.score_count
+    ).order_by(average).all()
+    return [_rollup_entry(*row) for row in results]
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.api import deps
 from app.schemas.user import User, UserUpdate
 from app.models.user import User as UserModel
+from app.services.auth_cache import auth_cache
 
 router = APIRouter()
 
@@ -28,11 +29,13 @@ def update_user(
     
     db.commit()
     db.refresh(user)
+    # Cached snapshots of this user are now stale
+    auth_cache.invalidate_user(user.id)
     return user
 
 @router.get("/me", response_model=User)
 def get_current_user_info(
-    current_user: UserModel = Depends(deps.get_current_user)
+    current_user = Depends(deps.get_current_user)
 ) -> Any:
     """
     Get current user profile
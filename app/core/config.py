@@ -20,11 +20,25 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
 
+    # Connection pool (applies to both the sync and the async engine)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds; recycle before server/proxy idle timeouts
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_SLOW_CHECKOUT_MS: int = 100  # log checkouts that wait longer than this
+
     # Security
     JWT_SECRET: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
 
+    # Auth cache: decoded tokens + user snapshots, so authenticated requests skip the user lookup
+    AUTH_CACHE_TTL_SECONDS: int = 60  # in-process tier; bounds staleness across workers
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_REDIS_ENABLED: bool = False  # optional shared tier on REDIS_URL
+    AUTH_CACHE_REDIS_TTL_SECONDS: int = 300
+
     # Firebase
     FIREBASE_PROJECT_ID: Optional[str] = None
     FIREBASE_CLIENT_EMAIL: Optional[str] = None
@@ -32,10 +46,66 @@ class Settings(BaseSettings):
 
     # AI
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_MODEL: str = "gpt-4o"
+    OPENAI_BASE_URL: Optional[str] = None  # point at an OpenAI-compatible server (e.g. a local stub)
+    LLM_SECTION_TIMEOUT_SECONDS: float = 30.0  # per call when fanning out learning sections
+    LLM_REQUESTS_PER_SECOND: float = 5.0  # token bucket refill rate shared by all calls in a process; 0 disables
+    LLM_BURST: int = 10  # token bucket capacity
+    LLM_MAX_CONCURRENCY: int = 8  # in-flight calls per process (sync and async callers each)
+    LLM_MAX_CONNECTIONS: int = 20  # pooled HTTP connections to the API
+    LLM_MAX_RETRIES: int = 3  # on 429, 5xx and connection errors
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 8.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    LLM_SINGLE_FLIGHT_REDIS_ENABLED: bool = False  # also collapse identical in-flight calls across workers
+    LLM_SINGLE_FLIGHT_LOCK_SECONDS: int = 120  # longest a worker waits on another's call before making its own
+    LLM_SINGLE_FLIGHT_RESULT_TTL_SECONDS: int = 30  # how long a shared result stays readable by waiters
+    LEARNING_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30  # generated learning sections live 30 days
+    LEARNING_CACHE_MAX_ENTRIES: int = 50000  # least recently used sections are evicted beyond this
+    LEARNING_CACHE_EVICT_SECONDS: int = 60 * 60  # beat interval of the expiry and size eviction sweep
+    LEARNING_CACHE_HIT_FLUSH_SIZE: int = 100  # hits counted in process before they are written in one batch
+    LEARNING_CACHE_HIT_FLUSH_SECONDS: float = 30.0  # or after this long, whichever comes first
     GEMINI_API_KEY: Optional[str] = None
 
+    # Quiz question bank
+    QUIZ_SIZE: int = 8
+    QUIZ_BANK_MIN_QUESTIONS: int = 24  # replenish a topic/difficulty below this
+    QUIZ_BANK_BATCH_SIZE: int = 16  # questions generated per replenish
+
+    # Mastery estimator
+    MASTERY_EWMA_ALPHA: float = 0.3  # weight of the newest attempt in a topic's mastery score
+
+    # Teacher analytics
+    TEACHER_ROLLUP_REFRESH_SECONDS: int = 60 * 60  # full rebuild of the topic mastery rollups
+    TEACHER_DIFFICULT_SCORE: float = 50.0  # topics averaging below this show on the difficulty map
+
+    # Note uploads (content-addressed local storage)
+    UPLOAD_DIR: str = "local_uploads"
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MiB
+    UPLOAD_MAX_BYTES: int = 50 * 1024 * 1024  # 50 MiB
+
+    # Topic extraction from OCR'd notes
+    NOTE_TOPIC_CHUNK_CHARS: int = 4000  # text per extraction call, split on paragraph boundaries
+    NOTE_TOPIC_CONCURRENCY: int = 4  # extraction calls in flight per note (the gateway caps the process)
+
+    # OCR
+    OCR_WORKERS: int = os.cpu_count() or 2  # parallel tesseract processes per task
+    OCR_PDF_DPI: int = 200
+    OCR_PDF_PAGES_PER_CHUNK: int = 2  # pages rasterized together per OCR job
+    OCR_PREPROCESS_STEPS: str = "downscale,binarize,deskew,crop"  # comma-separated, in order; "" disables
+    OCR_TARGET_DPI: int = 300  # downscale target, assuming an A4 page fills the photo
+    OCR_DESKEW_MAX_ANGLE: float = 10.0  # degrees searched either way
+
+    # OCR result cache, keyed by image hash + tesseract config
+    OCR_CACHE_BACKEND: str = "disk"  # "disk", "redis" or "none"
+    OCR_CACHE_DIR: str = "local_uploads/ocr_cache"
+    OCR_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # disk backend: LRU-evict above this
+    OCR_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30  # redis backend
+
     # Redis / Celery
     REDIS_URL: str = "redis://localhost:6379/0"
+    CELERY_BROKER_URL: str = "redis://localhost:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
 
     class Config:
         case_sensitive = True
@@ -57,5 +127,13 @@ class Settings(BaseSettings):
             url = url.replace("?schema=public", "")
         return url
 
+    @property
+    def ASYNC_SQLALCHEMY_DATABASE_URI(self) -> str:
+        """Same database as `SQLALCHEMY_DATABASE_URI`, routed through asyncpg for the async engine."""
+        url = self.SQLALCHEMY_DATABASE_URI
+        if url and url.startswith("postgresql+pg8000://"):
+            url = url.replace("postgresql+pg8000://", "postgresql+asyncpg://")
+        return url
+
 
 settings = Settings()
@@ -7,3 +7,6 @@ from app.models.mastery import Mastery
 from app.models.revision import RevisionSchedule
 from app.models.timetable import Timetable
 from app.models.attempt import Attempt
+from app.models.user_stats import UserStats
+from app.models.learning_cache import LearningContentCache
+from app.models.topic_rollup import TopicMasteryRollup
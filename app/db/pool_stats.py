@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Checkout counters for one engine's pool.
+
+    Wait time is measured around the pool's internal checkout, so it covers
+    both queueing for a free connection and opening a new overflow connection.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, pool, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait += seconds
+                self.max_wait = max(self.max_wait, seconds)
+
+        if timed_out:
+            logger.error("DB pool %s: checkout timed out after %.0f ms %s", self.name, seconds * 1000, self.snapshot(pool))
+        elif seconds * 1000 >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+            logger.warning("DB pool %s: slow checkout %.0f ms %s", self.name, seconds * 1000, self.snapshot(pool))
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        with self._lock:
+            checkouts, timeouts = self.checkouts, self.timeouts
+            total_wait, max_wait = self.total_wait, self.max_wait
+        return {
+            "size": pool.size(),
+            "checkedOut": pool.checkedout(),
+            "checkedIn": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "maxOverflow": pool._max_overflow,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "avgWaitMs": round(total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+            "maxWaitMs": round(max_wait * 1000, 3),
+        }
+
+
+class _InstrumentedPoolMixin:
+    # Class-level so the counters survive the engine recreating its pool on dispose().
+    stats: PoolStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(self, time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record_wait(self, time.perf_counter() - started)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats = PoolStats("sync")
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats("async")
+
+
+def pool_options() -> Dict[str, Any]:
+    """`create_engine` keyword arguments built from the DB_POOL_* settings."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
@@ -1,10 +1,23 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
+from app.db.pool_stats import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_options
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+engine = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI, poolclass=InstrumentedQueuePool, **pool_options()
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for routers that await the database instead of holding a threadpool worker.
+# expire_on_commit=False so ORM objects can still be serialized after the commit.
+async_engine = create_async_engine(
+    settings.ASYNC_SQLALCHEMY_DATABASE_URI, poolclass=InstrumentedAsyncQueuePool, **pool_options()
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 class Base(DeclarativeBase):
     pass
 
@@ -14,3 +27,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_pool_stats():
+    return {
+        "sync": engine.pool.stats.snapshot(engine.pool),
+        "async": async_engine.pool.stats.snapshot(async_engine.pool),
+    }
@@ -1,5 +1,6 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.api import api_router
 
@@ -19,6 +20,24 @@ app.add_middleware(
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Headroom for multipart boundaries and part headers around the file itself
+UPLOAD_ENVELOPE_BYTES = 64 * 1024
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized note uploads from Content-Length, before the body is read.
+
+    Uploads without a Content-Length are still capped while streaming to storage.
+    """
+    if request.url.path == f"{settings.API_V1_STR}/notes/upload":
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.UPLOAD_MAX_BYTES + UPLOAD_ENVELOPE_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File exceeds the {settings.UPLOAD_MAX_BYTES} byte upload limit."},
+            )
+    return await call_next(request)
+
 @app.get("/")
 def read_root():
     return {"message": "ConceptPulse Backend is running"}
@@ -29,11 +48,11 @@ def health_check():
     
     # Check DB
     try:
-        from app.db.session import SessionLocal
+        from app.db.session import engine
         from sqlalchemy import text
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        # Borrow a pooled connection instead of building a full ORM session per probe
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
         health_status["db"] = "connected"
     except Exception as e:
         health_status["db"] = f"error: {str(e)}"
@@ -50,3 +69,15 @@ def health_check():
         health_status["status"] = "degraded"
 
     return health_status
+
+@app.get("/health/db-pool")
+def db_pool_stats():
+    """Connection pool occupancy and checkout wait times for the sync and async engines."""
+    from app.db.session import get_pool_stats
+    return get_pool_stats()
+
+@app.get("/health/llm")
+def llm_stats():
+    """Call, retry, latency, token and collapsed-request counters from the LLM gateway in this process."""
+    from app.services.llm import gateway_stats
+    return gateway_stats()
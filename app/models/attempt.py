@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Boolean, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, Boolean, DateTime, Float, String, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
@@ -16,7 +16,12 @@ class Attempt(Base):
     topic_id = Column(String, ForeignKey("topics.id"), nullable=False)
     
     is_correct = Column(Boolean, default=False)
+    solving_time = Column(Integer, nullable=True)  # seconds
+    confidence = Column(Float, nullable=True)  # self-reported, 0-1
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="attempts")
     topic = relationship("Topic", back_populates="attempts")
+
+    # A user's attempt history, newest first
+    __table_args__ = (Index("ix_attempts_user_timestamp", "user_id", "timestamp"),)
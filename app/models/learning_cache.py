@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.session import Base
+import uuid
+
+def generate_id():
+    return str(uuid.uuid4())
+
+class LearningContentCache(Base):
+    """One generated learning section, shared by every student studying the same topic name."""
+    __tablename__ = "learning_content_cache"
+
+    id = Column(String, primary_key=True, index=True, default=generate_id)
+    cache_key = Column(String, nullable=False, unique=True) # sha256(topic|section|prompt version|model)
+    topic_name = Column(String, nullable=False) # normalized
+    section = Column(String, nullable=False)
+    prompt_version = Column(Integer, nullable=False)
+    model = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # TTL sweep
+    last_hit_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, UniqueConstraint, String
+from sqlalchemy import Column, Integer, ForeignKey, Float, UniqueConstraint, String, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 import uuid
@@ -13,8 +13,15 @@ class Mastery(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     topic_id = Column(String, ForeignKey("topics.id"), nullable=False)
     score = Column(Float, default=0.0)
+    # Exponentially weighted estimator state, see app/services/mastery_service.py
+    score_variance = Column(Float, nullable=False, default=0.0, server_default="0")
+    observations = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="mastery")
     topic = relationship("Topic", back_populates="mastery")
 
-    __table_args__ = (UniqueConstraint('user_id', 'topic_id', name='_user_topic_uc'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'topic_id', name='_user_topic_uc'),
+        # Weak-topic lookups: a user's topics under a score threshold, weakest first
+        Index("ix_mastery_user_score", "user_id", "score"),
+    )
@@ -1,8 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Computed, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.sql import func
 from app.db.session import Base
 
+# Weighted full-text document of a note: title (A), its topic names (B), content (C).
+# Content past 500k chars is left out, so very long PDFs stay under the 1 MB tsvector limit.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(topic_names, '')), 'B') || "
+    "setweight(to_tsvector('english', left(coalesce(content, ''), 500000)), 'C')"
+)
+
 class Note(Base):
     __tablename__ = "notes"
 
@@ -13,6 +24,26 @@ class Note(Base):
     file_url = Column(String, nullable=True)
     status = Column(String, default="pending")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    topic_names = Column(Text, nullable=True)  # extracted topic names, one per line, for search
+    # Maintained by Postgres, only used in search queries
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True))
 
     user = relationship("User", back_populates="notes")
     topics = relationship("Topic", back_populates="note")
+
+    # Not mapped: loading it, or RETURNING it after every insert, would ship the whole vector around
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
+    # GET /notes/ pages a user's notes newest first by (created_at, id); /notes/search matches on search_vector
+    __table_args__ = (
+        Index("ix_notes_user_created", "user_id", "created_at", "id"),
+        Index("ix_notes_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+
+@compiles(CreateColumn, "sqlite")
+def _skip_search_vector_on_sqlite(element, compiler, **kw):
+    # SQLite has no tsvector; test databases search with app.services.note_search's in-memory index instead
+    if element.element.name == "search_vector" and element.element.table.name == "notes":
+        return None
+    return compiler.visit_create_column(element, **kw)
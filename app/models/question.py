@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 import uuid
@@ -18,3 +18,6 @@ class Question(Base):
     difficulty = Column(String, default="MEDIUM")
 
     topic = relationship("Topic", back_populates="questions")
+
+    # Quiz requests sample the bank by topic and difficulty
+    __table_args__ = (Index("ix_questions_topic_difficulty", "topic_id", "difficulty"),)
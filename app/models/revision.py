@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, String, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 import uuid
@@ -15,6 +15,19 @@ class RevisionSchedule(Base):
     scheduled_date = Column(DateTime(timezone=True), nullable=False)
     interval = Column(Integer, default=1) # Days
     ease_factor = Column(Float, default=2.5)
+    repetitions = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def to_dict(self):
+        """SM-2 state, in the shape `SM2.from_dict` takes."""
+        return {
+            "ease_factor": self.ease_factor,
+            "interval": self.interval,
+            "repetitions": self.repetitions,
+            "scheduled_date": self.scheduled_date,
+        }
 
     user = relationship("User", back_populates="revision_schedules")
     topic = relationship("Topic", back_populates="revision_schedules")
+
+    # Due / upcoming revisions are range scans per user, paged by (scheduled_date, id)
+    __table_args__ = (Index("ix_revision_schedules_user_scheduled", "user_id", "scheduled_date"),)
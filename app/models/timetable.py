@@ -1,13 +1,26 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date, JSON
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, JSON, String, UniqueConstraint
 from sqlalchemy.orm import relationship
-from app.db.base_class import Base
+from sqlalchemy.sql import func
+from app.db.session import Base
+import uuid
+
+def generate_id():
+    return str(uuid.uuid4())
 
 class Timetable(Base):
+    """A generated weekly plan, one per user and start date, served again until invalidated."""
     __tablename__ = "timetables"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    date = Column(Date, nullable=False)
-    slots = Column(JSON, nullable=False)  # e.g., [{"start_time": "09:00", "topic": "Calculus"}]
+    id = Column(String, primary_key=True, index=True, default=generate_id)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    date = Column(Date, nullable=False)  # first day of the plan
+    slots = Column(JSON, nullable=False)  # the TimetableResponse schedule: [{"day", "date", "slots": [...]}]
+    request_key = Column(String, nullable=False)  # sha256 of the TimetableRequest
+    fingerprint = Column(String, nullable=False)  # sha256 of the request key and the mastery snapshot planned from
+    stale = Column(Boolean, nullable=False, default=False, server_default="false")  # set by mastery/revision writes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     user = relationship("User")
+
+    __table_args__ = (UniqueConstraint("user_id", "date", name="_user_timetable_date_uc"),)
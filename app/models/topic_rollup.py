@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Float
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class TopicMasteryRollup(Base):
+    """
+    Per-topic mastery totals for teacher analytics, at three scopes:
+    everyone (school = class = ""), one school (class = "") and one class.
+    Kept current by the mastery write paths and rebuilt by a periodic task.
+    """
+    __tablename__ = "topic_mastery_rollups"
+
+    school = Column(String, primary_key=True, default="")
+    class_name = Column("class", String, primary_key=True, default="")
+    topic_id = Column(String, ForeignKey("topics.id"), primary_key=True)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    score_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
@@ -23,3 +23,6 @@ class User(Base):
     mastery = relationship("Mastery", back_populates="user")
     revision_schedules = relationship("RevisionSchedule", back_populates="user")
     attempts = relationship("Attempt", back_populates="user")
+
+    # Teacher student listings filter by role/school/class and page by id
+    __table_args__ = (Index("ix_users_role_school_class", "role", "school", "class", "id"),)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, JSON
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class UserStats(Base):
+    """Materialized dashboard stats, kept current by the attempt and revision write paths."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    weak_topics = Column(JSON, nullable=False, default=list) # [{"topicId", "topic", "score"}]
+    mastered_topics = Column(JSON, nullable=False, default=list) # [{"topicId", "topic"}]
+    revision_dates = Column(JSON, nullable=False, default=dict) # {topicId: {"topic", "date"}}
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    user = relationship("User")
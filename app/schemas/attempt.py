@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional, List
 
 from pydantic import BaseModel
@@ -17,6 +18,20 @@ class AttemptCreate(BaseModel):
     confidence: Optional[float] = None
 
 
+class Attempt(BaseModel):
+    id: str
+    user_id: str
+    topic_id: str
+    question_id: Optional[str] = None
+    is_correct: bool
+    solving_time: Optional[int] = None
+    confidence: Optional[float] = None
+    timestamp: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class AttemptDiagnosis(BaseModel):
     masteryScore: float
     isWeak: bool
@@ -0,0 +1,10 @@
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+class LearningContent(BaseModel):
+    feynman: Optional[str] = None
+    alternate_explanations: Optional[str] = None
+    analogies: Optional[str] = None
+    mind_map: Optional[str] = None
+    flowchart: Optional[str] = None
+    errors: Dict[str, str] = {}  # section -> reason, for sections that failed or timed out
@@ -18,6 +18,27 @@ class Note(NoteBase):
     
     class Config:
         from_attributes = True
+        coerce_numbers_to_str = True  # the notes table still has integer id/user_id columns
+
+class NotePage(BaseModel):
+    items: List[Note]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page; null on the last page
+
+class NoteSearchHit(BaseModel):
+    id: str
+    title: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    rank: float
+    title_highlight: str  # HTML-escaped, matches wrapped in <mark>
+    snippet: str  # best matching passage of the content, same markup
+
+    class Config:
+        coerce_numbers_to_str = True
+
+class NoteSearchPage(BaseModel):
+    items: List[NoteSearchHit]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page; null on the last page
 
 class TopicBase(BaseModel):
     name: str
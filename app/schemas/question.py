@@ -0,0 +1,13 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class QuestionCreate(BaseModel):
+    question_text: str
+    options: List[str]
+    correct_answer: str
+    explanation: Optional[str] = None
+
+class Question(QuestionCreate):
+    id: Optional[str] = None
+    topic_id: Optional[str] = None
+    difficulty: Optional[str] = None
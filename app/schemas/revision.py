@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class RevisionSchedule(BaseModel):
+    id: str
+    topic_id: str
+    scheduled_date: datetime
+    interval: Optional[int] = None
+    ease_factor: Optional[float] = None
+    repetitions: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class RevisionSchedulePage(BaseModel):
+    items: List[RevisionSchedule]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page; null on the last page
+
+
+class ReviewEntry(BaseModel):
+    """One card of a revision session."""
+
+    topic_id: str
+    quality: int = Field(ge=0, le=5)  # self-assessed quality of recall
+    reviewed_at: Optional[datetime] = None  # defaults to when the batch is received
+
+
+class ReviewBatchResult(BaseModel):
+    topic_id: str
+    scheduled_date: datetime
+
+
+class ReviewBatchRejection(BaseModel):
+    index: int  # position in the submitted list
+    topic_id: Optional[str] = None
+    error: str
+
+
+class ReviewBatchResponse(BaseModel):
+    accepted: int  # entries applied
+    schedules: List[ReviewBatchResult]  # next review of each topic touched
+    rejected: List[ReviewBatchRejection]
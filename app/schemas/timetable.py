@@ -0,0 +1,41 @@
+from datetime import date
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+
+class Deadline(BaseModel):
+    subject: str
+    date: date
+
+
+class TimetableRequest(BaseModel):
+    """Everything is optional: an empty body plans from the student's mastery and revisions alone."""
+
+    syllabus: List[str] = []
+    deadlines: List[Deadline] = []
+    study_preferences: List[str] = []  # periods the student likes to study in: morning, afternoon, evening, night
+    # Energy per period, e.g. {"morning": 5, "evening": 2}, or the peak in words, e.g. "morning person"
+    energy_curve: Optional[Union[Dict[str, float], str]] = None
+    start_date: Optional[date] = None  # first day of the plan; defaults to today
+    ai_activities: bool = False  # have the LLM reword the activity text (slower)
+
+
+class TimetableSlot(BaseModel):
+    time: str  # "HH:MM-HH:MM"
+    start_time: str
+    end_time: str
+    topic: str
+    topic_id: Optional[str] = None
+    activity: str
+    kind: str  # weak_topic, deadline, revision, syllabus or general
+
+
+class TimetableDay(BaseModel):
+    day: str
+    date: date
+    slots: List[TimetableSlot]
+
+
+class TimetableResponse(BaseModel):
+    schedule: List[TimetableDay]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 class UserBase(BaseModel):
@@ -24,6 +24,20 @@ class UserInDBBase(UserBase):
 class User(UserInDBBase):
     pass
 
+class StudentListItem(BaseModel):
+    id: str
+    name: Optional[str] = None
+    school: Optional[str] = None
+    class_name: Optional[str] = None
+    year: Optional[int] = None
+    # Only filled in summary mode
+    mastery_average: Optional[float] = None
+    attempt_count: Optional[int] = None
+
+class StudentPage(BaseModel):
+    items: List[StudentListItem]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page; null on the last page
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UserSnapshot:
+    """The user fields routers read from `current_user`, detached from any session."""
+
+    id: str
+    role: Optional[str] = None
+    name: Optional[str] = None
+    school: Optional[str] = None
+    class_name: Optional[str] = None
+    year: Optional[int] = None
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            role=user.role,
+            name=user.name,
+            school=user.school,
+            class_name=user.class_name,
+            year=user.year,
+        )
+
+
+@dataclass
+class CachedAuth:
+    claims: Dict[str, Any]
+    user: UserSnapshot
+
+    def to_json(self) -> str:
+        return json.dumps({"claims": self.claims, "user": asdict(self.user)})
+
+    @classmethod
+    def from_json(cls, raw) -> "CachedAuth":
+        data = json.loads(raw)
+        return cls(claims=data["claims"], user=UserSnapshot(**data["user"]))
+
+
+def _token_key(token: str) -> str:
+    # Raw bearer tokens never leave the process; both tiers key on a digest.
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class AuthCache:
+    """Two-tier token cache: an in-process LRU with TTL, optionally backed by Redis.
+
+    Entries never outlive the token's own `exp` claim. `invalidate_user` drops every
+    cached token of a user from this process and from Redis; other processes keep
+    their in-process copy for at most `AUTH_CACHE_TTL_SECONDS`.
+    """
+
+    def __init__(self, ttl: int, max_entries: int, redis_url: Optional[str] = None, redis_ttl: int = 300):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._user_keys: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._async_redis = None
+
+    # --- in-process tier ---
+
+    def _local_get(self, key: str) -> Optional[CachedAuth]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _local_set(self, key: str, entry: CachedAuth, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (entry, expires_at)
+            self._entries.move_to_end(key)
+            self._user_keys.setdefault(entry.user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        entry, _ = self._entries.pop(key)
+        keys = self._user_keys.get(entry.user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[entry.user.id]
+
+    def _expiry(self, entry: CachedAuth, ttl: int) -> float:
+        expires_at = time.time() + ttl
+        exp = entry.claims.get("exp")
+        return min(expires_at, float(exp)) if exp is not None else expires_at
+
+    # --- redis tier ---
+
+    def _redis_client(self):
+        if self._redis is None and self.redis_url:
+            import redis
+            self._redis = redis.from_url(self.redis_url)
+        return self._redis
+
+    def _async_redis_client(self):
+        if self._async_redis is None and self.redis_url:
+            import redis.asyncio
+            self._async_redis = redis.asyncio.from_url(self.redis_url)
+        return self._async_redis
+
+    def _redis_set_args(self, key: str, entry: CachedAuth):
+        ttl = int(self._expiry(entry, self.redis_ttl) - time.time())
+        return f"auth:token:{key}", f"auth:user:{entry.user.id}", ttl
+
+    # --- public API ---
+
+    def get(self, token: str) -> Optional[CachedAuth]:
+        key = _token_key(token)
+        entry = self._local_get(key)
+        if entry is not None or not self.redis_url:
+            return entry
+        try:
+            raw = self._redis_client().get(f"auth:token:{key}")
+        except Exception as e:
+            logger.warning(f"Auth cache: Redis unavailable: {e}")
+            return None
+        if raw is None:
+            return None
+        entry = CachedAuth.from_json(raw)
+        self._local_set(key, entry, self._expiry(entry, self.ttl))
+        return entry
+
+    async def aget(self, token: str) -> Optional[CachedAuth]:
+        key = _token_key(token)
+        entry = self._local_get(key)
+        if entry is not None or not self.redis_url:
+            return entry
+        try:
+            raw = await self._async_redis_client().get(f"auth:token:{key}")
+        except Exception as e:
+            logger.warning(f"Auth cache: Redis unavailable: {e}")
+            return None
+        if raw is None:
+            return None
+        entry = CachedAuth.from_json(raw)
+        self._local_set(key, entry, self._expiry(entry, self.ttl))
+        return entry
+
+    def set(self, token: str, entry: CachedAuth) -> None:
+        key = _token_key(token)
+        self._local_set(key, entry, self._expiry(entry, self.ttl))
+        if not self.redis_url:
+            return
+        token_key, user_key, ttl = self._redis_set_args(key, entry)
+        if ttl <= 0:
+            return
+        try:
+            pipe = self._redis_client().pipeline()
+            pipe.set(token_key, entry.to_json(), ex=ttl)
+            pipe.sadd(user_key, key)
+            pipe.expire(user_key, self.redis_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Auth cache: Redis unavailable: {e}")
+
+    async def aset(self, token: str, entry: CachedAuth) -> None:
+        key = _token_key(token)
+        self._local_set(key, entry, self._expiry(entry, self.ttl))
+        if not self.redis_url:
+            return
+        token_key, user_key, ttl = self._redis_set_args(key, entry)
+        if ttl <= 0:
+            return
+        try:
+            pipe = self._async_redis_client().pipeline()
+            pipe.set(token_key, entry.to_json(), ex=ttl)
+            pipe.sadd(user_key, key)
+            pipe.expire(user_key, self.redis_ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Auth cache: Redis unavailable: {e}")
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for key in list(self._user_keys.get(user_id, ())):
+                self._drop(key)
+        if not self.redis_url:
+            return
+        try:
+            client = self._redis_client()
+            user_key = f"auth:user:{user_id}"
+            keys = client.smembers(user_key)
+            pipe = client.pipeline()
+            for key in keys:
+                pipe.delete(f"auth:token:{key.decode() if isinstance(key, bytes) else key}")
+            pipe.delete(user_key)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Auth cache: Redis unavailable: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+
+auth_cache = AuthCache(
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.AUTH_CACHE_REDIS_ENABLED else None,
+    redis_ttl=settings.AUTH_CACHE_REDIS_TTL_SECONDS,
+)
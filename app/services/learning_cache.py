@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.learning_cache import LearningContentCache, generate_id
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GeneratedSection:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def normalize_topic_name(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def learning_cache_key(topic_name: str, section: str, prompt_version: int, model: str) -> str:
+    raw = "\x1f".join([normalize_topic_name(topic_name), section, str(prompt_version), model])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LearningCache:
+    """
+    Persistent store of generated learning sections with in-process single-flight.
+
+    Lookups are one SELECT on the `learning_content_cache` table. Hits are
+    counted in process and written back in one batched UPDATE every
+    LEARNING_CACHE_HIT_FLUSH_SIZE hits or LEARNING_CACHE_HIT_FLUSH_SECONDS,
+    so `hits` and `last_hit_at` lag by at most that much. Entries expire after
+    LEARNING_CACHE_TTL_SECONDS; `evict_entries` (a beat task) drops them and
+    the least recently hit rows beyond LEARNING_CACHE_MAX_ENTRIES.
+    Concurrent misses for the same key in this process share one generation.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending_hits: Dict[str, int] = {}  # row id -> hits not yet written
+        self._pending_hit_at: Dict[str, datetime] = {}
+        self._last_flush = time.monotonic()
+        self._flushing: Optional[asyncio.Future] = None
+        self.hits = 0
+        self.shared = 0  # misses that joined an in-flight generation
+        self.misses = 0
+        self.tokens_avoided = 0
+
+    async def get_or_generate(
+        self,
+        topic_name: str,
+        section: str,
+        prompt_version: int,
+        model: str,
+        generate: Callable[[], Awaitable[GeneratedSection]],
+    ) -> str:
+        key = learning_cache_key(topic_name, section, prompt_version, model)
+
+        cached = await self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            self.tokens_avoided += (cached.prompt_tokens or 0) + (cached.completion_tokens or 0)
+            self._count_hit(cached.id)
+            return cached.content
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(
+                self._generate_and_store(key, topic_name, section, prompt_version, model, generate)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        # Shielded: one waiter timing out must not cancel the generation for the others
+        return (await asyncio.shield(task)).content
+
+    async def _lookup(self, key: str) -> Optional[LearningContentCache]:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.LEARNING_CACHE_TTL_SECONDS)
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                select(LearningContentCache).where(
+                    LearningContentCache.cache_key == key,
+                    LearningContentCache.created_at > cutoff,
+                )
+            )
+
+    def _count_hit(self, row_id: str) -> None:
+        self._pending_hits[row_id] = self._pending_hits.get(row_id, 0) + 1
+        self._pending_hit_at[row_id] = datetime.now(timezone.utc)
+        due = (
+            sum(self._pending_hits.values()) >= settings.LEARNING_CACHE_HIT_FLUSH_SIZE
+            or time.monotonic() - self._last_flush >= settings.LEARNING_CACHE_HIT_FLUSH_SECONDS
+        )
+        if due and (self._flushing is None or self._flushing.done()):
+            self._flushing = asyncio.ensure_future(self.flush_hits())
+
+    async def flush_hits(self) -> None:
+        """Write the hits counted since the last flush, one executemany UPDATE by id."""
+        pending, hit_at = self._pending_hits, self._pending_hit_at
+        self._pending_hits, self._pending_hit_at = {}, {}
+        self._last_flush = time.monotonic()
+        if not pending:
+            return
+        table = LearningContentCache.__table__
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("row_id"))
+                    .values(hits=table.c.hits + bindparam("added"), last_hit_at=bindparam("hit_at")),
+                    [{"row_id": row_id, "added": added, "hit_at": hit_at[row_id]} for row_id, added in pending.items()],
+                )
+                await db.commit()
+        except Exception as e:
+            # Only the counters are lost; they drive eviction order and stats, not lookups
+            logger.warning(f"Learning cache hit flush failed: {e}")
+
+    async def _generate_and_store(self, key, topic_name, section, prompt_version, model, generate) -> GeneratedSection:
+        generated = await generate()
+        try:
+            async with AsyncSessionLocal() as db:
+                values = dict(
+                    cache_key=key,
+                    topic_name=normalize_topic_name(topic_name),
+                    section=section,
+                    prompt_version=prompt_version,
+                    model=model,
+                    content=generated.content,
+                    prompt_tokens=generated.prompt_tokens,
+                    completion_tokens=generated.completion_tokens,
+                    hits=0,
+                )
+                stmt = pg_insert(LearningContentCache).values(id=generate_id(), **values)
+                await db.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["cache_key"],
+                        set_={**values, "created_at": func.now(), "last_hit_at": func.now()},
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            # The content is still good for this request; it just won't be shared
+            logger.warning(f"Learning cache write failed: {e}")
+        return generated
+
+    async def stats(self) -> dict:
+        await self.flush_hits()
+        lookups = self.hits + self.shared + self.misses
+        async with AsyncSessionLocal() as db:
+            entries, total_hits, tokens_avoided = (
+                await db.execute(
+                    select(
+                        func.count(),
+                        func.coalesce(func.sum(LearningContentCache.hits), 0),
+                        func.coalesce(
+                            func.sum(
+                                LearningContentCache.hits
+                                * (LearningContentCache.prompt_tokens + LearningContentCache.completion_tokens)
+                            ),
+                            0,
+                        ),
+                    )
+                )
+            ).one()
+        return {
+            "process": {
+                "hits": self.hits,
+                "shared": self.shared,
+                "misses": self.misses,
+                "hitRatio": (self.hits + self.shared) / lookups if lookups else 0.0,
+                "tokensAvoided": self.tokens_avoided,
+            },
+            "store": {"entries": entries, "hits": total_hits, "tokensAvoided": tokens_avoided},
+        }
+
+
+def evict_entries(db: Session) -> int:
+    """Delete expired sections, then the least recently hit beyond LEARNING_CACHE_MAX_ENTRIES. Caller commits."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.LEARNING_CACHE_TTL_SECONDS)
+    expired = db.execute(delete(LearningContentCache).where(LearningContentCache.created_at <= cutoff)).rowcount
+    overflow = (
+        select(LearningContentCache.id)
+        .order_by(LearningContentCache.last_hit_at.desc())
+        .offset(settings.LEARNING_CACHE_MAX_ENTRIES)
+    )
+    return expired + db.execute(delete(LearningContentCache).where(LearningContentCache.id.in_(overflow))).rowcount
+
+
+learning_cache = LearningCache()
@@ -0,0 +1,305 @@
+"""
+Shared gateway for every chat completion the backend makes.
+
+All callers (the note worker, learning sections, the quiz bank and the
+timetable planner) go through `chat_completion` / `achat_completion`, which
+add on top of one pooled httpx-backed OpenAI client per mode (the async
+client, like its concurrency cap, is kept per event loop, since httpx
+connections and asyncio primitives belong to the loop that created them):
+
+- a process-wide token bucket (LLM_REQUESTS_PER_SECOND, LLM_BURST),
+- a cap on in-flight calls (LLM_MAX_CONCURRENCY, separately for sync and async callers),
+- retries with full-jitter exponential backoff on 429, 5xx and connection errors,
+  honouring Retry-After when the server sends one,
+- per-call latency and token metrics, logged and aggregated in `llm_metrics`,
+- single-flight: concurrent identical requests share one upstream call
+  (see app/services/llm_single_flight.py).
+
+Point OPENAI_BASE_URL at an OpenAI-compatible server (e.g.
+benchmarks/stub_llm_server.py) to exercise it locally.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import httpx
+import openai
+
+from app.core.config import settings
+from app.services.llm_single_flight import request_key, single_flight
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `reserve` takes a token immediately and returns
+    how long the caller must wait before using it, so sync and async callers
+    can share one bucket and sleep in their own way.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class LLMMetrics:
+    """In-process counters for gateway calls, overall and per purpose."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)  # seconds, most recent successful calls
+        self.purposes: Dict[str, Dict[str, float]] = {}
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.throttle_wait_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record_retry(self, error: Exception) -> None:
+        with self._lock:
+            self.retries += 1
+            if isinstance(error, openai.RateLimitError):
+                self.rate_limited += 1
+
+    def record_throttle(self, waited: float) -> None:
+        with self._lock:
+            self.throttle_wait_seconds += waited
+
+    def record_call(self, purpose: str, latency: float, prompt_tokens: int, completion_tokens: int, ok: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            per_purpose = self.purposes.setdefault(
+                purpose, {"calls": 0, "failures": 0, "latency_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            per_purpose["calls"] += 1
+            per_purpose["latency_seconds"] += latency
+            if ok:
+                self._latencies.append(latency)
+                self.prompt_tokens += prompt_tokens
+                self.completion_tokens += completion_tokens
+                per_purpose["prompt_tokens"] += prompt_tokens
+                per_purpose["completion_tokens"] += completion_tokens
+            else:
+                self.failures += 1
+                per_purpose["failures"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            purposes = {
+                name: {**values, "latency_seconds": round(values["latency_seconds"], 3)}
+                for name, values in self.purposes.items()
+            }
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "throttle_wait_seconds": round(self.throttle_wait_seconds, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "purposes": purposes,
+        }
+
+
+llm_metrics = LLMMetrics()
+_bucket = TokenBucket(settings.LLM_REQUESTS_PER_SECOND, settings.LLM_BURST)
+_sync_slots = threading.BoundedSemaphore(settings.LLM_MAX_CONCURRENCY)
+# Keyed by event loop and dropped with it: a loop only ever uses its own
+_async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+_client: Optional[openai.OpenAI] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+    )
+
+
+def get_client() -> openai.OpenAI:
+    """Process-wide sync client on one pooled httpx.Client. Retries are done by the gateway."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = openai.OpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                max_retries=0,
+                timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                http_client=httpx.Client(limits=_limits(), timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS),
+            )
+        return _client
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """The running loop's async client on one pooled httpx.AsyncClient. Retries are done by the gateway."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            max_retries=0,
+            timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS),
+        )
+    return client
+
+
+def _async_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.get(loop)
+    if slots is None:
+        slots = _async_slots[loop] = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return slots
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Retry-After when the server gives one, otherwise full-jitter exponential backoff."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), settings.LLM_RETRY_MAX_DELAY_SECONDS)
+        except (TypeError, ValueError):
+            pass
+    ceiling = min(settings.LLM_RETRY_MAX_DELAY_SECONDS, settings.LLM_RETRY_BASE_DELAY_SECONDS * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+def _request(messages: List[Dict[str, str]], model: Optional[str], response_format: Optional[Dict[str, Any]], kwargs) -> Dict[str, Any]:
+    request = {"model": model or settings.OPENAI_MODEL, "messages": messages, **kwargs}
+    if response_format is not None:
+        request["response_format"] = response_format
+    return request
+
+
+def _finish(purpose: str, request: Dict[str, Any], started: float, attempts: int, response=None) -> None:
+    latency = time.perf_counter() - started
+    usage = getattr(response, "usage", None)
+    prompt_tokens = usage.prompt_tokens if usage else 0
+    completion_tokens = usage.completion_tokens if usage else 0
+    llm_metrics.record_call(purpose, latency, prompt_tokens, completion_tokens, ok=response is not None)
+    logger.info(
+        "llm call purpose=%s model=%s ok=%s attempts=%d latency_ms=%.0f prompt_tokens=%d completion_tokens=%d",
+        purpose, request["model"], response is not None, attempts, latency * 1000, prompt_tokens, completion_tokens,
+    )
+
+
+def _call(purpose: str, request: Dict[str, Any]):
+    started = time.perf_counter()
+    attempt = 0
+    with _sync_slots:
+        while True:
+            wait = _bucket.reserve()
+            if wait:
+                llm_metrics.record_throttle(wait)
+                time.sleep(wait)
+            attempt += 1
+            try:
+                response = get_client().chat.completions.create(**request)
+            except RETRYABLE_ERRORS as e:
+                if attempt > settings.LLM_MAX_RETRIES:
+                    _finish(purpose, request, started, attempt)
+                    raise
+                llm_metrics.record_retry(e)
+                time.sleep(_retry_delay(e, attempt - 1))
+                continue
+            except Exception:
+                _finish(purpose, request, started, attempt)
+                raise
+            _finish(purpose, request, started, attempt, response)
+            return response
+
+
+async def _acall(purpose: str, request: Dict[str, Any]):
+    started = time.perf_counter()
+    attempt = 0
+    async with _async_semaphore():
+        while True:
+            wait = _bucket.reserve()
+            if wait:
+                llm_metrics.record_throttle(wait)
+                await asyncio.sleep(wait)
+            attempt += 1
+            try:
+                response = await get_async_client().chat.completions.create(**request)
+            except RETRYABLE_ERRORS as e:
+                if attempt > settings.LLM_MAX_RETRIES:
+                    _finish(purpose, request, started, attempt)
+                    raise
+                llm_metrics.record_retry(e)
+                await asyncio.sleep(_retry_delay(e, attempt - 1))
+                continue
+            except asyncio.CancelledError:
+                _finish(purpose, request, started, attempt)
+                raise
+            except Exception:
+                _finish(purpose, request, started, attempt)
+                raise
+            _finish(purpose, request, started, attempt, response)
+            return response
+
+
+def chat_completion(
+    messages: List[Dict[str, str]],
+    *,
+    purpose: str = "default",
+    model: Optional[str] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    **kwargs,
+):
+    """Rate-limited, retried, single-flighted chat completion for sync callers (Celery tasks, sync routes)."""
+    request = _request(messages, model, response_format, kwargs)
+    return single_flight.do(request_key(request), lambda: _call(purpose, request))
+
+
+async def achat_completion(
+    messages: List[Dict[str, str]],
+    *,
+    purpose: str = "default",
+    model: Optional[str] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    **kwargs,
+):
+    """Rate-limited, retried, single-flighted chat completion for async callers."""
+    request = _request(messages, model, response_format, kwargs)
+    return await single_flight.ado(request_key(request), lambda: _acall(purpose, request))
+
+
+def gateway_stats() -> Dict[str, Any]:
+    return {**llm_metrics.snapshot(), "single_flight": single_flight.stats()}
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from openai.types.chat import ChatCompletion
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Delete the lock only if it still holds this caller's token: a leader whose call
+# outlived the lock TTL must not free the lock a later leader now holds
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Digest of a chat completion request: model, messages, response_format and any other parameters."""
+    raw = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LLMSingleFlight:
+    """Collapses concurrent identical chat completions onto one upstream call.
+
+    In-process, sync and async callers each wait on the first caller with the
+    same key. With a Redis URL the leader also takes `llm:sf:lock:{key}`; a
+    leader in another worker that finds the lock taken polls for the result the
+    lock holder publishes under `llm:sf:result:{key}` instead of calling the
+    API itself. If the holder dies or fails without publishing, the waiter
+    falls back to its own call once the lock expires or is released. The lock
+    value is a per-call token and only its owner deletes it. Redis errors never
+    fail a request; they only disable cross-worker collapsing.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, lock_seconds: int = 120,
+                 result_ttl: int = 30, poll_seconds: float = 0.1):
+        self.redis_url = redis_url
+        self.lock_seconds = lock_seconds
+        self.result_ttl = result_ttl
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._async_inflight: Dict[str, asyncio.Future] = {}
+        self._redis = None
+        self._async_redis = None
+        self.leaders = 0
+        self.collapsed = 0  # waited on an identical call in this process
+        self.collapsed_redis = 0  # served by an identical call in another worker
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "collapsed_redis": self.collapsed_redis,
+            "inflight": len(self._inflight) + len(self._async_inflight),
+            "redis": bool(self.redis_url),
+        }
+
+    # --- in-process ---
+
+    def do(self, key: str, call: Callable[[], ChatCompletion]) -> ChatCompletion:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.leaders += 1
+            else:
+                self.collapsed += 1
+        if not leader:
+            return future.result()
+        try:
+            result = self._call_coordinated(key, call)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def ado(self, key: str, call: Callable[[], Awaitable[ChatCompletion]]) -> ChatCompletion:
+        task = self._async_inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(self._acall_coordinated(key, call))
+            self._async_inflight[key] = task
+            task.add_done_callback(lambda _: self._async_inflight.pop(key, None))
+        else:
+            self.collapsed += 1
+        # Shielded: one waiter timing out must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    # --- across workers ---
+
+    def _redis_client(self):
+        if self._redis is None and self.redis_url:
+            import redis
+            self._redis = redis.from_url(self.redis_url)
+        return self._redis
+
+    def _async_redis_client(self):
+        if self._async_redis is None and self.redis_url:
+            import redis.asyncio
+            self._async_redis = redis.asyncio.from_url(self.redis_url)
+        return self._async_redis
+
+    def _release(self, client, lock_key: str, token: str) -> None:
+        try:
+            client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning(f"LLM single-flight: Redis unavailable: {e}")
+
+    async def _arelease(self, client, lock_key: str, token: str) -> None:
+        try:
+            await client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning(f"LLM single-flight: Redis unavailable: {e}")
+
+    def _call_coordinated(self, key: str, call: Callable[[], ChatCompletion]) -> ChatCompletion:
+        if not self.redis_url:
+            return call()
+        lock_key, result_key = f"llm:sf:lock:{key}", f"llm:sf:result:{key}"
+        try:
+            client = self._redis_client()
+            token = uuid.uuid4().hex
+            deadline = time.monotonic() + self.lock_seconds
+            waited = acquired = False
+            while not (acquired := bool(client.set(lock_key, token, nx=True, ex=self.lock_seconds))):
+                waited = True
+                raw = client.get(result_key)
+                if raw is not None:
+                    self.collapsed_redis += 1
+                    return ChatCompletion.model_validate_json(raw)
+                if time.monotonic() > deadline:
+                    break  # the holder is stuck: call without the lock, and never release it
+                time.sleep(self.poll_seconds)
+            # The holder may have published and released between polls. Results are
+            # only reused by callers that saw the call in flight, never as a cache.
+            raw = client.get(result_key) if waited else None
+            if raw is not None:
+                if acquired:
+                    self._release(client, lock_key, token)
+                self.collapsed_redis += 1
+                return ChatCompletion.model_validate_json(raw)
+        except Exception as e:
+            logger.warning(f"LLM single-flight: Redis unavailable: {e}")
+            return call()
+
+        try:
+            result = call()
+        except BaseException:
+            if acquired:
+                self._release(client, lock_key, token)
+            raise
+        try:
+            client.set(result_key, result.model_dump_json(), ex=self.result_ttl)
+        except Exception as e:
+            logger.warning(f"LLM single-flight: Redis unavailable: {e}")
+        if acquired:
+            self._release(client, lock_key, token)
+        return result
+
+    async def _acall_coordinated(self, key: str, call: Callable[[], Awaitable[ChatCompletion]]) -> ChatCompletion:
+        if not self.redis_url:
+            return await call()
+        lock_key, result_key = f"llm:sf:lock:{key}", f"llm:sf:result:{key}"
+        try:
+            client = self._async_redis_client()
+            token = uuid.uuid4().hex
+            deadline = time.monotonic() + self.lock_seconds
+            waited = acquired = False
+            while not (acquired := bool(await client.set(lock_key, token, nx=True, ex=self.lock_seconds))):
+                waited = True
+                raw = await client.get(result_key)
+                if raw is not None:
+                    self.collapsed_redis += 1
+                    return ChatCompletion.model_validate_json(raw)
+                if time.monotonic() > deadline:
+                    break  # the holder is stuck: call without the lock, and never release it
+                await asyncio.sleep(self.poll_seconds)
+            # The holder may have published and released between polls. Results are
+            # only reused by callers that saw the call in flight, never as a cache.
+            raw = await client.get(result_key) if waited else None
+            if raw is not None:
+                if acquired:
+                    await self._arelease(client, lock_key, token)
+                self.collapsed_redis += 1
+                return ChatCompletion.model_validate_json(raw)
+        except Exception as e:
+            logger.warning(f"LLM single-flight: Redis unavailable: {e}")
+            return await call()
+
+        try:
+            result = await call()
+        except BaseException:
+            if acquired:
+                await self._arelease(client, lock_key, token)
+            raise
+        try:
+            await client.set(result_key, result.model_dump_json(), ex=self.result_ttl)
+        except Exception as e:
+            logger.warning(f"LLM single-flight: Redis unavailable: {e}")
+        if acquired:
+            await self._arelease(client, lock_key, token)
+        return result
+
+
+single_flight = LLMSingleFlight(
+    redis_url=settings.REDIS_URL if settings.LLM_SINGLE_FLIGHT_REDIS_ENABLED else None,
+    lock_seconds=settings.LLM_SINGLE_FLIGHT_LOCK_SECONDS,
+    result_ttl=settings.LLM_SINGLE_FLIGHT_RESULT_TTL_SECONDS,
+)
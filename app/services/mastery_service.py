@@ -1,3 +1,23 @@
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.attempt import Attempt
+from app.models.mastery import Mastery, generate_id
+from app.models.timetable import Timetable
+from app.models.user_stats import UserStats
+
+# Starting score for a topic the student has never been scored on before.
+BASELINE_MASTERY_SCORE = 50.0
+
+# States per upsert when rebuilding from attempts
+BACKFILL_BATCH_SIZE = 1000
+
+
 def calculate_mastery_score(
     is_correct: bool, 
     solving_time: int | None, 
@@ -18,3 +38,111 @@ def calculate_mastery_score(
             base_score += 5.0
 
     return max(0.0, min(100.0, base_score))
+
+
+@dataclass
+class MasteryState:
+    """
+    Exponentially weighted mean and variance of a student's per-attempt scores on one topic.
+
+    `update` is O(1): each attempt's `calculate_mastery_score` moves the mean a
+    fraction MASTERY_EWMA_ALPHA of the way towards it, so one lucky or unlucky
+    answer no longer replaces the whole history. The mean is the mastery score;
+    the variance says how settled it is.
+    """
+
+    mean: float = BASELINE_MASTERY_SCORE
+    variance: float = 0.0
+    count: int = 0
+
+    def update(self, observation: float, alpha: Optional[float] = None) -> "MasteryState":
+        alpha = settings.MASTERY_EWMA_ALPHA if alpha is None else alpha
+        if self.count == 0:
+            self.mean, self.variance = observation, 0.0
+        else:
+            diff = observation - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.count += 1
+        return self
+
+    @classmethod
+    def from_row(cls, mastery: Optional[Mastery]) -> "MasteryState":
+        if mastery is None:
+            return cls()
+        return cls(
+            mean=mastery.score if mastery.score is not None else BASELINE_MASTERY_SCORE,
+            variance=mastery.score_variance or 0.0,
+            count=mastery.observations or 0,
+        )
+
+    def to_values(self) -> Dict[str, float]:
+        return {"score": self.mean, "score_variance": self.variance, "observations": self.count}
+
+
+def build_mastery_state_upsert(states: Mapping[Tuple[str, str], MasteryState]) -> Insert:
+    """
+    One multi-row ``INSERT ... ON CONFLICT (_user_topic_uc) DO UPDATE`` writing final
+    estimator states, keyed by (user_id, topic_id). The states are absolute, so
+    callers fold new attempts into rows they have read ``FOR UPDATE``.
+    ``states`` must not be empty. Execute it with either a sync or an async session.
+    """
+    stmt = pg_insert(Mastery).values([
+        {"id": generate_id(), "user_id": user_id, "topic_id": topic_id, **state.to_values()}
+        # fixed order, so concurrent upserts lock rows alike
+        for (user_id, topic_id), state in sorted(states.items())
+    ])
+    return stmt.on_conflict_do_update(
+        constraint="_user_topic_uc",
+        set_={
+            "score": stmt.excluded.score,
+            "score_variance": stmt.excluded.score_variance,
+            "observations": stmt.excluded.observations,
+        },
+    )
+
+
+def rebuild_mastery_states(db: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Recompute every (user, topic) estimator state from ``attempts`` in one streaming
+    pass, in (user_id, timestamp) order so the user-scoped attempts index serves the
+    scan. Only one user's states are held in memory; they are upserted in batches
+    of about ``batch_size``. The affected users' dashboard stats are dropped so
+    they rebuild on next use, and their stored timetables are marked stale.
+    An attempt logged while this runs can be overwritten by the rebuilt state,
+    so run it off-peak; the teacher rollups are not touched and need a refresh
+    afterwards. Caller commits; returns the number of states written.
+    """
+    pending: Dict[Tuple[str, str], MasteryState] = {}
+    written = 0
+
+    def flush() -> None:
+        nonlocal written
+        db.execute(build_mastery_state_upsert(pending))
+        users = {user_id for user_id, _ in pending}
+        db.execute(delete(UserStats).where(UserStats.user_id.in_(users)))
+        db.execute(update(Timetable).where(Timetable.user_id.in_(users)).values(stale=True))
+        written += len(pending)
+        pending.clear()
+
+    rows = db.execute(
+        select(Attempt.user_id, Attempt.topic_id, Attempt.is_correct, Attempt.solving_time, Attempt.confidence)
+        .order_by(Attempt.user_id, Attempt.timestamp, Attempt.id)
+        .execution_options(yield_per=batch_size)
+    )
+    current_user: Optional[str] = None
+    states: Dict[str, MasteryState] = {}
+    for user_id, topic_id, is_correct, solving_time, confidence in rows:
+        if user_id != current_user:
+            pending.update(((current_user, t), state) for t, state in states.items())
+            if len(pending) >= batch_size:
+                flush()
+            current_user, states = user_id, {}
+        states.setdefault(topic_id, MasteryState()).update(
+            calculate_mastery_score(bool(is_correct), solving_time, confidence)
+        )
+    pending.update(((current_user, t), state) for t, state in states.items())
+    if pending:
+        flush()
+    return written
@@ -0,0 +1,190 @@
+"""
+Full-text search over a user's notes.
+
+On Postgres a note's title, topic names and content are matched through the
+generated, GIN-indexed `notes.search_vector` (weights A, B and C), with
+`websearch_to_tsquery` syntax (all words, "quoted phrases", -excluded, or).
+Hits are ordered by `ts_rank` (length-normalized) then id, and paged on that
+key; `ts_headline` only runs on the rows of the page, over the first
+SNIPPET_SOURCE_CHARS of the content. Highlights are HTML-escaped note text
+with the matches wrapped in <mark>.
+
+Other databases (SQLite test environments) get the same ranking shape from
+`InvertedIndex`, a small in-memory index built from the user's notes per
+search: all query words must match, with the same field weights and length
+normalization but only plural stripping instead of Postgres' stemming.
+"""
+import html
+import math
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.note import Note
+
+SEARCH_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+SNIPPET_WORDS = 30
+TITLE_HEADLINE_OPTIONS = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, HighlightAll=true"
+SNIPPET_HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=2, FragmentDelimiter=\" ... \""
+)
+# ts_headline reparses its whole input per hit: snippets come from this prefix only, so a
+# match further into a long note still ranks the note but its snippet is the note's start
+SNIPPET_SOURCE_CHARS = 8000
+
+# ts_rank's default weights for the A (title), B (topic names) and C (content) labels
+FIELD_WEIGHTS = {"title": 1.0, "topic_names": 0.4, "content": 0.2}
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+_WORD = re.compile(r"\w+")
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def terms(text: str) -> List[str]:
+    return [_stem(word) for word in _WORD.findall(text.casefold()) if word not in STOP_WORDS]
+
+
+class InvertedIndex:
+    """Term -> {note id: weighted frequency} postings over title, topic names and content."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.lengths: Dict[int, int] = {}
+
+    def add(self, note_id: int, fields: Mapping[str, Optional[str]]) -> None:
+        length = 0
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for term in terms(text or ""):
+                postings = self.postings[term]
+                postings[note_id] = postings.get(note_id, 0.0) + weight
+                length += 1
+        self.lengths[note_id] = length
+
+    def search(self, query: str) -> List[Tuple[float, int]]:
+        """(rank, note id) of the notes containing every query term, best first."""
+        query_terms = set(terms(query))
+        if not query_terms:
+            return []
+        lists = sorted((self.postings.get(term, {}) for term in query_terms), key=len)
+        matches = set(lists[0]).intersection(*lists[1:])
+        hits = [
+            (sum(postings[note_id] for postings in lists) / (1 + math.log(1 + self.lengths[note_id])), note_id)
+            for note_id in matches
+        ]
+        hits.sort(reverse=True)
+        return hits
+
+
+def highlight(text: Optional[str], query_terms: Set[str], max_words: Optional[int] = None) -> str:
+    """`text` with matching words wrapped in <mark>; with `max_words`, only a window around the first match."""
+    text = text or ""
+    words = list(_WORD.finditer(text))
+    if max_words is not None and len(words) > max_words:
+        first = next((i for i, w in enumerate(words) if _stem(w.group().casefold()) in query_terms), 0)
+        begin = max(0, first - max_words // 3)
+        window = words[begin:begin + max_words]
+        text = text[window[0].start():window[-1].end()]
+        words = list(_WORD.finditer(text))
+    out, position = [], 0
+    for word in words:
+        if _stem(word.group().casefold()) in query_terms:
+            out.append(html.escape(text[position:word.start()], quote=False))
+            out.append(f"{HIGHLIGHT_START}{html.escape(word.group(), quote=False)}{HIGHLIGHT_STOP}")
+            position = word.end()
+    out.append(html.escape(text[position:], quote=False))
+    return "".join(out)
+
+
+def _escaped(text: Any) -> Any:
+    # Escape in SQL before ts_headline adds its <mark> tags; its parser skips the entities
+    return func.replace(func.replace(func.replace(text, "&", "&amp;"), "<", "&lt;"), ">", "&gt;")
+
+
+def _hit(row: Any, rank: float, title_highlight: str, snippet: str) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "title": row.title,
+        "status": row.status,
+        "created_at": row.created_at,
+        "rank": rank,
+        "title_highlight": title_highlight,
+        "snippet": snippet,
+    }
+
+
+async def _search_postgres(
+    db: AsyncSession, user_id: Any, query: str, limit: int, after: Optional[Tuple[float, int]]
+) -> List[Dict[str, Any]]:
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    rank = func.ts_rank(Note.search_vector, tsquery, 1)  # 1: divide by 1 + log(document length)
+    ranked = select(Note.id, rank.label("rank")).where(
+        Note.user_id == user_id, Note.search_vector.bool_op("@@")(tsquery)
+    )
+    if after is not None:
+        ranked = ranked.where(tuple_(rank, Note.id) < after)
+    ranked = ranked.order_by(rank.desc(), Note.id.desc()).limit(limit).subquery()
+
+    rows = await db.execute(
+        select(
+            Note.id, Note.title, Note.status, Note.created_at, ranked.c.rank,
+            func.ts_headline(SEARCH_CONFIG, _escaped(func.coalesce(Note.title, "")), tsquery, TITLE_HEADLINE_OPTIONS).label("title_highlight"),
+            func.ts_headline(
+                SEARCH_CONFIG, _escaped(func.left(func.coalesce(Note.content, ""), SNIPPET_SOURCE_CHARS)), tsquery, SNIPPET_HEADLINE_OPTIONS
+            ).label("snippet"),
+        )
+        .join(ranked, Note.id == ranked.c.id)
+        .order_by(ranked.c.rank.desc(), Note.id.desc())
+    )
+    return [_hit(row, row.rank, row.title_highlight, row.snippet) for row in rows]
+
+
+async def _search_in_memory(
+    db: AsyncSession, user_id: Any, query: str, limit: int, after: Optional[Tuple[float, int]]
+) -> List[Dict[str, Any]]:
+    rows = (await db.execute(
+        select(Note.id, Note.title, Note.topic_names, Note.content, Note.status, Note.created_at)
+        .where(Note.user_id == user_id)
+    )).all()
+    index = InvertedIndex()
+    for row in rows:
+        index.add(row.id, {"title": row.title, "topic_names": row.topic_names, "content": row.content})
+    hits = [hit for hit in index.search(query) if after is None or hit < after][:limit]
+
+    by_id = {row.id: row for row in rows}
+    query_terms = set(terms(query))
+    return [
+        _hit(
+            by_id[note_id], rank,
+            highlight(by_id[note_id].title, query_terms),
+            highlight(by_id[note_id].content, query_terms, max_words=SNIPPET_WORDS),
+        )
+        for rank, note_id in hits
+    ]
+
+
+async def search_notes(
+    db: AsyncSession, user_id: Any, query: str, limit: int, after: Optional[Tuple[float, int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Up to `limit` of the user's notes matching `query`, best first, strictly
+    after the (rank, id) of the previous page's last hit when `after` is given.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return await _search_postgres(db, user_id, query, limit, after)
+    return await _search_in_memory(db, user_id, query, limit, after)
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+@dataclass
+class StoredFile:
+    path: str
+    sha256: str
+    size: int
+    deduplicated: bool
+
+
+def _extension(filename: Optional[str]) -> str:
+    return os.path.splitext(filename or "")[1].lower()
+
+
+def content_path(digest: str, extension: str = "") -> str:
+    """Location of a blob in the content-addressed store, fanned out by digest prefix."""
+    return os.path.join(settings.UPLOAD_DIR, digest[:2], f"{digest}{extension}")
+
+
+def store_stream(
+    source: BinaryIO,
+    filename: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> StoredFile:
+    """
+    Copy a file object into the content-addressed store in fixed-size chunks.
+
+    The SHA-256 is computed while copying, so only one chunk is ever held in memory.
+    Identical content is stored once: if the blob already exists the copy is discarded.
+    Raises UploadTooLargeError as soon as more than `max_bytes` have been read.
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    staging_dir = os.path.join(settings.UPLOAD_DIR, "tmp")
+    os.makedirs(staging_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, staging_path = tempfile.mkstemp(dir=staging_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds the {max_bytes} byte upload limit.")
+                digest.update(chunk)
+                out.write(chunk)
+
+        sha256 = digest.hexdigest()
+        path = content_path(sha256, _extension(filename))
+        if os.path.exists(path):
+            os.remove(staging_path)
+            return StoredFile(path=path, sha256=sha256, size=size, deduplicated=True)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staging_path, path)
+        return StoredFile(path=path, sha256=sha256, size=size, deduplicated=False)
+    except BaseException:
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+        raise
+
+
+async def store_upload(file, max_bytes: Optional[int] = None) -> StoredFile:
+    """Stream an UploadFile into the store on a worker thread, keeping the event loop free."""
+    return await run_in_threadpool(store_stream, file.file, file.filename, max_bytes)
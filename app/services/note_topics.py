@@ -0,0 +1,174 @@
+"""
+Topic extraction over a note's full OCR text.
+
+The text is split into chunks of at most NOTE_TOPIC_CHUNK_CHARS on paragraph
+boundaries (then lines, then words for paragraphs longer than that), and each
+chunk is sent to the model on its own, NOTE_TOPIC_CONCURRENCY at a time.
+The per-chunk topics and subtopics are merged by normalized name, keeping the
+first spelling and order seen, and written with one INSERT per table.
+"""
+import json
+import logging
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.topic import Subtopic, Topic, generate_id
+from app.services.llm import chat_completion
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOPIC_CONFIDENCE = 0.75
+
+EXTRACTION_PROMPT = "You are a helpful assistant. Extract the main title, main topics, and subtopics from this text. Return a JSON object with keys 'title', and 'topics' which is a list of objects, each having 'name' and 'subtopics' (a list of strings)."
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _split_long(text: str, max_chars: int, separators: Tuple[str, ...] = ("\n", " ")) -> List[str]:
+    """Split text longer than `max_chars` on lines, then on words, then anywhere."""
+    if len(text) <= max_chars:
+        return [text]
+    if not separators:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    separator, rest = separators[0], separators[1:]
+    pieces: List[str] = []
+    current = ""
+    for part in text.split(separator):
+        for piece in _split_long(part, max_chars, rest):
+            if current and len(current) + len(separator) + len(piece) > max_chars:
+                pieces.append(current)
+                current = piece
+            else:
+                current = f"{current}{separator}{piece}" if current else piece
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """Pack consecutive paragraphs into chunks of at most `max_chars` characters."""
+    max_chars = max_chars or settings.NOTE_TOPIC_CHUNK_CHARS
+    chunks: List[str] = []
+    current = ""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in _split_long(paragraph, max_chars):
+            if current and len(current) + 2 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def normalize_name(name: str) -> str:
+    """Case, accents, punctuation and spacing insensitive key for matching topic names."""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", name.casefold()).strip()
+
+
+def extract_chunk(chunk: str, call: Callable[..., Any] = chat_completion) -> Dict[str, Any]:
+    response = call(
+        [
+            {"role": "system", "content": EXTRACTION_PROMPT},
+            {"role": "user", "content": chunk},
+        ],
+        purpose="notes.topics",
+        response_format={"type": "json_object"},
+    )
+    return json.loads(response.choices[0].message.content)
+
+
+def merge_topics(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Topics from every chunk, in order of first appearance, one per normalized name, with their merged subtopics."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    seen_subtopics: Dict[str, set] = {}
+    for result in results:
+        for t_data in result.get("topics") or []:
+            if not isinstance(t_data, dict) or not isinstance(t_data.get("name"), str):
+                continue
+            name = t_data["name"].strip()
+            key = normalize_name(name)
+            if not key:
+                continue
+            if key not in merged:
+                merged[key] = {"name": name, "subtopics": []}
+                seen_subtopics[key] = {key}  # a subtopic repeating its topic adds nothing
+            for subtopic in t_data.get("subtopics") or []:
+                if not isinstance(subtopic, str):
+                    continue
+                sub_key = normalize_name(subtopic)
+                if sub_key and sub_key not in seen_subtopics[key]:
+                    seen_subtopics[key].add(sub_key)
+                    merged[key]["subtopics"].append(subtopic.strip())
+    return list(merged.values())
+
+
+def extract_topics(
+    text: str,
+    call: Callable[..., Any] = chat_completion,
+    max_chars: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Extract (title, topics) from the whole of `text`. The title is the first one
+    the model gives, starting from the top of the note. Chunks whose call fails
+    are logged and skipped; if every chunk fails the last error is raised.
+    """
+    chunks = chunk_text(text, max_chars)
+    if not chunks:
+        return None, []
+    workers = max(1, min(concurrency or settings.NOTE_TOPIC_CONCURRENCY, len(chunks)))
+
+    def run(chunk: str):
+        try:
+            return extract_chunk(chunk, call)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(run, chunks))
+
+    results = [o for o in outcomes if not isinstance(o, Exception)]
+    errors = [o for o in outcomes if isinstance(o, Exception)]
+    if not results:
+        raise errors[-1]
+    if errors:
+        logger.warning(f"Topic extraction failed for {len(errors)} of {len(chunks)} chunks: {errors[-1]}")
+
+    title = next((r["title"] for r in results if isinstance(r.get("title"), str) and r["title"].strip()), None)
+    return title, merge_topics(results)
+
+
+def topic_rows(note_id: str, topics: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Map merged topics onto `topics` and `subtopics` rows, with ids assigned up front."""
+    topic_values, subtopic_values = [], []
+    for t_data in topics:
+        topic_id = generate_id()
+        topic_values.append({"id": topic_id, "note_id": note_id, "name": t_data["name"], "confidence": DEFAULT_TOPIC_CONFIDENCE})
+        subtopic_values.extend(
+            {"id": generate_id(), "topic_id": topic_id, "name": name, "status": "pending"}
+            for name in t_data["subtopics"]
+        )
+    return topic_values, subtopic_values
+
+
+def save_topics(db: Session, note_id: str, topics: List[Dict[str, Any]]) -> None:
+    """Write a note's topics and subtopics with one bulk INSERT each. Caller commits."""
+    topic_values, subtopic_values = topic_rows(note_id, topics)
+    if topic_values:
+        db.execute(insert(Topic), topic_values)
+    if subtopic_values:
+        db.execute(insert(Subtopic), subtopic_values)
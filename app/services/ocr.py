@@ -0,0 +1,77 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
+
+from app.core.config import settings
+from app.services import ocr_preprocess
+
+TESSERACT_CONFIG = '--psm 6'
+PAGE_SEPARATOR = "\n\n"
+
+# Pages are OCR'd in parallel, so keep each tesseract process single-threaded
+# instead of letting OpenMP oversubscribe the cores.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def is_pdf(contents: bytes) -> bool:
+    return contents[:5] == b"%PDF-"
+
+
+def ocr_config_signature(pdf: bool) -> str:
+    """Everything besides the file bytes that changes OCR output; part of the OCR cache key."""
+    signature = f"{TESSERACT_CONFIG} {ocr_preprocess.signature()}"
+    if pdf:
+        return f"{signature} pdf_dpi={settings.OCR_PDF_DPI}"
+    return signature
+
+
+def ocr_image(image: Image.Image) -> str:
+    return pytesseract.image_to_string(ocr_preprocess.preprocess(image), config=TESSERACT_CONFIG)
+
+
+def ocr_image_bytes(contents: bytes) -> str:
+    return ocr_image(Image.open(io.BytesIO(contents)))
+
+
+def _ocr_pdf_pages(path: str, first_page: int, last_page: int) -> List[str]:
+    # Rasterize only this chunk, so at most OCR_WORKERS chunks of pages are in memory
+    pages = convert_from_path(
+        path, dpi=settings.OCR_PDF_DPI, first_page=first_page, last_page=last_page, grayscale=True
+    )
+    return [ocr_image(page) for page in pages]
+
+
+def ocr_pdf(path: str, on_page: Optional[Callable[[int, int, str], None]] = None) -> str:
+    """
+    OCR every page of a PDF, several page chunks at a time.
+
+    Both pdftoppm and tesseract run as subprocesses, so a thread pool gives real
+    parallelism (and, unlike a process pool, works inside daemonic prefork workers).
+    `on_page(page_number, total_pages, text)` is called in page order as soon as
+    each page and all pages before it are done.
+    """
+    total = int(pdfinfo_from_path(path)["Pages"])
+    chunk = max(1, settings.OCR_PDF_PAGES_PER_CHUNK)
+    texts: Dict[int, str] = {}
+    next_page = 1
+
+    with ThreadPoolExecutor(max_workers=max(1, settings.OCR_WORKERS)) as pool:
+        futures = {
+            pool.submit(_ocr_pdf_pages, path, first, min(first + chunk - 1, total)): first
+            for first in range(1, total + 1, chunk)
+        }
+        for future in as_completed(futures):
+            first = futures[future]
+            for offset, text in enumerate(future.result()):
+                texts[first + offset] = text
+            while next_page in texts:
+                if on_page:
+                    on_page(next_page, total, texts[next_page])
+                next_page += 1
+
+    return PAGE_SEPARATOR.join(texts[page] for page in range(1, total + 1))
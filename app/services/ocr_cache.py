@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def ocr_cache_key(image_bytes: bytes, config: str) -> str:
+    """Cache key for an OCR result: the image content plus everything that changes tesseract's output."""
+    digest = hashlib.sha256()
+    digest.update(config.encode())
+    digest.update(b"\0")
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Base of the OCR result stores, and on its own the store that caches nothing
+    (OCR_CACHE_BACKEND=none). Lookups and writes never raise; a broken cache is a miss.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            text = self._get(key)
+        except Exception as e:
+            logger.warning(f"OCR cache lookup failed: {e}")
+            text = None
+        self._record(text is not None)
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        try:
+            self._set(key, text)
+        except Exception as e:
+            logger.warning(f"OCR cache write failed: {e}")
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        logger.debug(
+            f"OCR cache {'hit' if hit else 'miss'} "
+            f"(hits={self.hits} misses={self.misses} hit_rate={self.hit_rate:.2%})"
+        )
+
+    def _get(self, key: str) -> Optional[str]:
+        return None
+
+    def _set(self, key: str, text: str) -> None:
+        pass
+
+
+class DiskOCRCache(OCRCache):
+    """
+    One UTF-8 file per result. Reads bump the mtime. Writes keep a running total
+    of the cached bytes (from one directory scan on the first write) and only
+    when it passes `max_bytes` sweep the directory, removing least recently used
+    files down to EVICT_TO of it. The sweep also corrects the total for files
+    other processes sharing the directory wrote or removed.
+    """
+
+    EVICT_TO = 0.9  # fraction of max_bytes left after a sweep, so sweeps are rare
+
+    def __init__(self, directory: str, max_bytes: int):
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def _get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return text
+
+    def _set(self, key: str, text: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent workers never read a partial result
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix="tmp", suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        size = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += size - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """(mtime, size, path) of every cached result; in-progress `.part` writes are not entries."""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.EVICT_TO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+
+class RedisOCRCache(OCRCache):
+    """Shared across the worker fleet. Entries expire after `ttl`; Redis' maxmemory policy handles size."""
+
+    def __init__(self, url: str, ttl: int):
+        super().__init__()
+        import redis
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+
+    def _get(self, key: str) -> Optional[str]:
+        raw = self.client.get(f"ocr:{key}")
+        if raw is None:
+            return None
+        # Refresh the TTL so frequently shared handouts stay cached
+        self.client.expire(f"ocr:{key}", self.ttl)
+        return raw.decode("utf-8")
+
+    def _set(self, key: str, text: str) -> None:
+        self.client.set(f"ocr:{key}", text.encode("utf-8"), ex=self.ttl)
+
+    def _record(self, hit: bool) -> None:
+        super()._record(hit)
+        try:
+            self.client.incr("ocr:stats:hits" if hit else "ocr:stats:misses")
+        except Exception:
+            pass
+
+
+_ocr_cache: Optional[OCRCache] = None
+
+
+def get_ocr_cache() -> OCRCache:
+    """The process-wide OCR cache selected by OCR_CACHE_BACKEND."""
+    global _ocr_cache
+    if _ocr_cache is None:
+        if settings.OCR_CACHE_BACKEND == "redis":
+            _ocr_cache = RedisOCRCache(settings.REDIS_URL, settings.OCR_CACHE_TTL_SECONDS)
+        elif settings.OCR_CACHE_BACKEND == "disk":
+            _ocr_cache = DiskOCRCache(settings.OCR_CACHE_DIR, settings.OCR_CACHE_MAX_BYTES)
+        else:
+            _ocr_cache = OCRCache()
+    return _ocr_cache
@@ -0,0 +1,123 @@
+"""NumPy image preprocessing applied before tesseract.
+
+Each step takes and returns a 2-D uint8 grayscale array. Steps run in the
+order listed in OCR_PREPROCESS_STEPS; deskew and crop read ink as pixels equal
+to 0, so they need binarize earlier in the list.
+"""
+from typing import Callable, Dict, List
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+
+# Long side of an A4 page; a phone photo of a page is scaled as if it were this long.
+PAGE_LONG_SIDE_INCHES = 11.7
+# A pixel is ink if it is this much darker than its neighbourhood's mean.
+INK_CONTRAST = 0.15
+DESKEW_STEP = 0.5  # degrees
+DESKEW_THUMBNAIL = 1000  # px, long side of the image the skew is estimated on
+MIN_INK_FRACTION = 0.002  # rows/columns with less ink than this count as blank
+MARGIN = 16  # px of white kept around the cropped text
+MAX_BLANK_RUN = 40  # px; longer blank bands between text blocks are collapsed to this
+
+
+def downscale(gray: np.ndarray) -> np.ndarray:
+    """Shrink oversized photos to OCR_TARGET_DPI. Never upscales."""
+    max_side = int(settings.OCR_TARGET_DPI * PAGE_LONG_SIDE_INCHES)
+    h, w = gray.shape
+    if max(h, w) <= max_side:
+        return gray
+    scale = max_side / max(h, w)
+    resized = Image.fromarray(gray).resize((round(w * scale), round(h * scale)), Image.LANCZOS)
+    return np.asarray(resized)
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Adaptive threshold against a smoothed local background, so shadows and uneven light drop out."""
+    h, w = gray.shape
+    block = max(16, max(h, w) // 40)
+    hb, wb = -(-h // block), -(-w // block)
+    padded = np.pad(gray, ((0, hb * block - h), (0, wb * block - w)), mode="edge")
+    block_means = padded.reshape(hb, block, wb, block).mean(axis=(1, 3), dtype=np.float32)
+    background = np.asarray(Image.fromarray(block_means).resize((w, h), Image.BILINEAR))  # float32 -> mode "F"
+    return np.where(gray < background * (1 - INK_CONTRAST), 0, 255).astype(np.uint8)
+
+
+def _rotate(binary: np.ndarray, angle: float, resample=Image.NEAREST) -> np.ndarray:
+    return np.asarray(Image.fromarray(binary).rotate(angle, resample=resample, expand=True, fillcolor=255))
+
+
+def deskew(binary: np.ndarray) -> np.ndarray:
+    """Straighten text lines: pick the rotation whose row ink profile has the sharpest peaks."""
+    h, w = binary.shape
+    scale = min(1.0, DESKEW_THUMBNAIL / max(h, w))
+    thumb = np.asarray(
+        Image.fromarray(binary).resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.NEAREST)
+    )
+
+    best_angle, best_score = 0.0, -1.0
+    max_angle = settings.OCR_DESKEW_MAX_ANGLE
+    for angle in np.arange(-max_angle, max_angle + DESKEW_STEP / 2, DESKEW_STEP):
+        row_ink = (_rotate(thumb, float(angle)) == 0).sum(axis=1)
+        score = float(np.var(row_ink))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+
+    if abs(best_angle) < DESKEW_STEP / 2:
+        return binary
+    return _rotate(binary, best_angle)
+
+
+def crop(binary: np.ndarray) -> np.ndarray:
+    """Trim blank margins and collapse tall blank bands between blocks of text."""
+    ink = binary == 0
+    rows = ink.mean(axis=1) > MIN_INK_FRACTION
+    cols = ink.mean(axis=0) > MIN_INK_FRACTION
+    if not rows.any() or not cols.any():
+        return binary
+
+    row_idx, col_idx = np.flatnonzero(rows), np.flatnonzero(cols)
+    top, bottom = max(0, row_idx[0] - MARGIN), min(binary.shape[0], row_idx[-1] + MARGIN + 1)
+    left, right = max(0, col_idx[0] - MARGIN), min(binary.shape[1], col_idx[-1] + MARGIN + 1)
+    binary, rows = binary[top:bottom, left:right], rows[top:bottom]
+
+    keep = np.ones(len(rows), dtype=bool)
+    blank_run = 0
+    for i, has_ink in enumerate(rows):
+        blank_run = 0 if has_ink else blank_run + 1
+        keep[i] = blank_run <= MAX_BLANK_RUN
+    return binary[keep]
+
+
+STEPS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "downscale": downscale,
+    "binarize": binarize,
+    "deskew": deskew,
+    "crop": crop,
+}
+NEEDS_BINARY = {"deskew", "crop"}
+
+
+def configured_steps() -> List[str]:
+    steps = [s.strip() for s in settings.OCR_PREPROCESS_STEPS.split(",") if s.strip()]
+    unknown = [s for s in steps if s not in STEPS]
+    if unknown:
+        raise ValueError(f"Unknown OCR preprocessing steps: {', '.join(unknown)}")
+    before_binarize = steps[:steps.index("binarize")] if "binarize" in steps else steps
+    misplaced = [s for s in before_binarize if s in NEEDS_BINARY]
+    if misplaced:
+        raise ValueError(f"OCR preprocessing steps {', '.join(misplaced)} must come after binarize")
+    return steps
+
+
+def preprocess(image: Image.Image) -> Image.Image:
+    gray = np.asarray(image.convert("L"))
+    for step in configured_steps():
+        gray = STEPS[step](gray)
+    return Image.fromarray(gray)
+
+
+def signature() -> str:
+    """Identifies the pipeline configuration for the OCR cache key."""
+    return f"steps={','.join(configured_steps())} dpi={settings.OCR_TARGET_DPI} skew={settings.OCR_DESKEW_MAX_ANGLE}"
@@ -0,0 +1,41 @@
+"""Opaque keyset-pagination cursors.
+
+A cursor encodes the sort key of the last row of a page; the next page is the
+rows strictly after it in the endpoint's ORDER BY, so a page costs one index
+range scan no matter how deep the client has paged.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Tuple[Any, ...]:
+    """Decode a cursor into values of the given types (datetime values are ISO strings)."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("wrong arity")
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, raw)
+        )
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}") from e
+
+
+def split_page(rows: List[Any], limit: int) -> Tuple[List[Any], bool]:
+    """Rows were fetched with LIMIT limit + 1; returns the page and whether more follow."""
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,127 @@
+import json
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.question import Question
+from app.services.llm import chat_completion
+
+logger = logging.getLogger(__name__)
+
+REPLENISH_LOCK_SECONDS = 300
+
+# Namespace for question ids derived from their content, so the same generated
+# question (e.g. one LLM response shared by collapsed identical requests) is banked once
+QUESTION_ID_NAMESPACE = uuid.UUID("6f1c2b3e-8d4a-4f7e-9a55-2c0e7d1b9f43")
+
+
+def question_id(topic_id: str, difficulty: str, question_text: str) -> str:
+    return str(uuid.uuid5(QUESTION_ID_NAMESPACE, "\x1f".join([topic_id, difficulty, question_text])))
+
+
+def difficulty_for_score(score: Optional[float]) -> str:
+    difficulty = "EASY"
+    if score is not None and score < 40:
+        difficulty = "HARD"
+    elif score is not None and score < 75:
+        difficulty = "MEDIUM"
+    return difficulty
+
+
+def generate_questions(topic_name: str, difficulty: str, count: int) -> List[Dict[str, Any]]:
+    """Ask the LLM for `count` multiple-choice questions; returns the raw question objects."""
+    response = chat_completion(
+        [
+            {"role": "system", "content": f"Generate {count} {difficulty.lower()} multiple-choice questions about '{topic_name}'. Return a JSON object with a 'questions' key, which is a list of objects. Each object must have 'question_text', 'options' (a list of 4 strings), and 'correct_answer' (the string of the correct option)."},
+        ],
+        purpose="quiz.questions",
+        response_format={"type": "json_object"},
+    )
+    quiz_data = json.loads(response.choices[0].message.content)
+    return quiz_data.get("questions", [])
+
+
+def question_rows(topic_id: str, difficulty: str, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Map generated questions onto `questions` rows, dropping malformed ones."""
+    rows = []
+    for q in questions:
+        options = q.get("options")
+        if not q.get("question_text") or not isinstance(options, list) or q.get("correct_answer") not in options:
+            continue
+        rows.append(
+            {
+                "id": question_id(topic_id, difficulty, q["question_text"]),
+                "topic_id": topic_id,
+                "question": q["question_text"],
+                "options": options,
+                "correct_answer": q["correct_answer"],
+                "explanation": q.get("explanation"),
+                "difficulty": difficulty,
+            }
+        )
+    return rows
+
+
+def save_questions(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Write a generated batch with one multi-row INSERT, skipping questions already banked. Caller commits."""
+    if rows:
+        db.execute(pg_insert(Question).values(rows).on_conflict_do_nothing(index_elements=["id"]))
+
+
+def sample_bank(db: Session, topic_id: str, difficulty: str, size: int) -> Tuple[List[Question], int]:
+    """Random sample of up to `size` banked questions, plus the bank's total size, in one query."""
+    bank_size = func.count().over().label("bank_size")
+    rows = db.execute(
+        select(Question, bank_size)
+        .where(Question.topic_id == topic_id, Question.difficulty == difficulty)
+        .order_by(func.random())
+        .limit(size)
+    ).all()
+    return [row[0] for row in rows], (rows[0][1] if rows else 0)
+
+
+def to_schema(question: Question) -> Dict[str, Any]:
+    return {
+        "id": question.id,
+        "topic_id": question.topic_id,
+        "question_text": question.question,
+        "options": question.options,
+        "correct_answer": question.correct_answer,
+        "explanation": question.explanation,
+        "difficulty": question.difficulty,
+    }
+
+
+def _replenish_lock_key(topic_id: str, difficulty: str) -> str:
+    return f"quiz:replenish:{topic_id}:{difficulty}"
+
+
+def request_replenish(topic_id: str, difficulty: str) -> None:
+    """Queue a background top-up of the bank, unless one is already queued or running."""
+    from app.worker import replenish_question_bank
+
+    try:
+        import redis
+        client = redis.from_url(settings.REDIS_URL)
+        if not client.set(_replenish_lock_key(topic_id, difficulty), 1, nx=True, ex=REPLENISH_LOCK_SECONDS):
+            return
+    except Exception as e:
+        logger.warning(f"Replenish lock unavailable, queueing anyway: {e}")
+
+    try:
+        replenish_question_bank.delay(topic_id, difficulty)
+    except Exception as e:
+        logger.warning(f"Could not queue question bank replenish for {topic_id}/{difficulty}: {e}")
+
+
+def release_replenish_lock(topic_id: str, difficulty: str) -> None:
+    try:
+        import redis
+        redis.from_url(settings.REDIS_URL).delete(_replenish_lock_key(topic_id, difficulty))
+    except Exception:
+        pass
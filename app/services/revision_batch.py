@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Sequence
+
+from app.services.spaced_repetition import review_batch
+
+
+def review_updates(schedules: Sequence[Any], qualities: Sequence[int], reviewed_at: Sequence[datetime]) -> List[Dict[str, Any]]:
+    """
+    SM-2 review of many schedules at once, as ORM bulk-update parameters.
+
+    `schedules` are rows or objects with id, ease_factor, interval and
+    repetitions; the result has one dict per schedule keyed by primary key,
+    ready for `db.execute(update(RevisionSchedule), params)`.
+    """
+    if not schedules:
+        return []
+    ease, interval, repetitions = review_batch(
+        [s.ease_factor for s in schedules],
+        [s.interval for s in schedules],
+        [s.repetitions for s in schedules],
+        qualities,
+    )
+    return [
+        {
+            "id": s.id,
+            "ease_factor": float(ease[i]),
+            "interval": int(interval[i]),
+            "repetitions": int(repetitions[i]),
+            "scheduled_date": reviewed_at[i] + timedelta(days=int(interval[i])),
+        }
+        for i, s in enumerate(schedules)
+    ]
+
@@ -1,4 +1,7 @@
 from datetime import datetime, timedelta
+from typing import Tuple
+
+import numpy as np
 
 class SM2:
     def __init__(self, ease_factor=2.5, interval=0, repetitions=0, scheduled_date=None):
@@ -43,3 +46,26 @@ class SM2:
     @classmethod
     def from_dict(cls, data):
         return cls(**data)
+
+
+def review_batch(ease_factor, interval, repetitions, quality) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized `SM2.review` over equal-length arrays of schedule state.
+
+    Element i of the result is exactly the (ease_factor, interval, repetitions)
+    that `SM2(ease_factor[i], interval[i], repetitions[i]).review(quality[i])`
+    leaves behind: same float64 arithmetic, and np.rint rounds half to even
+    like the built-in round. Scheduled dates are left to the caller.
+    """
+    ease_factor = np.asarray(ease_factor, dtype=np.float64)
+    interval = np.asarray(interval, dtype=np.int64)
+    repetitions = np.asarray(repetitions, dtype=np.int64)
+    quality = np.asarray(quality, dtype=np.int64)
+
+    passed = quality >= 3
+    lapse = 5 - quality
+    new_ease = np.where(passed, np.maximum(1.3, ease_factor + (0.1 - lapse * (0.08 + lapse * 0.02))), ease_factor)
+    grown = np.rint(interval * new_ease).astype(np.int64)
+    new_interval = np.where(~passed | (repetitions == 0), 1, np.where(repetitions == 1, 6, grown))
+    new_repetitions = np.where(passed, repetitions + 1, 0)
+    return new_ease, new_interval, new_repetitions
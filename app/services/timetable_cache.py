@@ -0,0 +1,141 @@
+"""
+Stored weekly timetables, served again while the inputs they were planned from still hold.
+
+A plan is stored per (user, start date) with the request key and a fingerprint
+of the request key plus a mastery snapshot: the set of weak topics (mastery
+below WEAK_TOPIC_SCORE) and the revisions due in the plan's week. Scores moving
+within the weak or strong range never replan.
+
+The write paths mark a user's stored plans stale, with one UPDATE, only when
+a topic's mastery crosses WEAK_TOPIC_SCORE or a revision due date moves inside
+a stored plan's week. A repeat view of a fresh plan is then one indexed read;
+a stale one recomputes the snapshot and only replans if it really changed.
+Every invalidation bumps updated_at, and a view only clears `stale` or
+replaces the plan if updated_at is still the value it read, so a write that
+lands while the snapshot is being recomputed is never lost.
+"""
+import hashlib
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.timetable import Timetable, generate_id
+from app.schemas.timetable import TimetableRequest
+from app.services.timetable_planner import (
+    DAYS, WEAK_TOPIC_SCORE, DueRevision, WeakTopic, describe_activities, load_due_revisions, load_weak_topics, plan_week,
+)
+
+
+def request_key(req: TimetableRequest) -> str:
+    raw = req.model_dump_json(exclude={"start_date"})  # the start date is part of the row key already
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def plan_fingerprint(key: str, start: date, weak_topics: Sequence[WeakTopic], due_revisions: Sequence[DueRevision]) -> str:
+    """The request key plus which topics are weak and which revisions fall due on which day of the plan."""
+    snapshot = {
+        "weak": sorted(t.topic_id or t.name for t in weak_topics),
+        # overdue revisions are all planned on the first day
+        "due": sorted([r.topic_id or r.name, max(r.due, start).isoformat()] for r in due_revisions),
+    }
+    raw = key + json.dumps(snapshot, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def is_weak(score: Optional[float]) -> bool:
+    return score is not None and score < WEAK_TOPIC_SCORE
+
+
+def get_or_plan(db: Session, user_id: str, req: TimetableRequest) -> List[Dict[str, Any]]:
+    """The user's plan for the week from `req.start_date` (today by default), stored or freshly planned."""
+    start = req.start_date or date.today()
+    key = request_key(req)
+    stored = db.scalar(select(Timetable).where(Timetable.user_id == user_id, Timetable.date == start))
+    if stored is not None and not stored.stale and stored.request_key == key:
+        return stored.slots
+
+    weak_topics = load_weak_topics(db, user_id)
+    due_revisions = load_due_revisions(db, user_id, start)
+    fingerprint = plan_fingerprint(key, start, weak_topics, due_revisions)
+    # Writes below only apply if the row is still as read: an invalidation since then bumped updated_at
+    read_updated_at = stored.updated_at if stored is not None else None
+    if stored is not None and stored.fingerprint == fingerprint:
+        # Invalidated, but the snapshot came back to what was planned from (e.g. a score dipped and recovered)
+        db.execute(
+            update(Timetable)
+            .where(Timetable.id == stored.id, Timetable.updated_at == read_updated_at)
+            .values(stale=False)
+        )
+        db.commit()
+        return stored.slots
+
+    schedule = plan_week(
+        start,
+        weak_topics=weak_topics,
+        due_revisions=due_revisions,
+        deadlines=[(d.subject, d.date) for d in req.deadlines],
+        syllabus=req.syllabus,
+        study_preferences=req.study_preferences,
+        energy_curve=req.energy_curve,
+    )
+    if req.ai_activities:
+        schedule = describe_activities(schedule)
+
+    stmt = pg_insert(Timetable).values(
+        id=generate_id(), user_id=user_id, date=start, slots=schedule,
+        request_key=key, fingerprint=fingerprint, stale=False,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        constraint="_user_timetable_date_uc",
+        set_={
+            "slots": stmt.excluded.slots,
+            "request_key": stmt.excluded.request_key,
+            "fingerprint": stmt.excluded.fingerprint,
+            "stale": False,
+            "updated_at": func.now(),
+        },
+        # A row inserted or invalidated since the read keeps its newer state
+        where=Timetable.updated_at == read_updated_at,
+    ))
+    db.commit()
+    return schedule
+
+
+async def invalidate_for_mastery(
+    db: AsyncSession,
+    user_id: str,
+    old_scores: Mapping[str, Optional[float]],
+    new_scores: Mapping[str, float],
+) -> None:
+    """Mark the user's plans stale if any topic moved across WEAK_TOPIC_SCORE. Runs in the caller's transaction."""
+    if any(is_weak(old_scores.get(topic_id)) != is_weak(score) for topic_id, score in new_scores.items()):
+        await db.execute(
+            update(Timetable)
+            .where(Timetable.user_id == user_id)
+            .values(stale=True)
+        )
+
+
+async def invalidate_for_revisions(db: AsyncSession, user_id: str, scheduled_dates: Iterable[datetime]) -> None:
+    """
+    Mark stale the user's plans whose week reaches the earliest of `scheduled_dates`
+    (a plan includes everything due before its last day). Pass both the old and the
+    new due dates of the changed schedules: a revision moved out of a week changes
+    that plan too. Runs in the caller's transaction.
+    """
+    dates = [value.astimezone(timezone.utc).date() if value.tzinfo else value.date() for value in scheduled_dates]
+    if not dates:
+        return
+    await db.execute(
+        update(Timetable)
+        .where(
+            Timetable.user_id == user_id,
+            Timetable.date > min(dates) - timedelta(days=DAYS),
+        )
+        .values(stale=True)
+    )
@@ -0,0 +1,334 @@
+"""
+Deterministic weekly study planner.
+
+`plan_week` turns a student's weak topics, due revisions, deadlines, preferred
+study periods and energy curve into a 7-day plan of 2-4 blocks a day, with no
+I/O, in well under a millisecond. The same inputs always give the same plan.
+
+Demand is placed in order of how constrained it is:
+
+1. due revisions, on their due day (or up to two days late when that day is full),
+   grouped up to REVISIONS_PER_BLOCK topics per block,
+2. deadline prep, more sessions the closer the deadline, on the days before it,
+3. weak topics, weakest first, with more and earlier-starting sessions the weaker
+   they are and spaced-out follow-ups,
+4. each syllabus item once, on the least loaded day, then general revision
+   until every day has MIN_BLOCKS_PER_DAY.
+
+Within a day the most important blocks get the highest-energy slots among the
+student's preferred periods. `describe_activities` optionally asks the LLM to
+reword the activity text; the plan itself never depends on it.
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.mastery import Mastery
+from app.models.revision import RevisionSchedule
+from app.models.topic import Topic
+from app.services.llm import chat_completion
+
+logger = logging.getLogger(__name__)
+
+DAYS = 7
+MIN_BLOCKS_PER_DAY = 2
+MAX_BLOCKS_PER_DAY = 4
+WEAK_TOPIC_SCORE = 70.0  # mastery below this is planned as a weak topic
+MAX_WEAK_TOPICS = 8
+REVISIONS_PER_BLOCK = 3
+REVISION_GRACE_DAYS = 2  # how late a revision may slip when its due day is full
+LONG_BLOCK_MINUTES = 90  # weak topics and deadline prep
+SHORT_BLOCK_MINUTES = 60
+
+# Candidate block start times per period, spaced so a 90 minute block leaves a break
+PERIOD_STARTS: Dict[str, Tuple[time, ...]] = {
+    "morning": (time(8, 0), time(10, 30)),
+    "afternoon": (time(14, 0), time(16, 0)),
+    "evening": (time(18, 0), time(20, 0)),
+    "night": (time(22, 0),),
+}
+DEFAULT_PREFERENCES = ("morning", "afternoon", "evening")
+DEFAULT_ENERGY = {"morning": 3.0, "afternoon": 2.0, "evening": 3.0, "night": 1.0}
+PEAK_ENERGY = 5.0
+
+# Which demand gets the best slots of a day
+KIND_RANK = {"weak_topic": 0, "deadline": 1, "revision": 2, "syllabus": 3, "general": 4}
+WEAK_TOPIC_ACTIVITIES = (
+    "Concept review and worked examples",
+    "Practice problems",
+    "Mistake review and timed practice",
+)
+GENERAL_ACTIVITIES = ("Review notes and flashcards", "Mixed practice questions")
+
+
+@dataclass(frozen=True)
+class WeakTopic:
+    topic_id: Optional[str]
+    name: str
+    score: float
+
+
+@dataclass(frozen=True)
+class DueRevision:
+    topic_id: Optional[str]
+    name: str
+    due: date
+
+
+@dataclass
+class _Block:
+    kind: str
+    topic: str
+    topic_id: Optional[str]
+    activity: str
+    minutes: int
+    priority: float  # lower gets a better slot within its kind
+    earliest: int  # day index
+    latest: int
+
+
+def _periods(text: str) -> List[str]:
+    words = re.findall(r"[a-z]+", text.lower())
+    return [period for period in PERIOD_STARTS if period in words]
+
+
+def energy_levels(energy_curve: Union[Mapping[str, float], str, None]) -> Dict[str, float]:
+    """Energy per period from a {period: level} mapping or a phrase naming the peak ("morning person")."""
+    levels = dict(DEFAULT_ENERGY)
+    if isinstance(energy_curve, str):
+        for period in _periods(energy_curve):
+            levels[period] = PEAK_ENERGY
+    elif energy_curve:
+        for key, level in energy_curve.items():
+            for period in _periods(str(key)):
+                try:
+                    levels[period] = float(level)
+                except (TypeError, ValueError):
+                    pass
+    return levels
+
+
+def ranked_slots(study_preferences: Sequence[str], energy: Mapping[str, float]) -> List[time]:
+    """
+    The MAX_BLOCKS_PER_DAY start times a day is planned in, best first: preferred
+    periods before the rest, then by energy, then earliest.
+    """
+    preferred = {period for text in study_preferences for period in _periods(text)} or set(DEFAULT_PREFERENCES)
+    candidates = [(period, start) for period, starts in PERIOD_STARTS.items() for start in starts]
+    candidates.sort(key=lambda c: (c[0] not in preferred, -energy[c[0]], c[1]))
+    return [start for _, start in candidates[:MAX_BLOCKS_PER_DAY]]
+
+
+def _revision_blocks(start: date, due_revisions: Iterable[DueRevision]) -> List[_Block]:
+    by_day: Dict[int, List[DueRevision]] = {}
+    for revision in due_revisions:
+        day = max(0, (revision.due - start).days)  # overdue ones go first thing
+        if day < DAYS:
+            by_day.setdefault(day, []).append(revision)
+    blocks = []
+    for day, revisions in sorted(by_day.items()):
+        revisions.sort(key=lambda r: (r.due, r.name))
+        for i in range(0, len(revisions), REVISIONS_PER_BLOCK):
+            group = revisions[i:i + REVISIONS_PER_BLOCK]
+            blocks.append(_Block(
+                kind="revision",
+                topic=", ".join(r.name for r in group),
+                topic_id=group[0].topic_id if len(group) == 1 else None,
+                activity="Spaced-repetition review",
+                minutes=SHORT_BLOCK_MINUTES,
+                priority=day,
+                earliest=day,
+                latest=min(DAYS - 1, day + REVISION_GRACE_DAYS),
+            ))
+    return blocks
+
+
+def _deadline_blocks(start: date, deadlines: Iterable[Tuple[str, date]]) -> List[_Block]:
+    blocks = []
+    for subject, due in deadlines:
+        days_left = (due - start).days
+        if days_left < 0:
+            continue
+        sessions = 3 if days_left < DAYS else 2 if days_left < 2 * DAYS else 1
+        latest = max(0, min(DAYS - 1, days_left - 1))  # prepare on the days before, not the day itself
+        for i in range(sessions):
+            blocks.append(_Block(
+                kind="deadline",
+                topic=subject,
+                topic_id=None,
+                activity=f"Prepare for {subject} on {due.strftime('%a %d %b')}: past papers and key points",
+                minutes=LONG_BLOCK_MINUTES,
+                priority=days_left,
+                # spread the sessions over the run-up, the last one closest to the deadline
+                earliest=max(0, latest - 2 * (sessions - 1 - i)),
+                latest=latest,
+            ))
+    return blocks
+
+
+def _weak_topic_blocks(weak_topics: Iterable[WeakTopic]) -> List[_Block]:
+    blocks = []
+    ranked = sorted(weak_topics, key=lambda t: (t.score, t.name))[:MAX_WEAK_TOPICS]
+    for topic in ranked:
+        sessions = 3 if topic.score < 40 else 2 if topic.score < 55 else 1
+        for i in range(sessions):
+            blocks.append(_Block(
+                kind="weak_topic",
+                topic=topic.name,
+                topic_id=topic.topic_id,
+                activity=WEAK_TOPIC_ACTIVITIES[i % len(WEAK_TOPIC_ACTIVITIES)],
+                minutes=LONG_BLOCK_MINUTES,
+                priority=topic.score,
+                earliest=min(DAYS - 1, 2 * i),  # follow-ups spaced two days apart
+                latest=DAYS - 1,
+            ))
+    return blocks
+
+
+def _pick_day(block: _Block, days: List[List[_Block]], target: int) -> Optional[int]:
+    """
+    The day a block goes on: a day in its window with room and without the same
+    topic. Days are filled up to `target` blocks before any goes beyond it.
+    """
+    candidates = [
+        d for d in range(block.earliest, block.latest + 1)
+        if len(days[d]) < MAX_BLOCKS_PER_DAY and all(b.topic != block.topic for b in days[d])
+    ]
+    if not candidates:
+        return None
+    if block.kind == "revision":
+        return candidates[0]  # as close to the due date as possible
+    if block.kind == "deadline":
+        return min(candidates, key=lambda d: (len(days[d]) >= target, block.latest - d))
+    if block.kind == "weak_topic":
+        return min(candidates, key=lambda d: (len(days[d]) >= target, d))  # early in the week
+    return min(candidates, key=lambda d: (len(days[d]), d))
+
+
+def _place(block: _Block, days: List[List[_Block]], target: int) -> None:
+    day = _pick_day(block, days, target)
+    if day is not None:
+        days[day].append(block)  # demand that fits nowhere is dropped; the days are full
+
+
+def _slot(block: _Block, start: time) -> Dict[str, Any]:
+    end = (datetime.combine(date.min, start) + timedelta(minutes=block.minutes)).time()
+    start_text, end_text = start.strftime("%H:%M"), end.strftime("%H:%M")
+    return {
+        "time": f"{start_text}-{end_text}",
+        "start_time": start_text,
+        "end_time": end_text,
+        "topic": block.topic,
+        "topic_id": block.topic_id,
+        "activity": block.activity,
+        "kind": block.kind,
+    }
+
+
+def plan_week(
+    start: date,
+    weak_topics: Sequence[WeakTopic] = (),
+    due_revisions: Sequence[DueRevision] = (),
+    deadlines: Sequence[Tuple[str, date]] = (),
+    syllabus: Sequence[str] = (),
+    study_preferences: Sequence[str] = (),
+    energy_curve: Union[Mapping[str, float], str, None] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Plan the 7 days from `start`. Returns the `TimetableResponse.schedule` list:
+    one {"day", "date", "slots"} dict per day, slots in time order.
+    """
+    days: List[List[_Block]] = [[] for _ in range(DAYS)]
+    demand = (
+        _revision_blocks(start, due_revisions)
+        + sorted(_deadline_blocks(start, deadlines), key=lambda b: (b.latest, b.latest - b.earliest, b.priority))
+        + _weak_topic_blocks(weak_topics)
+    )
+    # Blocks per day to aim for before any day takes more
+    target = min(MAX_BLOCKS_PER_DAY, max(MIN_BLOCKS_PER_DAY, -(-len(demand) // DAYS)))
+    for block in demand:
+        _place(block, days, target)
+    for i, name in enumerate(syllabus):
+        _place(_Block("syllabus", name, None, "Cover new material and summarise it", SHORT_BLOCK_MINUTES, i, 0, DAYS - 1), days, target)
+    for blocks in days:
+        while len(blocks) < MIN_BLOCKS_PER_DAY:
+            activity = GENERAL_ACTIVITIES[len(blocks) % len(GENERAL_ACTIVITIES)]
+            blocks.append(_Block("general", "General Revision", None, activity, SHORT_BLOCK_MINUTES, len(blocks), 0, DAYS - 1))
+
+    slots = ranked_slots(study_preferences, energy_levels(energy_curve))
+    schedule = []
+    for offset, blocks in enumerate(days):
+        blocks.sort(key=lambda b: (KIND_RANK[b.kind], b.priority, b.topic))
+        placed = sorted(zip(slots, blocks), key=lambda pair: pair[0])
+        day = start + timedelta(days=offset)
+        schedule.append({
+            "day": day.strftime("%A"),
+            "date": day.isoformat(),
+            "slots": [_slot(block, slot_start) for slot_start, block in placed],
+        })
+    return schedule
+
+
+def load_weak_topics(db: Session, user_id: str) -> List[WeakTopic]:
+    """The user's topics under WEAK_TOPIC_SCORE, weakest first (served by ix_mastery_user_score)."""
+    rows = db.execute(
+        select(Mastery.topic_id, Topic.name, Mastery.score)
+        .join(Topic, Topic.id == Mastery.topic_id)
+        .where(Mastery.user_id == user_id, Mastery.score < WEAK_TOPIC_SCORE)
+        .order_by(Mastery.score.asc())
+        .limit(MAX_WEAK_TOPICS)
+    )
+    return [WeakTopic(topic_id, name, score) for topic_id, name, score in rows]
+
+
+def load_due_revisions(db: Session, user_id: str, start: date) -> List[DueRevision]:
+    """Revisions due before the end of the plan, overdue ones included."""
+    end = datetime.combine(start + timedelta(days=DAYS), time.min, tzinfo=timezone.utc)
+    rows = db.execute(
+        select(RevisionSchedule.topic_id, Topic.name, RevisionSchedule.scheduled_date)
+        .join(Topic, Topic.id == RevisionSchedule.topic_id)
+        .where(RevisionSchedule.user_id == user_id, RevisionSchedule.scheduled_date < end)
+    )
+    return [DueRevision(topic_id, name, _utc_date(due)) for topic_id, name, due in rows]
+
+
+def _utc_date(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def describe_activities(schedule: List[Dict[str, Any]], call: Callable[..., Any] = chat_completion) -> List[Dict[str, Any]]:
+    """
+    Ask the LLM for friendlier activity text, one line per distinct (topic, activity).
+    Times and topics are never changed; on any failure the template text is kept.
+    """
+    pairs = sorted({(slot["topic"], slot["activity"]) for day in schedule for slot in day["slots"]})
+    if not pairs:
+        return schedule
+    try:
+        response = call(
+            [
+                {"role": "system", "content": "You are an academic coach. Rewrite each study activity as one short, specific, encouraging instruction for that topic. Return a JSON object with key 'activities': a list of strings in the same order as the input."},
+                {"role": "user", "content": json.dumps([{"topic": t, "activity": a} for t, a in pairs])},
+            ],
+            purpose="timetable.activities",
+            response_format={"type": "json_object"},
+        )
+        activities = json.loads(response.choices[0].message.content).get("activities")
+        if not isinstance(activities, list) or len(activities) != len(pairs):
+            raise ValueError("activity count does not match")
+    except Exception as e:
+        logger.warning(f"Timetable activity text not generated, keeping templates: {e}")
+        return schedule
+    reworded = {pair: text for pair, text in zip(pairs, activities) if isinstance(text, str) and text.strip()}
+    for day in schedule:
+        for slot in day["slots"]:
+            slot["activity"] = reworded.get((slot["topic"], slot["activity"]), slot["activity"])
+    return schedule
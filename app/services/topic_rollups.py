@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.mastery import Mastery
+from app.models.topic_rollup import TopicMasteryRollup
+from app.models.user import User
+
+# school / class value of a rollup row that spans every school / class
+ALL = ""
+
+
+def rollup_scopes(school: Optional[str], class_name: Optional[str]) -> List[Tuple[str, str]]:
+    """The (school, class) rollup rows a student's mastery counts towards."""
+    scopes = [(ALL, ALL)]
+    if school:
+        scopes.append((school, ALL))
+        if class_name:
+            scopes.append((school, class_name))
+    return scopes
+
+
+def mastery_deltas(old_scores: Dict[str, Optional[float]], new_scores: Dict[str, float]) -> Dict[str, Tuple[float, int]]:
+    """
+    Per-topic (sum delta, count delta) for a student's mastery changes.
+    A topic missing from `old_scores` (or None there) had no score yet and adds to the count.
+    """
+    deltas = {}
+    for topic_id, new in new_scores.items():
+        old = old_scores.get(topic_id)
+        if old is None:
+            deltas[topic_id] = (float(new), 1)
+        elif new != old:
+            deltas[topic_id] = (float(new) - float(old), 0)
+    return deltas
+
+
+async def record_mastery_changes(
+    db: AsyncSession,
+    user_id: str,
+    old_scores: Dict[str, Optional[float]],
+    new_scores: Dict[str, float],
+) -> None:
+    """
+    Apply a student's mastery changes to the teacher rollups with one upsert.
+    The student's school and class are read in the caller's transaction (not
+    taken from the cached auth user, which can predate a profile change).
+    Runs in the caller's transaction.
+    """
+    deltas = mastery_deltas(old_scores, new_scores)
+    if not deltas:
+        return
+    profile = (await db.execute(select(User.school, User.class_name).where(User.id == user_id))).one()
+    rows = [
+        {"school": school, "class": class_name, "topic_id": topic_id, "score_sum": sum_delta, "score_count": count_delta}
+        for school, class_name in rollup_scopes(profile.school, profile.class_name)
+        for topic_id, (sum_delta, count_delta) in sorted(deltas.items())  # fixed order, so concurrent upserts lock rows alike
+    ]
+    stmt = pg_insert(TopicMasteryRollup).values(rows)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["school", "class", "topic_id"],
+            set_={
+                "score_sum": TopicMasteryRollup.score_sum + stmt.excluded.score_sum,
+                "score_count": TopicMasteryRollup.score_count + stmt.excluded.score_count,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+
+def refresh_rollups(db: Session) -> int:
+    """
+    Rebuild every rollup row from `mastery` in one GROUPING SETS scan. Corrects
+    drift the incremental path can't see (students changing school or class,
+    concurrent first scores). Caller commits; returns the number of rows written.
+    """
+    school_set = func.grouping(User.school) == 1
+    class_set = func.grouping(User.class_name) == 1
+    totals = (
+        select(
+            func.coalesce(User.school, ALL),
+            func.coalesce(User.class_name, ALL),
+            Mastery.topic_id,
+            func.sum(Mastery.score),
+            func.count(Mastery.score),
+        )
+        .join(User, User.id == Mastery.user_id)
+        .group_by(
+            func.grouping_sets(
+                tuple_(Mastery.topic_id),
+                tuple_(Mastery.topic_id, User.school),
+                tuple_(Mastery.topic_id, User.school, User.class_name),
+            )
+        )
+        # Students without a school (or class) only count towards the wider scopes
+        .having(or_(school_set, User.school.isnot(None)))
+        .having(or_(class_set, User.class_name.isnot(None)))
+    )
+    db.execute(delete(TopicMasteryRollup))
+    result = db.execute(
+        insert(TopicMasteryRollup).from_select(
+            ["school", "class", "topic_id", "score_sum", "score_count"], totals
+        )
+    )
+    return result.rowcount
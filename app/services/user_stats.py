@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.attempt import Attempt
+from app.models.mastery import Mastery
+from app.models.revision import RevisionSchedule
+from app.models.topic import Topic
+from app.models.user_stats import UserStats
+
+WEAK_SCORE = 60.0
+MASTERED_SCORE = 80.0
+UPCOMING_WINDOW = timedelta(days=7)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _place_topic(stats: UserStats, topic_id: str, topic_name: str, score: Optional[float]) -> None:
+    """Move a topic into the weak/mastered list its score belongs to."""
+    weak = [t for t in stats.weak_topics if t["topicId"] != topic_id]
+    mastered = [t for t in stats.mastered_topics if t["topicId"] != topic_id]
+    if score is not None:
+        if score < WEAK_SCORE:
+            weak.append({"topicId": topic_id, "topic": topic_name, "score": float(score)})
+        if score >= MASTERED_SCORE:
+            mastered.append({"topicId": topic_id, "topic": topic_name})
+    # Reassign so the JSON columns are flagged dirty
+    stats.weak_topics = weak
+    stats.mastered_topics = mastered
+
+
+async def build_user_stats(db: AsyncSession, user_id: str) -> UserStats:
+    """Compute a user's stats from scratch. Used once per user, before the first incremental update."""
+    stats = UserStats(user_id=user_id, weak_topics=[], mastered_topics=[], revision_dates={})
+
+    mastery_rows = await db.execute(
+        select(Mastery.topic_id, Mastery.score, Topic.name)
+        .outerjoin(Topic, Topic.id == Mastery.topic_id)
+        .where(Mastery.user_id == user_id)
+    )
+    for topic_id, score, name in mastery_rows:
+        _place_topic(stats, topic_id, name or "Unknown", score)
+
+    schedule_rows = await db.execute(
+        select(RevisionSchedule.topic_id, RevisionSchedule.scheduled_date, Topic.name)
+        .outerjoin(Topic, Topic.id == RevisionSchedule.topic_id)
+        .where(RevisionSchedule.user_id == user_id)
+    )
+    stats.revision_dates = {
+        topic_id: {"topic": name or "Unknown", "date": _as_utc(date).isoformat()}
+        for topic_id, date, name in schedule_rows
+    }
+
+    stats.attempt_count = await db.scalar(
+        select(func.count()).select_from(Attempt).where(Attempt.user_id == user_id)
+    )
+    return stats
+
+
+async def insert_user_stats(db: AsyncSession, user_id: str) -> bool:
+    """
+    Build the user's stats row and insert it, unless a concurrent request already
+    has (e.g. a first dashboard load racing an attempt submit). Returns whether
+    this transaction inserted it.
+    """
+    stats = await build_user_stats(db, user_id)
+    inserted = await db.scalar(
+        pg_insert(UserStats)
+        .values(
+            user_id=user_id,
+            attempt_count=stats.attempt_count,
+            weak_topics=stats.weak_topics,
+            mastered_topics=stats.mastered_topics,
+            revision_dates=stats.revision_dates,
+        )
+        .on_conflict_do_nothing(index_elements=["user_id"])
+        .returning(UserStats.user_id)
+    )
+    return inserted is not None
+
+
+async def get_or_build_user_stats(db: AsyncSession, user_id: str) -> UserStats:
+    """The user's stats row, built and inserted on first use. Caller commits."""
+    stats = await db.get(UserStats, user_id)
+    if stats is None:
+        await insert_user_stats(db, user_id)
+        stats = await db.scalar(select(UserStats).where(UserStats.user_id == user_id))
+    return stats
+
+
+async def _stats_for_update(db: AsyncSession, user_id: str) -> Optional[UserStats]:
+    """
+    Lock the user's stats row for an incremental update.
+
+    Returns None when this call inserted the row: it is built from the (already flushed)
+    source tables, so the caller's change is included and must not be applied again.
+    If a concurrent request inserted it first, its row (which cannot see this
+    transaction's changes) is locked and returned for the update as usual.
+    """
+    stats = await db.scalar(
+        select(UserStats).where(UserStats.user_id == user_id).with_for_update()
+    )
+    if stats is None:
+        if await insert_user_stats(db, user_id):
+            return None
+        stats = await db.scalar(
+            select(UserStats).where(UserStats.user_id == user_id).with_for_update()
+        )
+    return stats
+
+
+async def record_attempts(db: AsyncSession, user_id: str, count: int, scores: Dict[str, float]) -> None:
+    """Count new attempts and re-file the touched topics' mastery scores into the weak/mastered lists."""
+    stats = await _stats_for_update(db, user_id)
+    if stats is None:
+        return
+    stats.attempt_count = (stats.attempt_count or 0) + count
+    if not scores:
+        return
+    names = dict((await db.execute(select(Topic.id, Topic.name).where(Topic.id.in_(scores)))).all())
+    for topic_id, score in scores.items():
+        _place_topic(stats, topic_id, names.get(topic_id) or "Unknown", score)
+
+
+async def record_revision(db: AsyncSession, user_id: str, topic_id: str, scheduled_date: datetime, topic_name: Optional[str] = None) -> None:
+    """Track the topic's next scheduled review date."""
+    await record_revisions(db, user_id, {topic_id: (scheduled_date, topic_name)})
+
+
+async def record_revisions(db: AsyncSession, user_id: str, revisions: Dict[str, Tuple[datetime, Optional[str]]]) -> None:
+    """Track the next scheduled review date of several topics (topic id -> (date, name or None))."""
+    stats = await _stats_for_update(db, user_id)
+    if stats is None or not revisions:
+        return
+    missing = [topic_id for topic_id, (_, name) in revisions.items() if name is None]
+    names = dict((await db.execute(select(Topic.id, Topic.name).where(Topic.id.in_(missing)))).all()) if missing else {}
+    revision_dates = dict(stats.revision_dates)
+    for topic_id, (scheduled_date, topic_name) in revisions.items():
+        topic_name = topic_name or names.get(topic_id)
+        revision_dates[str(topic_id)] = {"topic": topic_name or "Unknown", "date": _as_utc(scheduled_date).isoformat()}
+    stats.revision_dates = revision_dates
+
+
+def upcoming_revisions(stats: UserStats, now: datetime) -> Iterable[Dict[str, Any]]:
+    """Revisions falling inside the dashboard window, soonest first."""
+    now = _as_utc(now)
+    window_end = now + UPCOMING_WINDOW
+    upcoming = []
+    for topic_id, entry in stats.revision_dates.items():
+        date = datetime.fromisoformat(entry["date"])
+        if now <= date <= window_end:
+            upcoming.append((date, {"topic": entry["topic"], "date": entry["date"], "topicId": topic_id}))
+    return [revision for _, revision in sorted(upcoming, key=lambda r: r[0])]
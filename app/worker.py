@@ -1,13 +1,17 @@
-from celery import Celery
+from celery import Celery, chain
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models.note import Note
+from app.models.question import Question
 from app.models.topic import Topic
-import pytesseract
-from PIL import Image
-import io
-import openai
-import json
+from app.services.ocr import PAGE_SEPARATOR, is_pdf, ocr_config_signature, ocr_image_bytes, ocr_pdf
+from app.services.ocr_cache import get_ocr_cache, ocr_cache_key
+from app.services.learning_cache import evict_entries
+from app.services.question_bank import generate_questions, question_rows, release_replenish_lock, save_questions
+from app.services.mastery_service import rebuild_mastery_states
+from app.services.topic_rollups import refresh_rollups
+from app.services.note_topics import extract_topics, save_topics
+from sqlalchemy import func, select, update
 
 celery_app = Celery(
     "worker",
@@ -15,74 +19,238 @@ celery_app = Celery(
     backend=settings.CELERY_RESULT_BACKEND
 )
 
+# Notes go through a chain of two tasks on their own queues, so each stage runs on
+# workers sized for it:
+#   ocr: CPU-bound tesseract, prefork with one process per core, one message at a time
+#     celery -A app.worker worker -Q ocr -P prefork -c <cores> --prefetch-multiplier 1
+#   llm: network-bound model calls (topic extraction, question bank), many threads
+#     celery -A app.worker worker -Q llm -P threads -c 32 --prefetch-multiplier 4
+# Beat tasks stay on the default `celery` queue.
+OCR_QUEUE = "ocr"
+LLM_QUEUE = "llm"
+
 celery_app.conf.update(
     task_track_started=True,
     result_expires=3600, # 1 hour
+    task_routes={
+        "app.worker.ocr_note": {"queue": OCR_QUEUE},
+        "app.worker.extract_note_topics": {"queue": LLM_QUEUE},
+        "app.worker.replenish_question_bank": {"queue": LLM_QUEUE},
+    },
+    # Long tasks: don't let one worker reserve messages others could start now.
+    # LLM workers raise this on the command line.
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        # The write paths keep the rollups current; this corrects drift (e.g. students changing class)
+        "refresh-topic-mastery-rollups": {
+            "task": "app.worker.refresh_topic_mastery_rollups",
+            "schedule": settings.TEACHER_ROLLUP_REFRESH_SECONDS,
+        },
+        "evict-learning-cache": {
+            "task": "app.worker.evict_learning_cache",
+            "schedule": settings.LEARNING_CACHE_EVICT_SECONDS,
+        },
+    },
 )
 
+def _update_note(note_id: int, **values):
+    """Write note fields in a session of its own, so no stage holds one across OCR or LLM calls."""
+    with SessionLocal() as db:
+        db.execute(update(Note).where(Note.id == note_id).values(**values))
+        db.commit()
+
+def _fail_note(note_id: int, error: Exception):
+    _update_note(note_id, status="failed", content=f"Processing failed: {str(error)}")
+
+def _page_progress(note_id: int):
+    """Stream OCR'd PDF pages into the note, in order, with per-page progress."""
+    pages = []
+
+    def on_page(page_number: int, total_pages: int, text: str):
+        pages.append(text)
+        _update_note(
+            note_id,
+            content=PAGE_SEPARATOR.join(pages),
+            status=f"ocr_page_{page_number}_of_{total_pages}",
+        )
+
+    return on_page
+
+def note_pipeline(note_id: int):
+    """The OCR -> topic extraction chain for an uploaded note. Start it with `.apply_async()`."""
+    return chain(ocr_note.s(note_id), extract_note_topics.s())
+
+# acks_late: a worker killed mid-OCR (e.g. on deploy) leaves the message for another.
+# Not reject_on_worker_lost, so a file that crashes tesseract is not redelivered forever.
 @celery_app.task(acks_late=True)
-def process_note_ocr_and_ai(note_id: int):
+def ocr_note(note_id: int):
     """
-    Celery task to perform OCR and AI topic extraction.
+    Pipeline stage 1 (`ocr` queue): OCR the uploaded file into the note's content.
     """
-    db = SessionLocal()
-    note = db.query(Note).filter(Note.id == note_id).first()
-    if not note:
+    with SessionLocal() as db:
+        file_url = db.scalar(select(Note.file_url).where(Note.id == note_id))
+    if file_url is None:
         return {"status": "error", "message": "Note not found"}
 
     try:
         # Read file from storage
-        with open(note.file_url, "rb") as f:
+        with open(file_url, "rb") as f:
             contents = f.read()
 
-        # --- OCR Processing ---
-        # Basic preprocessing - can be expanded with OpenCV for better results
-        image = Image.open(io.BytesIO(contents)).convert('L') # Convert to grayscale
-        text = pytesseract.image_to_string(image, config='--psm 6')
-        note.content = text
-        note.status = "ocr_complete"
-        db.commit()
+        # Identical uploads (e.g. a shared class handout) reuse the cached text
+        pdf = is_pdf(contents)
+        ocr_cache = get_ocr_cache()
+        cache_key = ocr_cache_key(contents, ocr_config_signature(pdf))
+        text = ocr_cache.get(cache_key)
+        if text is None:
+            if pdf:
+                text = ocr_pdf(file_url, on_page=_page_progress(note_id))
+            else:
+                text = ocr_image_bytes(contents)
+            ocr_cache.set(cache_key, text)
+        _update_note(note_id, content=text, status="ocr_complete")
+        # Only the id travels to the next stage; it reads the text back from the note
+        return {"status": "ocr_complete", "note_id": note_id}
+
+    except Exception as e:
+        _fail_note(note_id, e)
+        return {"status": "error", "message": str(e)}
+
+# acks_late: redelivery is safe, a note that already completed is skipped
+@celery_app.task(acks_late=True)
+def extract_note_topics(ocr_result: dict):
+    """
+    Pipeline stage 2 (`llm` queue): extract the title and topics of an OCR'd note.
+    """
+    if ocr_result.get("status") != "ocr_complete":
+        return ocr_result
+    note_id = ocr_result["note_id"]
+    with SessionLocal() as db:
+        note = db.execute(select(Note.title, Note.content, Note.status).where(Note.id == note_id)).first()
+    if note is None:
+        return {"status": "error", "message": "Note not found"}
+    if note.status == "complete":
+        return {"status": "success", "note_id": note_id}
 
-        # --- AI Topic Extraction ---
+    try:
+        text = note.content or ""
         if not text.strip():
             raise ValueError("OCR did not produce any text.")
 
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model=settings.OPENAI_MODEL, 
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant. Extract the main title, main topics, and subtopics from this text. Return a JSON object with keys 'title', and 'topics' which is a list of objects, each having 'name' and 'subtopics' (a list of strings)."},
-                {"role": "user", "content": text[:4000]}
-            ],
-            response_format={"type": "json_object"}
-        )
-        
-        ai_data = json.loads(response.choices[0].message.content)
-        extracted_topics = ai_data.get("topics", [])
-        extracted_title = ai_data.get("title", note.title) # Use AI title or fallback to filename
+        # Map over every chunk of the full text, merged into one list of topics and subtopics
+        extracted_title, extracted_topics = extract_topics(text)
+        extracted_title = extracted_title or note.title # Use AI title or fallback to filename
 
         if not extracted_topics:
             raise ValueError("AI could not extract topics.")
 
-        note.title = extracted_title
-
-        # Save topics and subtopics
-        topics_to_add = []
-        for t_data in extracted_topics:
-            topic = Topic(note_id=note.id, name=t_data["name"], confidence=0.75) # Default confidence
-            # Subtopics can be handled similarly if your model supports it
-            topics_to_add.append(topic)
-        
-        db.add_all(topics_to_add)
-        note.status = "complete"
+        # Save topics, subtopics and the finished note together
+        with SessionLocal() as db:
+            save_topics(db, note_id, extracted_topics)
+            db.execute(update(Note).where(Note.id == note_id).values(
+                title=extracted_title,
+                status="complete",
+                topic_names="\n".join(t_data["name"] for t_data in extracted_topics), # searched with the note
+            ))
+            db.commit()
+
+        return {"status": "success", "note_id": note_id}
+
+    except Exception as e:
+        _fail_note(note_id, e)
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task
+def process_note_ocr_and_ai(note_id: int):
+    """
+    Former single-task pipeline. Kept so messages queued before an upgrade still run: starts the chain.
+    """
+    note_pipeline(note_id).apply_async()
+    return {"status": "queued", "note_id": note_id}
+
+
+@celery_app.task(acks_late=True)
+def replenish_question_bank(topic_id: str, difficulty: str):
+    """
+    Celery task to top up a topic's question bank for one difficulty.
+    No database session is held while the questions are generated.
+    """
+    try:
+        with SessionLocal() as db:
+            topic_name = db.scalar(select(Topic.name).where(Topic.id == topic_id))
+            if topic_name is None:
+                return {"status": "error", "message": "Topic not found"}
+            bank_size = db.query(func.count(Question.id)).filter(
+                Question.topic_id == topic_id, Question.difficulty == difficulty
+            ).scalar()
+        if bank_size >= settings.QUIZ_BANK_MIN_QUESTIONS:
+            return {"status": "skipped", "bank_size": bank_size}
+
+        rows = question_rows(
+            topic_id, difficulty,
+            generate_questions(topic_name, difficulty, settings.QUIZ_BANK_BATCH_SIZE),
+        )
+        with SessionLocal() as db:
+            save_questions(db, rows)
+            db.commit()
+        return {"status": "success", "added": len(rows), "bank_size": bank_size + len(rows)}
+
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+    finally:
+        release_replenish_lock(topic_id, difficulty)
+
+
+@celery_app.task
+def refresh_topic_mastery_rollups():
+    """
+    Celery beat task rebuilding the teacher analytics rollups from the mastery table.
+    """
+    db = SessionLocal()
+    try:
+        rows = refresh_rollups(db)
         db.commit()
+        return {"status": "success", "rows": rows}
+    except Exception as e:
+        db.rollback()
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
 
-        return {"status": "success", "note_id": note.id}
 
+@celery_app.task
+def evict_learning_cache():
+    """
+    Celery beat task dropping expired learning sections and the least recently
+    hit ones beyond LEARNING_CACHE_MAX_ENTRIES.
+    """
+    db = SessionLocal()
+    try:
+        evicted = evict_entries(db)
+        db.commit()
+        return {"status": "success", "evicted": evicted}
     except Exception as e:
-        note.status = "failed"
-        note.content = f"Processing failed: {str(e)}"
+        db.rollback()
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def backfill_mastery_states():
+    """
+    Celery task rebuilding every mastery estimate from the attempts table in one
+    streaming pass, then the teacher rollups from the rebuilt scores. Run once
+    after deploying the estimator, or whenever its settings change.
+    """
+    db = SessionLocal()
+    try:
+        states = rebuild_mastery_states(db)
+        rows = refresh_rollups(db)
         db.commit()
+        return {"status": "success", "states": states, "rollup_rows": rows}
+    except Exception as e:
+        db.rollback()
         return {"status": "error", "message": str(e)}
     finally:
         db.close()
@@ -0,0 +1,82 @@
+"""Sync vs async database throughput under concurrent load.
+
+Serves the same query (a user's attempt count, as used by /progress/stats)
+from a sync route on `get_db` and an async route on `get_async_db`, then
+drives each with 50 and 500 concurrent in-process clients over httpx's ASGI
+transport. Run from the repository root against the database in DATABASE_URL:
+
+    python benchmarks/bench_async_db.py
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.session import async_engine, get_async_db, get_db
+from app.models.attempt import Attempt
+
+CONCURRENCY = (50, 500)
+REQUESTS_PER_CLIENT = 10
+USER_ID = "bench-async-db"
+
+bench_app = FastAPI()
+
+
+def _count_query():
+    return select(func.count()).select_from(Attempt).where(Attempt.user_id == USER_ID)
+
+
+@bench_app.get("/sync")
+def sync_route(db: Session = Depends(get_db)):
+    return {"count": db.scalar(_count_query())}
+
+
+@bench_app.get("/async")
+async def async_route(db: AsyncSession = Depends(get_async_db)):
+    return {"count": await db.scalar(_count_query())}
+
+
+async def _client(http, path, latencies):
+    for _ in range(REQUESTS_PER_CLIENT):
+        started = time.perf_counter()
+        response = await http.get(path)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run(path, clients):
+    latencies = []
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(_client(http, path, latencies) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{path:<7} {clients:>8} {len(latencies) / elapsed:>10.1f} "
+        f"{statistics.median(latencies):>9.1f} {p95:>9.1f}"
+    )
+
+
+async def main():
+    print(f"{'route':<7} {'clients':>8} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9}")
+    try:
+        for clients in CONCURRENCY:
+            await run("/sync", clients)
+            await run("/async", clients)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
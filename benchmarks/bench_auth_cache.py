@@ -0,0 +1,63 @@
+"""Per-request auth overhead of get_current_user with and without the auth cache.
+
+Resolves the same bearer token repeatedly against the database in DATABASE_URL:
+once with the cache cleared before every call (JWT decode + user query) and
+once warm (cache hit). Run from the repository root:
+
+    python benchmarks/bench_auth_cache.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import delete
+
+from app.api.deps import get_current_user
+from app.core import security
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.services.auth_cache import auth_cache
+
+ITERATIONS = 2000
+
+
+def measure(token, cold):
+    db = SessionLocal()
+    try:
+        auth_cache.clear()
+        get_current_user(db=db, token=token)  # warm the connection (and the cache)
+        started = time.perf_counter()
+        for _ in range(ITERATIONS):
+            if cold:
+                auth_cache.clear()
+            get_current_user(db=db, token=token)
+        return (time.perf_counter() - started) / ITERATIONS * 1_000_000
+    finally:
+        db.close()
+
+
+def main():
+    db = SessionLocal()
+    user = User(name="bench-auth-cache")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    token = security.create_access_token(subject=user_id)
+
+    try:
+        uncached = measure(token, cold=True)
+        cached = measure(token, cold=False)
+        print(f"{'mode':<10} {'us/request':>12}")
+        print(f"{'uncached':<10} {uncached:>12.1f}")
+        print(f"{'cached':<10} {cached:>12.1f}")
+        print(f"speedup: {uncached / cached:.1f}x")
+    finally:
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Planner regression check and page latency for the user-scoped indexes.
+
+Seeds a cohort into the Postgres database in DATABASE_URL (run
+`alembic upgrade head` first), ANALYZEs, then:
+
+- asserts via EXPLAIN that each hot query is served by its index
+  (ix_revision_schedules_user_scheduled, ix_attempts_user_timestamp,
+  ix_mastery_user_score, ix_notes_user_created) rather than a sequential scan;
+- times a deep page of /notes/ with the old OFFSET/LIMIT against the keyset
+  query now used by the endpoint.
+
+Seeded rows are tagged with the "bench-" id prefix and removed at the end.
+Run from the repository root:
+
+    python benchmarks/bench_keyset_explain.py
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import delete, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+
+from app.db.session import SessionLocal
+from app.models.attempt import Attempt
+from app.models.mastery import Mastery
+from app.models.note import Note
+from app.models.revision import RevisionSchedule
+
+USERS = 2000
+TOPICS = 50
+NOTES_FOR_USER = 20000
+PAGE = 50
+DEEP_PAGE = 300  # page number used for the OFFSET comparison
+
+
+def seed(db, note_user):
+    db.execute(text(
+        "INSERT INTO users (id, role, name) SELECT 'bench-u' || g, 'student', 'Bench ' || g FROM generate_series(0, :n - 1) g"
+    ), {"n": USERS})
+    db.execute(text("INSERT INTO users (id, role, name) VALUES (:id, 'student', 'Bench notes')"), {"id": str(note_user)})
+    db.execute(text(
+        "INSERT INTO topics (id, name, confidence) SELECT 'bench-t' || g, 'Bench topic ' || g, 0.5 FROM generate_series(0, :n - 1) g"
+    ), {"n": TOPICS})
+    db.execute(text(
+        """INSERT INTO revision_schedules (id, user_id, topic_id, scheduled_date, interval, ease_factor, repetitions)
+           SELECT 'bench-r' || u || '-' || t, 'bench-u' || u, 'bench-t' || t,
+                  now() + ((random() * 60 - 30) || ' days')::interval, 1, 2.5, 0
+           FROM generate_series(0, :users - 1) u, generate_series(0, :topics - 1) t"""
+    ), {"users": USERS, "topics": TOPICS})
+    db.execute(text(
+        """INSERT INTO mastery (id, user_id, topic_id, score)
+           SELECT 'bench-m' || u || '-' || t, 'bench-u' || u, 'bench-t' || t, random() * 100
+           FROM generate_series(0, :users - 1) u, generate_series(0, :topics - 1) t"""
+    ), {"users": USERS, "topics": TOPICS})
+    db.execute(text(
+        """INSERT INTO attempts (id, user_id, topic_id, is_correct, timestamp)
+           SELECT 'bench-a' || u || '-' || g, 'bench-u' || u, 'bench-t' || (g % :topics), random() < 0.6,
+                  now() - (g || ' minutes')::interval
+           FROM generate_series(0, :users - 1) u, generate_series(0, 49) g"""
+    ), {"users": USERS, "topics": TOPICS})
+    db.execute(text(
+        """INSERT INTO notes (user_id, title, status, created_at)
+           SELECT :user_id, 'bench-note ' || g, 'complete', now() - (g || ' seconds')::interval
+           FROM generate_series(0, :n - 1) g"""
+    ), {"user_id": note_user, "n": NOTES_FOR_USER})
+    db.commit()
+    for table in ("users", "topics", "revision_schedules", "mastery", "attempts", "notes"):
+        db.execute(text(f"ANALYZE {table}"))
+    db.commit()
+
+
+def cleanup(db, note_user):
+    db.execute(delete(Note).where(Note.user_id == note_user, Note.title.like("bench-note %")))
+    db.execute(delete(Attempt).where(Attempt.id.like("bench-%")))
+    db.execute(delete(Mastery).where(Mastery.id.like("bench-%")))
+    db.execute(delete(RevisionSchedule).where(RevisionSchedule.id.like("bench-%")))
+    db.execute(text("DELETE FROM topics WHERE id LIKE 'bench-%'"))
+    db.execute(text("DELETE FROM users WHERE id LIKE 'bench-%' OR id = :id"), {"id": str(note_user)})
+    db.commit()
+
+
+def plan_indexes(db, query):
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    found, stack = set(), [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if "Index Name" in node:
+            found.add(node["Index Name"])
+        if node["Node Type"] == "Seq Scan":
+            found.add(f"SEQ SCAN {node['Relation Name']}")
+        stack.extend(node.get("Plans", []))
+    return found
+
+
+def timed(db, query, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        db.execute(query).all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    note_user = 900000001 if Note.__table__.c.user_id.type.python_type is int else "bench-notes"
+    now = datetime.now(timezone.utc)
+    user = "bench-u42"
+    checks = {
+        "ix_revision_schedules_user_scheduled": select(RevisionSchedule).where(
+            RevisionSchedule.user_id == user, RevisionSchedule.scheduled_date <= now
+        ).order_by(RevisionSchedule.scheduled_date, RevisionSchedule.id).limit(PAGE + 1),
+        "ix_attempts_user_timestamp": select(Attempt).where(
+            Attempt.user_id == user, Attempt.timestamp >= now - timedelta(days=7)
+        ).order_by(Attempt.timestamp.desc()),
+        "ix_mastery_user_score": select(Mastery).where(
+            Mastery.user_id == user, Mastery.score < 70
+        ).order_by(Mastery.score),
+        "ix_notes_user_created": select(Note).where(Note.user_id == note_user)
+        .order_by(Note.created_at.desc(), Note.id.desc()).limit(PAGE + 1),
+    }
+
+    db = SessionLocal()
+    try:
+        seed(db, note_user)
+        failures = []
+        for index, query in checks.items():
+            used = plan_indexes(db, query)
+            ok = index in used
+            print(f"{'ok  ' if ok else 'FAIL'} {index:<40} plan uses: {', '.join(sorted(used))}")
+            if not ok:
+                failures.append(index)
+
+        newest = select(Note).where(Note.user_id == note_user).order_by(Note.created_at.desc(), Note.id.desc())
+        offset_ms = timed(db, newest.offset(DEEP_PAGE * PAGE).limit(PAGE))
+        boundary = db.execute(newest.offset(DEEP_PAGE * PAGE - 1).limit(1)).scalar_one()
+        keyset_ms = timed(db, newest.where(
+            tuple_(Note.created_at, Note.id) < (boundary.created_at, boundary.id)
+        ).limit(PAGE + 1))
+        print(f"/notes/ page {DEEP_PAGE} of {NOTES_FOR_USER // PAGE}: offset {offset_ms:6.2f} ms, keyset {keyset_ms:6.2f} ms")
+    finally:
+        db.rollback()
+        cleanup(db, note_user)
+        db.close()
+
+    if failures:
+        sys.exit(f"planner did not use: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""End-to-end latency of /learning/generate: sequential calls vs concurrent fan-out.
+
+Starts benchmarks/stub_llm_server.py in-process with an artificial per-call
+delay and generates the five learning sections both ways. Run from the
+repository root:
+
+    python benchmarks/bench_learning_fanout.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(__file__))
+
+import openai
+
+from stub_llm_server import start_in_thread
+
+DELAY_SECONDS = 1.0
+TOPIC = "Photosynthesis"
+
+
+def sequential(base_url):
+    from app.api.learning import SECTION_PROMPTS, SYSTEM_PROMPT
+
+    client = openai.OpenAI(api_key="stub", base_url=base_url)
+    content = {}
+    for key, prompt in SECTION_PROMPTS.items():
+        response = client.chat.completions.create(
+            model="stub",
+            messages=[{"role": "system", "content": SYSTEM_PROMPT},
+                      {"role": "user", "content": prompt.format(topic=TOPIC)}],
+        )
+        content[key] = response.choices[0].message.content
+    return content
+
+
+async def fan_out():
+    from app.api.learning import generate_sections
+
+    started = time.perf_counter()
+    first_section_at = None
+    async for _ in generate_sections(TOPIC):
+        if first_section_at is None:
+            first_section_at = time.perf_counter() - started
+    return first_section_at
+
+
+def main():
+    base_url = start_in_thread(delay=DELAY_SECONDS)
+    from app.core.config import settings
+    settings.OPENAI_BASE_URL = base_url
+    settings.OPENAI_API_KEY = "stub"
+
+    started = time.perf_counter()
+    sequential(base_url)
+    sequential_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first_section_s = asyncio.run(fan_out())
+    fan_out_s = time.perf_counter() - started
+
+    print(f"stub delay per call: {DELAY_SECONDS:.1f}s, 5 sections")
+    print(f"{'sequential':<12} total {sequential_s:6.2f}s")
+    print(f"{'fan-out':<12} total {fan_out_s:6.2f}s  first streamed section {first_section_s:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
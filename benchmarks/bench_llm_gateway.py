@@ -0,0 +1,83 @@
+"""Exercise the LLM gateway against the local stub: rate limiting, concurrency cap and retries.
+
+Starts benchmarks/stub_llm_server.py in-process, failing every Nth request
+with a 503, and fires a burst of sync (thread pool) and async calls through
+app.services.llm. Every call should succeed after retries, and the observed
+throughput should stay at or below LLM_REQUESTS_PER_SECOND. A final burst of
+byte-identical prompts (a class opening the same topic at once) should reach
+the stub as a single request. Run from the repository root:
+
+    python benchmarks/bench_llm_gateway.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(__file__))
+
+from stub_llm_server import STUB_STATE, start_in_thread
+
+CALLS = 60
+DELAY_SECONDS = 0.2
+FAIL_EVERY = 7
+RATE = 20.0
+
+
+def main():
+    base_url = start_in_thread(port=8766, delay=DELAY_SECONDS, fail_every=FAIL_EVERY)
+    from app.core.config import settings
+    settings.OPENAI_BASE_URL = base_url
+    settings.OPENAI_API_KEY = "stub"
+    settings.LLM_REQUESTS_PER_SECOND = RATE
+    settings.LLM_BURST = 5
+    settings.LLM_RETRY_BASE_DELAY_SECONDS = 0.05
+
+    from app.services import llm
+
+    def one_sync(i):
+        return llm.chat_completion([{"role": "user", "content": f"sync {i}"}], purpose="bench.sync")
+
+    async def identical_async():
+        return await asyncio.gather(*(
+            llm.achat_completion([{"role": "user", "content": "same topic"}], purpose="bench.identical")
+            for _ in range(CALLS)
+        ))
+
+    async def burst_async():
+        return await asyncio.gather(*(
+            llm.achat_completion([{"role": "user", "content": f"async {i}"}], purpose="bench.async")
+            for i in range(CALLS)
+        ))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        list(pool.map(one_sync, range(CALLS)))
+    sync_s = time.perf_counter() - started
+
+    # Separate event loops, as in a worker running one asyncio.run per task: each gets its own client
+    started = time.perf_counter()
+    asyncio.run(burst_async())
+    async_s = time.perf_counter() - started
+
+    STUB_STATE.update(fail_every=0)
+    before = STUB_STATE["requests"]
+    started = time.perf_counter()
+    asyncio.run(identical_async())
+    identical_s = time.perf_counter() - started
+    identical_requests = STUB_STATE["requests"] - before
+
+    print(f"stub delay {DELAY_SECONDS:.1f}s, 503 every {FAIL_EVERY} requests, limit {RATE:.0f} req/s, "
+          f"concurrency {settings.LLM_MAX_CONCURRENCY}")
+    print(f"{'sync':<6} {CALLS} calls in {sync_s:6.2f}s  ({CALLS / sync_s:5.1f} calls/s)")
+    print(f"{'async':<6} {CALLS} calls in {async_s:6.2f}s  ({CALLS / async_s:5.1f} calls/s)")
+    print(f"{'same':<6} {CALLS} identical calls in {identical_s:6.2f}s, {identical_requests} reached the stub")
+    print(f"stub saw {STUB_STATE['requests']} requests")
+    print(json.dumps(llm.gateway_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
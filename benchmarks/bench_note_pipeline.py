@@ -0,0 +1,145 @@
+"""Throughput of the note pipeline: one shared worker pool vs per-stage pools.
+
+Runs the real `ocr_note -> extract_note_topics` chain from app.worker through
+Celery's in-memory broker, with in-process workers:
+
+- `shared`: CPU-count workers consuming both queues, i.e. a pool sized for OCR
+  that also waits on the LLM,
+- `split`: CPU-count workers on the `ocr` queue (prefetch 1) and 32 on the
+  `llm` queue (prefetch 4), as deployed.
+
+The workload mixes unique note photos (real tesseract OCR) with re-uploads of
+earlier ones (OCR cache hits); topic extraction goes to the stub LLM server
+with an artificial delay. Needs tesseract and the database in DATABASE_URL
+after `alembic upgrade head`. Run from the repository root:
+
+    python benchmarks/bench_note_pipeline.py [notes] [llm delay seconds]
+"""
+import contextlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(__file__))
+
+from stub_llm_server import start_in_thread
+
+NOTES = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+LLM_DELAY = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+DUPLICATE_SHARE = 0.3
+CPUS = os.cpu_count() or 2
+LLM_THREADS = 32
+
+os.environ["OPENAI_BASE_URL"] = start_in_thread(port=8767, delay=LLM_DELAY)
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ["LLM_REQUESTS_PER_SECOND"] = "0"  # measure the pipeline, not the gateway's rate limit
+os.environ["LLM_MAX_CONCURRENCY"] = str(LLM_THREADS)
+os.environ["OCR_CACHE_BACKEND"] = "disk"
+
+from celery.contrib.testing.worker import start_worker
+from PIL import Image, ImageDraw
+from sqlalchemy import delete
+
+import app.services.ocr_cache as ocr_cache
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.note import Note
+from app.models.topic import Topic
+from app.models.user import User
+from app.worker import LLM_QUEUE, OCR_QUEUE, celery_app, note_pipeline
+
+celery_app.conf.update(
+    broker_url="memory://",
+    broker_transport_options={"polling_interval": 0.01},  # the in-memory transport polls once a second by default
+    result_backend="cache+memory://",
+)
+
+WORDS = "photosynthesis chlorophyll glucose enzyme membrane osmosis diffusion respiration mitochondria nucleus".split()
+
+
+def make_photos(directory, rng):
+    """Note photos; a share of them re-uploads of earlier ones."""
+    paths = []
+    for i in range(NOTES):
+        if paths and rng.random() < DUPLICATE_SHARE:
+            paths.append(rng.choice(paths))
+            continue
+        image = Image.new("L", (1240, 1754), 255)
+        draw = ImageDraw.Draw(image)
+        for line in range(rng.randint(10, 40)):
+            draw.text((80, 80 + line * 40), " ".join(rng.choice(WORDS) for _ in range(8)), fill=0)
+        path = os.path.join(directory, f"note-{i}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def create_notes(user_id, paths):
+    with SessionLocal() as db:
+        notes = [Note(user_id=user_id, title=os.path.basename(p), content="Processing...", file_url=p, status="pending") for p in paths]
+        db.add_all(notes)
+        db.commit()
+        return [note.id for note in notes]
+
+
+def run(label, user_id, paths, workers):
+    # Fresh OCR cache per run, so both see the same hits and misses
+    settings.OCR_CACHE_DIR = tempfile.mkdtemp(prefix="bench-ocr-cache-")
+    ocr_cache._ocr_cache = None
+    note_ids = create_notes(user_id, paths)
+
+    with contextlib.ExitStack() as stack:
+        # One solo worker per pool slot: the threads pool only notices free slots
+        # once a second on the in-memory transport, which would dominate the timings
+        for queues, slots, prefetch in workers:
+            for _ in range(slots):
+                stack.enter_context(start_worker(
+                    celery_app, pool="solo", queues=queues, prefetch_multiplier=prefetch, perform_ping_check=False,
+                ))
+        started = time.perf_counter()
+        pending = {note_pipeline(note_id).apply_async(): time.perf_counter() for note_id in note_ids}
+        latencies, failed = [], 0
+        while pending:
+            for result in [r for r in pending if r.ready()]:
+                latencies.append(time.perf_counter() - pending.pop(result))
+                failed += result.get().get("status") != "success"
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{label:<8} {NOTES / elapsed:>9.2f} {statistics.median(latencies):>9.2f} "
+          f"{latencies[int(0.95 * len(latencies))]:>9.2f} {elapsed:>9.1f} {failed:>7}")
+    return note_ids
+
+
+def main():
+    rng = random.Random(42)
+    directory = tempfile.mkdtemp(prefix="bench-note-pipeline-")
+    paths = make_photos(directory, rng)
+
+    with SessionLocal() as db:
+        user = User(name="bench-note-pipeline")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    note_ids = []
+    try:
+        print(f"{NOTES} notes, {DUPLICATE_SHARE:.0%} re-uploads, LLM delay {LLM_DELAY}s, {CPUS} CPUs")
+        print(f"{'pools':<8} {'notes/s':>9} {'p50 s':>9} {'p95 s':>9} {'wall s':>9} {'failed':>7}")
+        note_ids += run("shared", user_id, paths, [([OCR_QUEUE, LLM_QUEUE], CPUS, 1)])
+        note_ids += run("split", user_id, paths, [([OCR_QUEUE], CPUS, 1), ([LLM_QUEUE], LLM_THREADS, 4)])
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(Topic).where(Topic.note_id.in_([str(i) for i in note_ids])))
+            db.execute(delete(Note).where(Note.user_id == user_id))
+            db.execute(delete(User).where(User.id == user_id))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
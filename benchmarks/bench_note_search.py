@@ -0,0 +1,152 @@
+"""Note search latency at 10k, 100k and 1M notes.
+
+Grows the notes table in the Postgres database in DATABASE_URL (run
+`alembic upgrade head` first) to each size in turn, with OCR-like random
+text drawn from a skewed vocabulary (so some words are in almost every note
+and some in a few), spread over users of 1,000 notes each plus one heavy user
+holding 5,000. After each step it ANALYZEs and times `search_notes`, as
+/notes/search runs it, for common, medium and rare words and a two-word
+query: the first page and the fifth (walked with the keyset cursor).
+
+Also times the in-memory fallback used on SQLite on the typical user's notes
+(index built per search, as the endpoint does there).
+
+Seeded rows are tagged "bench-search" and removed at the end. Run from the repository root:
+
+    python benchmarks/bench_note_search.py [sizes, e.g. 10000,100000,1000000]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import select, text
+
+import app.db.base  # noqa: F401  (registers every model the relationships refer to)
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.models.note import Note
+from app.services.note_search import InvertedIndex, search_notes
+
+SIZES = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000]
+NOTES_PER_USER = 1000
+HEAVY_USER_NOTES = 5000
+WORDS_PER_NOTE = 60
+VOCABULARY = 5000
+PAGE = 20
+PAGES = 5
+REPEAT = 20
+FIRST_USER = 920_000_000  # typical users are FIRST_USER + 1 ..., the heavy user is FIRST_USER
+
+SYLLABLES = "ka lo mi ne su ta ri po ve da zu fo gi ha ju le mo ni pa ro".split()
+
+
+def vocabulary():
+    rng = random.Random(42)
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda w: (len(w), w))
+
+
+def seed(db, words, first_user, users, notes, owner_sql):
+    """`notes` more notes for users FIRST_USER + first_user ..., owned as `owner_sql` (in terms of g) says."""
+    db.execute(text(
+        "INSERT INTO users (id, role, name) SELECT (CAST(:base AS bigint) + :first + g)::text, 'student', 'bench-search ' || g "
+        "FROM generate_series(0, :n - 1) g ON CONFLICT DO NOTHING"
+    ), {"base": FIRST_USER, "first": first_user, "n": users})
+    # Index power(random(), 3) * V: word i is in most notes for small i, in a handful for large i.
+    # The inner series references g so every note gets its own text, and each pick references
+    # the inner series so the aggregate runs per note rather than over the outer query.
+    db.execute(text(f"""
+        INSERT INTO notes (user_id, title, content, topic_names, status, created_at)
+        SELECT {owner_sql},
+               'bench-search ' || w[1 + floor(power(random(), 3) * :v)::int] || ' ' || w[1 + floor(power(random(), 3) * :v)::int],
+               (SELECT string_agg(w[1 + floor(power(random(), 3) * :v)::int + i * 0], ' ') FROM generate_series(1, :words + g * 0) i),
+               (SELECT string_agg(w[1 + floor(power(random(), 3) * :v)::int + i * 0], E'\\n') FROM generate_series(1, 3 + g * 0) i),
+               'complete', now() - (g || ' seconds')::interval
+        FROM generate_series(0, :n - 1) g, (SELECT CAST(:words_array AS text[]) AS w) vocab
+    """), {"v": VOCABULARY, "words": WORDS_PER_NOTE, "n": notes, "words_array": words, "base": FIRST_USER,
+           "first": first_user})
+    db.commit()
+
+
+def cleanup(db):
+    db.execute(text("DELETE FROM notes WHERE title LIKE 'bench-search %'"))
+    db.execute(text("DELETE FROM users WHERE name LIKE 'bench-search %'"))
+    db.commit()
+
+
+async def timed(user_id, query):
+    """Per-request latency of the first page and of page PAGES, in ms."""
+    first, deep = [], []
+    async with AsyncSessionLocal() as db:
+        for _ in range(REPEAT):
+            after = None
+            for page in range(PAGES):
+                started = time.perf_counter()
+                hits = await search_notes(db, user_id, query, PAGE + 1, after)
+                elapsed = (time.perf_counter() - started) * 1000
+                if page == 0:
+                    first.append(elapsed)
+                if len(hits) <= PAGE:
+                    break
+                after = (hits[PAGE - 1]["rank"], int(hits[PAGE - 1]["id"]))
+            else:
+                deep.append(elapsed)
+    return first, deep
+
+
+def fallback_ms(db, user_id, queries):
+    rows = db.execute(
+        select(Note.id, Note.title, Note.topic_names, Note.content).where(Note.user_id == user_id)
+    ).all()
+    started = time.perf_counter()
+    for query in queries:
+        index = InvertedIndex()
+        for row in rows:
+            index.add(row.id, {"title": row.title, "topic_names": row.topic_names, "content": row.content})
+        index.search(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+def fmt(values):
+    return f"{statistics.median(values):>8.2f}" if values else f"{'-':>8}"
+
+
+async def main():
+    words = vocabulary()
+    queries = {"common": words[0], "medium": words[50], "rare": words[2000], "two words": f"{words[0]} {words[50]}"}
+    typical, heavy = FIRST_USER + 1, FIRST_USER
+    db = SessionLocal()
+    total = 0
+    try:
+        seed(db, words, 0, 1, HEAVY_USER_NOTES, "CAST(:base AS bigint)")
+        total = HEAVY_USER_NOTES
+        typical_users = 0
+        print(f"{'notes':>9} {'user':<8} {'query':<10} {'p50 ms':>8} {'page ' + str(PAGES):>8}")
+        for size in SIZES:
+            if size > total:
+                users = max(1, (size - total) // NOTES_PER_USER)
+                seed(db, words, 1 + typical_users, users, size - total, f"CAST(:base AS bigint) + :first + mod(g, {users})")
+                typical_users += users
+                total = size
+            db.execute(text("ANALYZE notes"))
+            db.commit()
+            for user_label, user_id in (("typical", typical), ("heavy", heavy)):
+                for label, query in queries.items():
+                    first, deep = await timed(user_id, query)
+                    print(f"{total:>9} {user_label:<8} {label:<10} {fmt(first)} {fmt(deep)}")
+            print(f"{total:>9} {'typical':<8} {'fallback':<10} {fallback_ms(db, typical, list(queries.values())):>8.2f}")
+    finally:
+        db.rollback()
+        cleanup(db)
+        db.close()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""Topic extraction over long notes: map-reduce over all chunks vs the old 4,000-char truncation.
+
+Builds fixture notes of increasing length, each a run of headed sections
+(a topic, a few subtopic lines, body paragraphs), with some topics coming up
+again later under a different spelling. A stand-in model "extracts" the
+headings and subtopic lines it is shown, after a delay that grows with the
+prompt, so recall only depends on how much of the note reaches it.
+
+Reports, per note length, the wall time and the topic and subtopic recall of
+`extract_topics` against a single call on `text[:4000]`, and checks that
+repeated topics are merged. Needs no database or LLM. Run from the repository root:
+
+    python benchmarks/bench_note_topics.py [base delay seconds]
+"""
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.getcwd())
+
+from app.services.note_topics import EXTRACTION_PROMPT, extract_topics, normalize_name
+
+BASE_DELAY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+DELAY_PER_1K_CHARS = 0.05
+NOTE_CHARS = [4_000, 20_000, 60_000, 150_000]
+NOTES_PER_LENGTH = 3
+TRUNCATE_CHARS = 4000
+
+WORDS = ("cell membrane enzyme energy reaction pressure force wave charge acid base "
+         "equation function vector matrix limit series molecule atom bond current").split()
+
+
+def fake_model(messages, purpose=None, response_format=None):
+    """Reads '## Topic' headings and '- subtopic' lines from the prompt, like a model would find them."""
+    prompt = messages[-1]["content"]
+    time.sleep(BASE_DELAY + DELAY_PER_1K_CHARS * len(prompt) / 1000)
+    topics, current = [], None
+    for line in prompt.splitlines():
+        if line.startswith("## "):
+            current = {"name": line[3:], "subtopics": []}
+            topics.append(current)
+        elif line.startswith("- ") and current is not None:
+            current["subtopics"].append(line[2:])
+    title = next((line[2:] for line in prompt.splitlines() if line.startswith("# ")), None)
+    content = json.dumps({"title": title, "topics": topics})
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_note(rng, chars):
+    """A note of about `chars` characters, and the (topic, subtopics) it covers."""
+    parts, truth = ["# Revision notes"], {}
+    i = 0
+    while sum(len(p) + 2 for p in parts) < chars:
+        if truth and rng.random() < 0.15:
+            # An earlier topic again, spelled differently, with one more subtopic
+            key = rng.choice(list(truth))
+            name = key.upper() + "."
+        else:
+            name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}"
+            key = normalize_name(name)
+            truth[key] = set()
+            i += 1
+        subtopics = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}-{j}" for j in range(rng.randint(1, 4))]
+        truth[key].update(normalize_name(s) for s in subtopics)
+        parts.append("\n".join([f"## {name}"] + [f"- {s}" for s in subtopics]))
+        for _ in range(rng.randint(1, 3)):
+            parts.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + ".")
+    return "\n\n".join(parts), truth
+
+
+def truncated(text):
+    """The previous behaviour: one call on the first TRUNCATE_CHARS characters."""
+    data = fake_model([{"role": "system", "content": EXTRACTION_PROMPT}, {"role": "user", "content": text[:TRUNCATE_CHARS]}])
+    data = json.loads(data.choices[0].message.content)
+    return data.get("title"), data.get("topics", [])
+
+
+def recall(topics, truth):
+    found = {normalize_name(t["name"]): {normalize_name(s) for s in t["subtopics"]} for t in topics}
+    topic_recall = len(found.keys() & truth.keys()) / len(truth)
+    all_subtopics = sum(len(s) for s in truth.values())
+    subtopic_recall = sum(len(found.get(k, set()) & s) for k, s in truth.items()) / all_subtopics
+    return topic_recall, subtopic_recall, len(found) == len(topics)
+
+
+def main():
+    rng = random.Random(42)
+    print(f"model delay {BASE_DELAY}s + {DELAY_PER_1K_CHARS}s per 1k prompt chars, {NOTES_PER_LENGTH} notes per length")
+    print(f"{'chars':>8} {'method':<10} {'wall s':>8} {'topics':>8} {'subtopics':>10}")
+    for chars in NOTE_CHARS:
+        notes = [make_note(rng, chars) for _ in range(NOTES_PER_LENGTH)]
+        for label, extract in (("truncate", truncated), ("map-reduce", lambda text: extract_topics(text, call=fake_model))):
+            started = time.perf_counter()
+            outcomes = [extract(text) for text, _ in notes]
+            elapsed = (time.perf_counter() - started) / len(notes)
+            scores = [recall(topics, truth) for (_, topics), (_, truth) in zip(outcomes, notes)]
+            assert all(title == "Revision notes" for title, _ in outcomes)
+            if label == "map-reduce":
+                assert all(unique for _, _, unique in scores), "duplicate topics after merging"
+            print(f"{chars:>8} {label:<10} {elapsed:>8.2f} "
+                  f"{sum(s[0] for s in scores) / len(scores):>8.0%} {sum(s[1] for s in scores) / len(scores):>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Throughput and peak RSS of note upload storage: buffered vs streamed.
+
+`buffered` is the previous handler body (`await file.read()` then one write),
+`streamed` is app.services.note_storage.store_upload. Each mode runs in its own
+subprocess so peak RSS is not shared between them. Run from the repository root:
+
+    python benchmarks/bench_note_upload.py
+"""
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+
+SIZES_MB = (1, 30, 100)
+CONCURRENT_UPLOADS = 4
+
+
+def _make_upload(size_mb):
+    from fastapi import UploadFile
+
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = os.urandom(1024 * 1024)
+    for _ in range(size_mb):
+        spool.write(block)
+    spool.seek(0)
+    return UploadFile(file=spool, filename="photo.jpg")
+
+
+async def _buffered(upload, target_dir):
+    contents = await upload.read()
+    with open(os.path.join(target_dir, f"{id(upload)}.jpg"), "wb") as f:
+        f.write(contents)
+
+
+async def _streamed(upload, target_dir):
+    from app.services.note_storage import store_upload
+
+    await store_upload(upload, max_bytes=1 << 40)
+
+
+def child(mode, size_mb):
+    from app.core.config import settings
+
+    with tempfile.TemporaryDirectory() as target_dir:
+        settings.UPLOAD_DIR = target_dir
+        uploads = [_make_upload(size_mb) for _ in range(CONCURRENT_UPLOADS)]
+        baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        handler = _buffered if mode == "buffered" else _streamed
+
+        async def run_all():
+            await asyncio.gather(*(handler(u, target_dir) for u in uploads))
+
+        started = time.perf_counter()
+        asyncio.run(run_all())
+        elapsed = time.perf_counter() - started
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    total_mb = size_mb * CONCURRENT_UPLOADS
+    print(f"{mode:<9} {size_mb:>8} {total_mb / elapsed:>10.1f} {(peak_kb - baseline_kb) / 1024:>14.1f}")
+
+
+def main():
+    print(f"{'mode':<9} {'MB/file':>8} {'MB/s':>10} {'peak RSS +MB':>14}   ({CONCURRENT_UPLOADS} concurrent uploads)")
+    for size_mb in SIZES_MB:
+        for mode in ("buffered", "streamed"):
+            subprocess.run([sys.executable, __file__, mode, str(size_mb)], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        child(sys.argv[1], int(sys.argv[2]))
+    else:
+        main()
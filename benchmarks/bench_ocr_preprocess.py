@@ -0,0 +1,81 @@
+"""OCR time and text yield with and without the preprocessing pipeline.
+
+Runs tesseract over every image in a fixture directory, first on the plain
+grayscale image (the previous behaviour) and then through
+app.services.ocr_preprocess, and reports seconds per image and characters
+recovered. Without a directory argument a synthetic corpus of skewed,
+unevenly lit, oversized "phone photos" is generated. Requires the tesseract
+binary. Run from the repository root:
+
+    python benchmarks/bench_ocr_preprocess.py [fixture_dir]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pytesseract
+from PIL import Image, ImageDraw
+
+from app.services.ocr import TESSERACT_CONFIG
+from app.services.ocr_preprocess import preprocess
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+SYNTHETIC_IMAGES = 6
+WORDS = "photosynthesis converts light energy into chemical energy stored in glucose molecules".split()
+
+
+def synthetic_corpus(directory):
+    random.seed(7)
+    for i in range(SYNTHETIC_IMAGES):
+        page = Image.new("L", (1240, 1754), 235)
+        draw = ImageDraw.Draw(page)
+        for line in range(35):
+            text = " ".join(random.choice(WORDS) for _ in range(8))
+            draw.text((110, 120 + line * 42), text, fill=25)
+        # Skew, a lighting gradient and a 12 MP phone-camera resolution
+        page = page.rotate(random.uniform(-6, 6), expand=True, fillcolor=120)
+        page = page.resize((3024, 4032), Image.BICUBIC)
+        gradient = np.linspace(0.55, 1.0, page.size[0], dtype=np.float32)[None, :]
+        lit = (np.asarray(page, dtype=np.float32) * gradient).clip(0, 255).astype(np.uint8)
+        Image.fromarray(lit).save(os.path.join(directory, f"synthetic_{i}.jpg"), quality=85)
+
+
+def ocr(image):
+    started = time.perf_counter()
+    text = pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+    return time.perf_counter() - started, len("".join(text.split()))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as generated:
+        directory = sys.argv[1] if len(sys.argv) > 1 else generated
+        if directory == generated:
+            synthetic_corpus(directory)
+
+        totals = {"raw": [0.0, 0], "preprocessed": [0.0, 0]}
+        print(f"{'image':<24} {'raw s':>8} {'raw chars':>10} {'prep s':>8} {'prep chars':>11}")
+        for name in sorted(os.listdir(directory)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image = Image.open(os.path.join(directory, name))
+            raw_s, raw_chars = ocr(image.convert("L"))
+            # Preprocessed timings include the preprocessing itself
+            started = time.perf_counter()
+            _, prep_chars = ocr(preprocess(image))
+            prep_s = time.perf_counter() - started
+            for key, (s, c) in (("raw", (raw_s, raw_chars)), ("preprocessed", (prep_s, prep_chars))):
+                totals[key][0] += s
+                totals[key][1] += c
+            print(f"{name:<24} {raw_s:>8.2f} {raw_chars:>10} {prep_s:>8.2f} {prep_chars:>11}")
+
+        print(f"{'total':<24} {totals['raw'][0]:>8.2f} {totals['raw'][1]:>10} "
+              f"{totals['preprocessed'][0]:>8.2f} {totals['preprocessed'][1]:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Round-trip and latency benchmark for POST /offline/sync.
+
+Replays offline queues of 10, 100 and 1,000 attempts against the database in
+DATABASE_URL, once through the previous per-attempt path and once through the
+batched path in app.api.offline, then checks that a queue spanning several
+sync batches for one topic ends with the same mastery state as folding its
+attempts one by one. Run from the repository root after `alembic upgrade head`:
+
+    python benchmarks/bench_offline_sync.py
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import delete, event
+
+import app.db.base  # noqa: F401  (registers every model the relationships refer to)
+from app.api.offline import SYNC_BATCH_SIZE, sync_offline_data
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.attempt import Attempt
+from app.models.mastery import Mastery
+from app.models.topic import Topic
+from app.models.topic_rollup import TopicMasteryRollup
+from app.models.user import User
+from app.services.mastery_service import MasteryState, calculate_mastery_score
+
+SIZES = (10, 100, 1000)
+TOPIC_COUNT = 20
+
+round_trips = 0
+
+
+def _count_round_trips(conn, cursor, statement, parameters, context, executemany):
+    # pg8000 sends one message per parameter set for executemany()
+    global round_trips
+    round_trips += len(parameters) if executemany else 1
+
+
+event.listen(engine, "before_cursor_execute", _count_round_trips)
+event.listen(async_engine.sync_engine, "before_cursor_execute", _count_round_trips)
+
+
+def legacy_sync(data, db, current_user):
+    """The per-attempt implementation this benchmark compares against."""
+    count = 0
+    for attempt in data.get("attempts", []):
+        topic_id = attempt.get("topicId")
+        is_correct = bool(attempt.get("isCorrect"))
+        db.add(Attempt(user_id=current_user.id, topic_id=topic_id, is_correct=is_correct))
+        count += 1
+        mastery = db.query(Mastery).filter(Mastery.user_id == current_user.id, Mastery.topic_id == topic_id).first()
+        score_change = 5 if is_correct else -2
+        if not mastery:
+            mastery = Mastery(user_id=current_user.id, topic_id=topic_id, score=50.0 + score_change)
+            db.add(mastery)
+            db.flush()  # SessionLocal doesn't autoflush; a later attempt on this topic must find the row
+        else:
+            mastery.score = max(0.0, min(100.0, float(mastery.score) + score_change))
+    db.commit()
+    return {"status": "synced", "count": count}
+
+
+def build_payload(size, topic_ids):
+    return {
+        "attempts": [
+            {
+                "topicId": random.choice(topic_ids),
+                "isCorrect": random.random() < 0.6,
+                "solvingTime": random.randint(5, 60),
+                "confidence": round(random.random(), 2),
+            }
+            for _ in range(size)
+        ]
+    }
+
+
+def reset(db, user_id):
+    db.execute(delete(Attempt).where(Attempt.user_id == user_id))
+    db.execute(delete(Mastery).where(Mastery.user_id == user_id))
+    db.commit()
+
+
+async def run(label, payload, user_id):
+    global round_trips
+    current_user = SimpleNamespace(id=user_id, school=None, class_name=None)
+    db = SessionLocal()
+    try:
+        round_trips = 0
+        started = time.perf_counter()
+        if label == "legacy":
+            legacy_sync(payload, db, current_user)
+        else:
+            async with AsyncSessionLocal() as async_db:
+                await sync_offline_data(payload, async_db, current_user)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        trips = round_trips
+        reset(db, user_id)
+    finally:
+        db.close()
+    print(f"{label:<8} {len(payload['attempts']):>6} {trips:>12} {elapsed_ms:>12.1f}")
+
+
+async def check_multi_batch(user_id, topic_id):
+    """A queue of 2.5 batches on one topic: each batch must fold onto the state the previous one wrote."""
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    attempts = [
+        {
+            "topicId": topic_id,
+            "isCorrect": random.random() < 0.6,
+            "solvingTime": random.randint(5, 60),
+            "confidence": round(random.random(), 2),
+            "createdAt": (started + timedelta(seconds=i)).isoformat(),
+        }
+        for i in range(SYNC_BATCH_SIZE * 5 // 2)
+    ]
+    current_user = SimpleNamespace(id=user_id, school=None, class_name=None)
+    async with AsyncSessionLocal() as async_db:
+        await sync_offline_data({"attempts": attempts}, async_db, current_user)
+
+    expected = MasteryState()
+    for attempt in attempts:
+        expected.update(calculate_mastery_score(attempt["isCorrect"], attempt["solvingTime"], attempt["confidence"]))
+    db = SessionLocal()
+    try:
+        stored = MasteryState.from_row(
+            db.query(Mastery).filter(Mastery.user_id == user_id, Mastery.topic_id == topic_id).one()
+        )
+        reset(db, user_id)
+    finally:
+        db.close()
+    assert stored.count == expected.count, (stored, expected)
+    assert abs(stored.mean - expected.mean) < 1e-6 and abs(stored.variance - expected.variance) < 1e-6, (stored, expected)
+    print(f"multi-batch sync of {len(attempts)} attempts on one topic: {stored.count} observations, matches sequential fold")
+
+
+async def main():
+    random.seed(42)
+    db = SessionLocal()
+    user = User(name="bench-offline-sync")
+    db.add(user)
+    db.flush()
+    topics = [Topic(name=f"bench topic {i}") for i in range(TOPIC_COUNT)]
+    db.add_all(topics)
+    db.commit()
+    user_id, topic_ids = user.id, [t.id for t in topics]
+
+    try:
+        print(f"{'path':<8} {'attempts':>6} {'round trips':>12} {'latency ms':>12}")
+        for size in SIZES:
+            payload = build_payload(size, topic_ids)
+            await run("legacy", payload, user_id)
+            await run("batched", payload, user_id)
+        await check_multi_batch(user_id, topic_ids[0])
+    finally:
+        reset(db, user_id)
+        db.execute(delete(TopicMasteryRollup).where(TopicMasteryRollup.topic_id.in_(topic_ids)))
+        db.execute(delete(Topic).where(Topic.id.in_(topic_ids)))
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+        db.close()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Batch SM-2 engine: equivalence with the scalar SM2 class, then throughput.
+
+Checks `review_batch` against `SM2.review` on random schedules (including
+boundary ease factors and long intervals), then times both over a cohort.
+Run from the repository root:
+
+    python benchmarks/bench_sm2_batch.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from app.services.spaced_repetition import SM2, review_batch
+
+CHECK_SIZE = 200_000
+COHORT_SIZE = 1_000_000
+
+
+def random_state(rng, n):
+    ease = rng.uniform(1.3, 3.5, n)
+    # Short decimals like 2.5 put interval * ease exactly on .5, where rounding mode matters
+    short = rng.random(n) < 0.5
+    ease[short] = np.round(ease[short], 1)
+    ease[rng.random(n) < 0.05] = 1.3
+    interval = rng.integers(0, 400, n)
+    repetitions = rng.integers(0, 12, n)
+    quality = rng.integers(0, 6, n)
+    return ease, interval, repetitions, quality
+
+
+def scalar(ease, interval, repetitions, quality):
+    out_ease, out_interval, out_reps = [], [], []
+    for e, i, r, q in zip(ease.tolist(), interval.tolist(), repetitions.tolist(), quality.tolist()):
+        sm2 = SM2(ease_factor=e, interval=i, repetitions=r)
+        sm2.review(q)
+        out_ease.append(sm2.ease_factor)
+        out_interval.append(sm2.interval)
+        out_reps.append(sm2.repetitions)
+    return out_ease, out_interval, out_reps
+
+
+def check_equivalence(rng):
+    state = random_state(rng, CHECK_SIZE)
+    expected = scalar(*state)
+    actual = review_batch(*state)
+    for name, want, got in zip(("ease_factor", "interval", "repetitions"), expected, actual):
+        mismatches = np.flatnonzero(np.asarray(want) != got)
+        assert not len(mismatches), f"{name} differs at {mismatches[:5]}: {np.asarray(want)[mismatches[:5]]} vs {got[mismatches[:5]]}"
+    # Repeated reviews compound rounding; follow one new cohort through 8 rounds
+    # (more would push intervals past the dates datetime can represent)
+    ease, _, _, _ = random_state(rng, 20_000)
+    interval, repetitions = np.zeros(len(ease), dtype=np.int64), np.zeros(len(ease), dtype=np.int64)
+    for _ in range(8):
+        quality = rng.integers(0, 6, len(ease))
+        want = scalar(ease, interval, repetitions, quality)
+        ease, interval, repetitions = review_batch(ease, interval, repetitions, quality)
+        assert all(np.array_equal(np.asarray(w), g) for w, g in zip(want, (ease, interval, repetitions)))
+    print(f"equivalence: {CHECK_SIZE} random reviews and 8 rounds x 20000 schedules match SM2.review exactly")
+
+
+def main():
+    rng = np.random.default_rng(7)
+    check_equivalence(rng)
+
+    state = random_state(rng, COHORT_SIZE)
+    started = time.perf_counter()
+    scalar(*state)
+    scalar_s = time.perf_counter() - started
+    started = time.perf_counter()
+    review_batch(*state)
+    batch_s = time.perf_counter() - started
+    print(f"{COHORT_SIZE} reviews: scalar {scalar_s:6.2f}s, batch {batch_s:6.3f}s ({scalar_s / batch_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Local timetable planner: plan a week for 10,000 students in one batch.
+
+Builds random but realistic inputs (weak topics, due and overdue revisions,
+deadlines, study preferences, energy curves), plans every student with
+`plan_week`, checks each plan (2-4 non-overlapping blocks a day, revisions
+not before their due day, same plan on a second run) and reports throughput
+and per-plan latency. Needs no database or LLM. Run from the repository root:
+
+    python benchmarks/bench_timetable_planner.py
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.getcwd())
+
+from app.services.timetable_planner import (
+    DAYS, MAX_BLOCKS_PER_DAY, MIN_BLOCKS_PER_DAY, DueRevision, WeakTopic, plan_week,
+)
+
+STUDENTS = 10_000
+START = date(2026, 10, 19)
+TOPICS = [f"Topic {i}" for i in range(200)]
+PERIODS = ["morning", "afternoon", "evening", "night"]
+
+
+def random_student(rng):
+    topics = rng.sample(TOPICS, 20)
+    return {
+        "weak_topics": [WeakTopic(name, name, round(rng.uniform(5, 69), 1)) for name in topics[:rng.randint(0, 10)]],
+        "due_revisions": [
+            DueRevision(name, name, START + timedelta(days=rng.randint(-3, 6)))
+            for name in topics[10:10 + rng.randint(0, 8)]
+        ],
+        "deadlines": [(f"Exam {i}", START + timedelta(days=rng.randint(0, 20))) for i in range(rng.randint(0, 3))],
+        "syllabus": topics[18:18 + rng.randint(0, 2)],
+        "study_preferences": rng.sample(PERIODS, rng.randint(0, 2)),
+        "energy_curve": rng.choice([None, "morning person", "night owl", {p: rng.randint(1, 5) for p in PERIODS}]),
+    }
+
+
+def check(plan, student):
+    assert len(plan) == DAYS
+    due = {r.name: r.due for r in student["due_revisions"]}
+    for offset, day in enumerate(plan):
+        slots = day["slots"]
+        assert MIN_BLOCKS_PER_DAY <= len(slots) <= MAX_BLOCKS_PER_DAY, day
+        for before, after in zip(slots, slots[1:]):
+            assert before["end_time"] <= after["start_time"], day
+        for slot in slots:
+            if slot["kind"] == "revision":
+                for name in slot["topic"].split(", "):
+                    assert START + timedelta(days=offset) >= min(due[name], START), (name, day)
+
+
+def main():
+    rng = random.Random(42)
+    students = [random_student(rng) for _ in range(STUDENTS)]
+
+    latencies = []
+    started = time.perf_counter()
+    plans = []
+    for student in students:
+        t = time.perf_counter()
+        plans.append(plan_week(START, **student))
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - started
+
+    for plan, student in zip(plans, students):
+        check(plan, student)
+    assert all(plan_week(START, **s) == p for s, p in zip(students[:500], plans[:500])), "plans are not deterministic"
+
+    latencies.sort()
+    blocks = sum(len(day["slots"]) for plan in plans for day in plan)
+    print(f"students              {STUDENTS}")
+    print(f"total                 {elapsed:.2f} s ({STUDENTS / elapsed:,.0f} plans/s)")
+    print(f"latency p50           {statistics.median(latencies) * 1000:.3f} ms")
+    print(f"latency p99           {latencies[int(0.99 * len(latencies))] * 1000:.3f} ms")
+    print(f"blocks per day (mean) {blocks / (STUDENTS * DAYS):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""A local OpenAI-compatible chat completions stub with artificial latency.
+
+Used by the LLM benchmarks in place of the real API:
+
+    python benchmarks/stub_llm_server.py --port 8765 --delay 1.5
+
+then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1.
+Benchmarks can also start it in-process with `start_in_thread`.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+STUB_STATE = {"delay": 1.0, "requests": 0, "fail_every": 0}
+
+app = FastAPI()
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    STUB_STATE["requests"] += 1
+    await asyncio.sleep(STUB_STATE["delay"])
+
+    fail_every = STUB_STATE["fail_every"]
+    if fail_every and STUB_STATE["requests"] % fail_every == 0:
+        from fastapi.responses import JSONResponse
+        return JSONResponse(status_code=503, content={"error": {"message": "stub overloaded"}})
+
+    prompt = body["messages"][-1]["content"]
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        content = json.dumps({
+            "echo": prompt[:80],
+            "questions": [],
+            "title": "Stub title",
+            "topics": [{"name": "Stub topic", "subtopics": ["Stub subtopic"]}],
+            "schedule": [],
+        })
+    else:
+        content = f"Stub answer for: {prompt[:80]}"
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                  "total_tokens": (len(prompt) + len(content)) // 4},
+    }
+
+
+def start_in_thread(port: int = 8765, delay: float = 1.0, fail_every: int = 0) -> str:
+    """Serve the stub from a daemon thread and return its OpenAI base URL."""
+    STUB_STATE.update(delay=delay, fail_every=fail_every, requests=0)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+    STUB_STATE.update(delay=args.delay, fail_every=args.fail_every)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)